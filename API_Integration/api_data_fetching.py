@@ -1,9 +1,20 @@
 import requests
 import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+from checkpoint_store import CheckpointStore
 
 API_URL = "https://api.example.com/data"
 API_KEY = "your_api_key_here"
 
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 def fetch_data(endpoint, params=None):
     """Fetches data from the API with authentication and error handling."""
     headers = {"Authorization": f"Bearer {API_KEY}"}
@@ -34,11 +45,211 @@ def fetch_paginated_data(endpoint, params=None):
 
     return all_data
 
+def create_session(pool_size=10, api_key=API_KEY):
+    """Creates a keep-alive session whose connection pool fits pool_size concurrent requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Authorization"] = f"Bearer {api_key}"
+    return session
+
+def retry_delay(response, attempt, backoff):
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered exponential backoff."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+def fetch_page(session, url, params=None, timeout=30, max_retries=5, backoff=0.5):
+    """Fetches one page, retrying 429/5xx responses and connection errors with backoff."""
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+            if response.status_code not in RETRY_STATUS_CODES:
+                response.raise_for_status()
+                return response.json()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+        if attempt == max_retries:
+            response.raise_for_status()
+        time.sleep(retry_delay(response, attempt, backoff))
+
+def reported_page_count(data):
+    """Total number of pages if the first page reports it directly or through a record count."""
+    for key in ("total_pages", "num_pages", "page_count"):
+        if data.get(key):
+            return int(data[key])
+    page_size = len(data.get("results") or [])
+    if data.get("count") and page_size:
+        return -(-int(data["count"]) // page_size)
+    return None
+
+class NDJSONWriter:
+    """Writes records to an NDJSON file, one line each, safe to call from several threads.
+
+    The file is truncated unless append is set, as checkpointed runs do to extend their output.
+    """
+
+    def __init__(self, output_path, append=False):
+        self.file = open(output_path, "a" if append else "w", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.records_written = 0
+
+    def write_records(self, records):
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with self.lock:
+            self.file.write(lines)
+            self.file.flush()
+            self.records_written += len(records)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def fetch_pages_in_pool(get, url, params, pages, max_workers):
+    """Yields (page, data) as pages complete, with at most max_workers requests in flight.
+
+    If a page ultimately fails, pages not yet started are cancelled before the error propagates.
+    """
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(get, url, {**params, "page": page}): page for page in pages}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def next_cursor_request(url, params, next_page):
+    """URL and params for a `next` value that is either a full URL or a page number."""
+    if isinstance(next_page, str) and next_page.startswith(("http://", "https://")):
+        return next_page, None
+    return url, {**params, "page": next_page}
+
+def fetch_pages_concurrently(endpoint, output_path, params=None, base_url=API_URL, max_workers=8,
+                             session=None, timeout=30, max_retries=5, backoff=0.5):
+    """Fetches every page of an endpoint and streams the records to NDJSON as pages arrive.
+
+    Pages are fetched over one pooled keep-alive session. When the first page reports a
+    page count, the remaining pages are fetched with at most max_workers in flight;
+    otherwise the `next` link or page number is followed one page at a time.
+    Returns the number of records written.
+    """
+    url = f"{base_url}/{endpoint}"
+    params = dict(params or {})
+    session = session or create_session(max_workers)
+
+    def get(page_url, page_params):
+        return fetch_page(session, page_url, page_params, timeout, max_retries, backoff)
+
+    with NDJSONWriter(output_path) as writer:
+        data = get(url, {**params, "page": 1})
+        if not data or "results" not in data:
+            return 0
+        writer.write_records(data["results"])
+
+        page_count = reported_page_count(data)
+        if page_count:
+            pages = range(2, page_count + 1)
+            for _, page_data in fetch_pages_in_pool(get, url, params, pages, max_workers):
+                writer.write_records(page_data.get("results", []))
+            return writer.records_written
+
+        # Cursor pagination: `next` is either a full URL or a page number
+        while data.get("next"):
+            data = get(*next_cursor_request(url, params, data["next"]))
+            if not data or "results" not in data:
+                break
+            writer.write_records(data["results"])
+        return writer.records_written
+
+def fetch_with_checkpoints(endpoint, output_path, checkpoint_path, params=None, base_url=API_URL, max_workers=8,
+                           id_field="id", since_param="updated_since", session=None, timeout=30, max_retries=5,
+                           backoff=0.5):
+    """Fetches an endpoint like fetch_pages_concurrently, checkpointing progress in SQLite.
+
+    Each completed page and the IDs and content hashes of its records are committed to the
+    checkpoint store right after the page is appended to the NDJSON output. An interrupted
+    run picks up at the pages (or cursor) it had not finished, and records already
+    persisted with the same content are not written again. Once a run finishes, the next
+    run passes its start time as `since_param` so only new or changed records are pulled.
+    Returns the number of records written by this call.
+    """
+    url = f"{base_url}/{endpoint}"
+    session = session or create_session(max_workers)
+
+    def get(page_url, page_params):
+        return fetch_page(session, page_url, page_params, timeout, max_retries, backoff)
+
+    with CheckpointStore(checkpoint_path) as store, NDJSONWriter(output_path, append=True) as writer:
+        run_id = store.start_run(endpoint)
+        state = store.run_state(run_id)
+        params = dict(params or {})
+        if since_param and state["updated_since"] is not None:
+            params[since_param] = state["updated_since"]
+        completed = store.completed_pages(run_id)
+
+        def persist(page, data, next_cursor=None):
+            written = store.new_or_changed(endpoint, data.get("results", []), id_field)
+            writer.write_records([record for _, _, record in written])
+            store.complete_page(run_id, page, written, next_cursor)
+
+        page_count = state["page_count"]
+        if 1 not in completed:
+            data = get(url, {**params, "page": 1})
+            if not data or "results" not in data:
+                return writer.records_written
+            page_count = reported_page_count(data)
+            if page_count:
+                store.set_page_count(run_id, page_count)
+            persist(1, data, None if page_count else data.get("next"))
+
+        if page_count:
+            pages = [page for page in range(2, page_count + 1) if page not in completed]
+            for page, page_data in fetch_pages_in_pool(get, url, params, pages, max_workers):
+                persist(page, page_data)
+        else:
+            page, next_page = store.last_cursor(run_id)
+            while next_page:
+                data = get(*next_cursor_request(url, params, next_page))
+                if not data or "results" not in data:
+                    return writer.records_written
+                page += 1
+                next_page = data.get("next")
+                persist(page, data, next_page)
+
+        store.finish_run(run_id)
+        return writer.records_written
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch paginated healthcare records from the API.")
+    parser.add_argument("--concurrent", action="store_true", help="Fetch pages concurrently and stream to NDJSON")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--checkpoint", help="SQLite checkpoint file; resumes interrupted pulls and fetches only changes")
+    args = parser.parse_args()
+
     endpoint = "healthcare_records"  # Adjust endpoint
-    data = fetch_paginated_data(endpoint)
-    
-    if data:
-        with open("data/api_results.json", "w") as f:
-            json.dump(data, f, indent=4)
-        print("API data fetching complete. Saved as api_results.json")
+    if args.checkpoint:
+        count = fetch_with_checkpoints(endpoint, "data/api_results.ndjson", args.checkpoint,
+                                       max_workers=args.max_workers)
+        print(f"API data fetching complete. Appended {count} new or changed records to api_results.ndjson")
+    elif args.concurrent:
+        count = fetch_pages_concurrently(endpoint, "data/api_results.ndjson", max_workers=args.max_workers)
+        print(f"API data fetching complete. Streamed {count} records to api_results.ndjson")
+    else:
+        data = fetch_paginated_data(endpoint)
+
+        if data:
+            with open("data/api_results.json", "w") as f:
+                json.dump(data, f, indent=4)
+            print("API data fetching complete. Saved as api_results.json")
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_data_fetching
+from api_data_fetching import fetch_pages_concurrently
+from stub_api_server import StubAPI
+
+LATENCIES = [0.0, 0.01, 0.05]
+TOTAL_RECORDS = 5000
+PAGE_SIZE = 50
+TOTAL_PAGES = -(-TOTAL_RECORDS // PAGE_SIZE)
+
+# Original sequential loop, pointed at the stub server
+def fetch_sequential(base_url):
+    api_data_fetching.API_URL = base_url
+    return api_data_fetching.fetch_paginated_data("records")
+
+def main():
+    print(f"{'latency (ms)':>12} {'sequential p/s':>15} {'concurrent p/s':>15} {'with 5% 429/503 p/s':>20}")
+    for latency in LATENCIES:
+        with StubAPI(TOTAL_RECORDS, PAGE_SIZE, latency=latency) as api, tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            records = fetch_sequential(api.base_url)
+            sequential_rate = TOTAL_PAGES / (time.perf_counter() - start)
+            assert len(records) == TOTAL_RECORDS
+
+            start = time.perf_counter()
+            written = fetch_pages_concurrently("records", os.path.join(tmp, "out.ndjson"), base_url=api.base_url)
+            concurrent_rate = TOTAL_PAGES / (time.perf_counter() - start)
+            assert written == TOTAL_RECORDS
+
+        with StubAPI(TOTAL_RECORDS, PAGE_SIZE, latency=latency, failure_rate=0.05) as api, \
+                tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            written = fetch_pages_concurrently("records", os.path.join(tmp, "out.ndjson"), base_url=api.base_url,
+                                               backoff=0.01)
+            retry_rate = TOTAL_PAGES / (time.perf_counter() - start)
+            assert written == TOTAL_RECORDS
+
+        print(f"{latency * 1000:>12.0f} {sequential_rate:>15.1f} {concurrent_rate:>15.1f} {retry_rate:>20.1f}")
+
+if __name__ == "__main__":
+    main()
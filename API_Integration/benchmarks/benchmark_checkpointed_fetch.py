@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_data_fetching import fetch_with_checkpoints
+from stub_api_server import StubAPI
+
+TOTAL_RECORDS = 5000
+PAGE_SIZE = 50
+
+def read_ids(path):
+    with open(path) as f:
+        return [json.loads(line)["id"] for line in f]
+
+# Interrupt a pull with an outage, resume it, then run an incremental pull after changes
+def run_scenario(cursor_only):
+    label = "cursor" if cursor_only else "page count"
+    with StubAPI(TOTAL_RECORDS, PAGE_SIZE, cursor_only=cursor_only, outage_after=40) as api, \
+            tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "api_results.ndjson")
+        checkpoint_path = os.path.join(tmp, "checkpoints.sqlite")
+
+        def fetch():
+            start = time.perf_counter()
+            requests_before = api.requests_served
+            written = fetch_with_checkpoints("records", output_path, checkpoint_path, base_url=api.base_url,
+                                             max_retries=1, backoff=0.01)
+            return written, api.requests_served - requests_before, time.perf_counter() - start
+
+        try:
+            fetch()
+        except requests.HTTPError:
+            pass
+        interrupted_ids = read_ids(output_path)
+        print(f"[{label}] interrupted after {len(interrupted_ids)} records")
+
+        api.outage_after = None
+        written, served, elapsed = fetch()
+        ids = read_ids(output_path)
+        print(f"[{label}] resumed: wrote {written} records in {served} requests ({elapsed:.2f}s); "
+              f"total {len(ids)}, unique {len(set(ids))}, complete={sorted(set(ids)) == list(range(TOTAL_RECORDS))}")
+
+        time.sleep(0.01)
+        api.update_records(range(100))
+        api.add_records(50)
+        written, served, elapsed = fetch()
+        print(f"[{label}] incremental: wrote {written} new or changed records in {served} requests ({elapsed:.2f}s)")
+
+        written, served, elapsed = fetch()
+        print(f"[{label}] no changes: wrote {written} records in {served} requests ({elapsed:.2f}s)")
+
+def main():
+    run_scenario(cursor_only=False)
+    run_scenario(cursor_only=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    endpoint TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    updated_since REAL,
+    page_count INTEGER,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    run_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    record_count INTEGER NOT NULL,
+    next_cursor TEXT,
+    PRIMARY KEY (run_id, page)
+);
+CREATE TABLE IF NOT EXISTS records (
+    endpoint TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (endpoint, record_id)
+);
+"""
+
+def record_hash(record):
+    """Stable content hash of a record, used to tell changed records from already persisted ones."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+class CheckpointStore:
+    """SQLite record of ingestion progress for paginated API pulls.
+
+    A run tracks the pages (or cursor) completed so far; an unfinished run is resumed
+    rather than restarted. Persisted record IDs and content hashes are kept per endpoint
+    so later runs only write new or changed records, and the start time of the last
+    finished run is the `updated_since` watermark for the next incremental pull.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def start_run(self, endpoint):
+        """Returns the unfinished run for an endpoint, or starts a new incremental one."""
+        row = self.connection.execute(
+            "SELECT run_id FROM runs WHERE endpoint = ? AND finished_at IS NULL ORDER BY run_id DESC LIMIT 1",
+            (endpoint,),
+        ).fetchone()
+        if row:
+            return row[0]
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (endpoint, started_at, updated_since) VALUES (?, ?, ?)",
+                (endpoint, time.time(), self.last_finished_start(endpoint)),
+            )
+        return cursor.lastrowid
+
+    def last_finished_start(self, endpoint):
+        row = self.connection.execute(
+            "SELECT MAX(started_at) FROM runs WHERE endpoint = ? AND finished_at IS NOT NULL", (endpoint,)
+        ).fetchone()
+        return row[0]
+
+    def run_state(self, run_id):
+        endpoint, updated_since, page_count = self.connection.execute(
+            "SELECT endpoint, updated_since, page_count FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        return {"endpoint": endpoint, "updated_since": updated_since, "page_count": page_count}
+
+    def set_page_count(self, run_id, page_count):
+        with self.connection:
+            self.connection.execute("UPDATE runs SET page_count = ? WHERE run_id = ?", (page_count, run_id))
+
+    def completed_pages(self, run_id):
+        return {page for (page,) in self.connection.execute("SELECT page FROM pages WHERE run_id = ?", (run_id,))}
+
+    def last_cursor(self, run_id):
+        """Last completed page of a cursor-paginated run and the cursor it pointed to next."""
+        row = self.connection.execute(
+            "SELECT page, next_cursor FROM pages WHERE run_id = ? ORDER BY page DESC LIMIT 1", (run_id,)
+        ).fetchone()
+        if row is None:
+            return 0, None
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def new_or_changed(self, endpoint, records, id_field="id"):
+        """Filters a page down to records not yet persisted with the same content."""
+        keyed = [(str(record.get(id_field, record_hash(record))), record_hash(record), record) for record in records]
+        if not keyed:
+            return []
+        placeholders = ",".join("?" * len(keyed))
+        persisted = dict(self.connection.execute(
+            f"SELECT record_id, content_hash FROM records WHERE endpoint = ? AND record_id IN ({placeholders})",
+            [endpoint] + [record_id for record_id, _, _ in keyed],
+        ))
+        return [(record_id, content_hash, record) for record_id, content_hash, record in keyed
+                if persisted.get(record_id) != content_hash]
+
+    def complete_page(self, run_id, page, written, next_cursor=None):
+        """Marks a page done, with the cursor it points to, and its written records persisted in one transaction."""
+        endpoint = self.run_state(run_id)["endpoint"]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO records (endpoint, record_id, content_hash) VALUES (?, ?, ?)",
+                [(endpoint, record_id, content_hash) for record_id, content_hash, _ in written],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (run_id, page, record_count, next_cursor) VALUES (?, ?, ?, ?)",
+                (run_id, page, len(written), json.dumps(next_cursor)),
+            )
+
+    def finish_run(self, run_id):
+        with self.connection:
+            self.connection.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,147 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class StubAPI:
+    """Local paginated API for exercising the fetchers without network access.
+
+    Serves `total_records` records in pages of `page_size` at any path. Responses carry
+    `results`, `next` and, unless `cursor_only` is set, `count` and `total_pages`. Each
+    request sleeps `latency` seconds, and a `failure_rate` share of requests answer
+    429 or 503 with a Retry-After header instead. Once `outage_after` requests have been
+    served every request fails with 500 until `outage_after` is cleared. An
+    `updated_since` query parameter limits results to records changed after that time.
+    """
+
+    def __init__(self, total_records=1000, page_size=50, latency=0.0, failure_rate=0.0,
+                 cursor_only=False, retry_after=0, outage_after=None, seed=42):
+        self.total_records = total_records
+        self.page_size = page_size
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.cursor_only = cursor_only
+        self.retry_after = retry_after
+        self.outage_after = outage_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests_served = 0
+        self.failures_served = 0
+        self.created_at = time.time()
+        self.updates = {}
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def add_records(self, count):
+        """Appends new records, stamped with the current time."""
+        with self.lock:
+            for record_id in range(self.total_records, self.total_records + count):
+                self.updates[record_id] = (0, time.time())
+            self.total_records += count
+
+    def update_records(self, record_ids):
+        """Bumps the revision and update time of existing records."""
+        with self.lock:
+            for record_id in record_ids:
+                revision, _ = self.updates.get(record_id, (0, self.created_at))
+                self.updates[record_id] = (revision + 1, time.time())
+
+    def record(self, record_id):
+        revision, updated_at = self.updates.get(record_id, (0, self.created_at))
+        return {
+            "id": record_id,
+            "patient_id": f"P{record_id:08d}",
+            "charge": round(record_id * 1.5 + revision, 2),
+            "updated_at": updated_at,
+        }
+
+    def matching_ids(self, updated_since):
+        if updated_since is None:
+            return range(self.total_records)
+        return [record_id for record_id, (_, updated_at) in sorted(self.updates.items())
+                if updated_at > updated_since]
+
+    def page(self, page, updated_since=None):
+        record_ids = self.matching_ids(updated_since)
+        total_pages = max(-(-len(record_ids) // self.page_size), 1)
+        start = (page - 1) * self.page_size
+        body = {
+            "results": [self.record(record_id) for record_id in record_ids[start:start + self.page_size]],
+            "next": page + 1 if page < total_pages else None,
+        }
+        if not self.cursor_only:
+            body["count"] = len(record_ids)
+            body["total_pages"] = total_pages
+        return body
+
+    def failure_status(self):
+        """Status code to fail this request with, or None to serve it."""
+        with self.lock:
+            self.requests_served += 1
+            if self.outage_after is not None and self.requests_served > self.outage_after:
+                status = 500
+            elif self.random.random() < self.failure_rate:
+                status = self.random.choice([429, 503])
+            else:
+                return None
+            self.failures_served += 1
+            return status
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if api.latency:
+                    time.sleep(api.latency)
+                status = api.failure_status()
+                if status is not None:
+                    self.send_json({"detail": "try again"}, status=status,
+                                   headers={"Retry-After": str(api.retry_after)})
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query.get("page", ["1"])[0])
+                updated_since = float(query["updated_since"][0]) if "updated_since" in query else None
+                self.send_json(api.page(page, updated_since))
+
+            def send_json(self, body, status=200, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
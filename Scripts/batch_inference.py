@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import pickle
+import argparse
+import threading
+import queue
+import numpy as np
+
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+def load_label_array(mapping_path):
+    """Reads index_to_icd10.json ({"0": "J20.9", ...}) into an array indexed by model output.
+
+    Indices missing from the mapping hold "", so label_array[indices] maps a whole batch of
+    argmax/top-k results at once instead of a dict lookup per prediction.
+    """
+    with open(mapping_path, "r") as f:
+        mapping = json.load(f)
+    labels = np.full(max(int(index) for index in mapping) + 1 if mapping else 0, "", dtype=object)
+    for index, code in mapping.items():
+        labels[int(index)] = code
+    return labels.astype(str)
+
+class SklearnBackend:
+    """Scores with a fitted scikit-learn classifier's predict_proba.
+
+    Output columns follow model.classes_, so when the classes are the label indices
+    the column order is mapped back to them.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        classes = getattr(model, "classes_", None)
+        self.output_index = classes.astype(np.int64) if classes is not None and np.issubdtype(classes.dtype, np.integer) else None
+
+    @classmethod
+    def load(cls, model_path):
+        with open(model_path, "rb") as f:
+            return cls(pickle.load(f))
+
+    def predict_scores(self, batch):
+        return self.model.predict_proba(batch).astype(np.float32, copy=False)
+
+class NumpyMLPBackend:
+    """Forward pass of a ReLU multilayer perceptron in plain NumPy float32 matrix products."""
+
+    def __init__(self, weights, biases):
+        self.weights = [np.ascontiguousarray(weight, dtype=np.float32) for weight in weights]
+        self.biases = [np.asarray(bias, dtype=np.float32) for bias in biases]
+        self.output_index = None
+
+    @classmethod
+    def load(cls, model_path):
+        """Loads W0, b0, W1, b1, ... from an .npz file."""
+        with np.load(model_path) as layers:
+            n_layers = len([name for name in layers.files if name.startswith("W")])
+            return cls([layers[f"W{i}"] for i in range(n_layers)], [layers[f"b{i}"] for i in range(n_layers)])
+
+    @classmethod
+    def from_sklearn(cls, mlp):
+        """Reuses the weights of a fitted multiclass sklearn MLPClassifier (relu activation)."""
+        backend = cls(mlp.coefs_, mlp.intercepts_)
+        backend.output_index = SklearnBackend(mlp).output_index
+        return backend
+
+    def save(self, model_path):
+        layers = {}
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            layers[f"W{i}"] = weight
+            layers[f"b{i}"] = bias
+        np.savez(model_path, **layers)
+
+    def predict_scores(self, batch):
+        # Logits of the last layer; argmax and top-k do not need the softmax
+        hidden = batch
+        for weight, bias in zip(self.weights[:-1], self.biases[:-1]):
+            hidden = hidden @ weight
+            hidden += bias
+            np.maximum(hidden, 0, out=hidden)
+        scores = hidden @ self.weights[-1]
+        scores += self.biases[-1]
+        return scores
+
+class OnnxBackend:
+    """Runs an ONNX export of the model with onnxruntime on the CPU."""
+
+    def __init__(self, model_path):
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_index = None
+
+    @classmethod
+    def load(cls, model_path):
+        return cls(model_path)
+
+    def predict_scores(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+class CoreMLBackend:
+    """Core ML model prediction, as in debug_model.py; coremltools only predicts on macOS."""
+
+    def __init__(self, model_path, input_name="input_1", output_name="Identity"):
+        import coremltools as ct
+        self.model = ct.models.MLModel(model_path)
+        self.input_name = input_name
+        self.output_name = output_name
+        self.output_index = None
+
+    @classmethod
+    def load(cls, model_path):
+        return cls(model_path)
+
+    def predict_scores(self, batch):
+        return np.asarray(self.model.predict({self.input_name: batch})[self.output_name], dtype=np.float32)
+
+BACKENDS = {
+    "sklearn": SklearnBackend,
+    "numpy": NumpyMLPBackend,
+    "onnx": OnnxBackend,
+    "coreml": CoreMLBackend,
+}
+
+BACKEND_EXTENSIONS = {
+    ".pkl": "sklearn",
+    ".pickle": "sklearn",
+    ".npz": "numpy",
+    ".onnx": "onnx",
+    ".mlmodel": "coreml",
+}
+
+def load_backend(model_path, backend=None):
+    """Loads a model with the named backend, or the one matching the file extension."""
+    backend = backend or BACKEND_EXTENSIONS.get(os.path.splitext(model_path)[1].lower())
+    if backend not in BACKENDS:
+        raise ValueError(f"No inference backend for {model_path}; choose one of {sorted(BACKENDS)}")
+    return BACKENDS[backend].load(model_path)
+
+def iter_batches(embeddings, batch_size=DEFAULT_BATCH_SIZE, pad=False):
+    """Yields (row count, float32 batch) slices of an embedding matrix, e.g. a memory-mapped .npy.
+
+    Sparse matrices (TF-IDF vectors) are densified one batch at a time. With pad, the last
+    batch is zero-filled up to batch_size for backends compiled for a fixed input shape;
+    the row count says how many rows are real.
+    """
+    for start in range(0, embeddings.shape[0], batch_size):
+        batch = embeddings[start:start + batch_size]
+        if hasattr(batch, "toarray"):
+            batch = batch.toarray()
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        rows = len(batch)
+        if pad and rows < batch_size:
+            padded = np.zeros((batch_size,) + batch.shape[1:], dtype=np.float32)
+            padded[:rows] = batch
+            batch = padded
+        yield rows, batch
+
+def prefetch(iterator, depth=2):
+    """Runs iterator in a background thread, keeping up to depth items ready.
+
+    Reading the next batch (page faults on a memory map, dtype conversion) then overlaps
+    with scoring the current one.
+    """
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    return
+                items.put(item)
+        except BaseException as e:
+            items.put(e)
+        items.put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue
+        while thread.is_alive():
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                thread.join(0.01)
+
+def top_k(scores, k=1):
+    """Column indices and scores of the k best classes per row, best first."""
+    if k == 1:
+        indices = scores.argmax(axis=1)[:, None]
+    else:
+        indices = np.argpartition(scores, -k, axis=1)[:, -k:]
+        order = np.argsort(np.take_along_axis(scores, indices, axis=1), axis=1)[:, ::-1]
+        indices = np.take_along_axis(indices, order, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+def latency_percentiles(latencies, percentiles=DEFAULT_PERCENTILES):
+    """Per-batch latency percentiles in milliseconds."""
+    latencies = np.asarray(latencies) * 1000
+    if not len(latencies):
+        return {}
+    return {f"p{percentile}": float(value) for percentile, value in zip(percentiles, np.percentile(latencies, percentiles))}
+
+def run_inference(backend, embeddings, label_array, k=1, batch_size=DEFAULT_BATCH_SIZE, pad=False,
+                  prefetch_depth=2, output_dir=None):
+    """Scores every embedding in fixed-size batches and maps the top-k outputs to ICD-10 codes.
+
+    Results go into preallocated (n, k) arrays: label indices, scores and codes. With
+    output_dir the index and score arrays are .npy memory maps, so the OS writes them back
+    while later batches are scored. Returns the arrays and the per-batch latencies.
+    """
+    n_rows = embeddings.shape[0]
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        open_memmap = np.lib.format.open_memmap
+        indices = open_memmap(os.path.join(output_dir, "indices.npy"), mode="w+", dtype=np.int32, shape=(n_rows, k))
+        scores = open_memmap(os.path.join(output_dir, "scores.npy"), mode="w+", dtype=np.float32, shape=(n_rows, k))
+    else:
+        indices = np.empty((n_rows, k), dtype=np.int32)
+        scores = np.empty((n_rows, k), dtype=np.float32)
+
+    latencies = []
+    start_row = 0
+    batches = iter_batches(embeddings, batch_size, pad)
+    if prefetch_depth:
+        batches = prefetch(batches, prefetch_depth)
+    for rows, batch in batches:
+        started = time.perf_counter()
+        batch_indices, batch_scores = top_k(backend.predict_scores(batch)[:rows], k)
+        if backend.output_index is not None:
+            batch_indices = backend.output_index[batch_indices]
+        indices[start_row:start_row + rows] = batch_indices
+        scores[start_row:start_row + rows] = batch_scores
+        latencies.append(time.perf_counter() - started)
+        start_row += rows
+
+    # Out-of-range indices (a model wider than the mapping) get no code
+    in_range = indices < len(label_array)
+    codes = np.where(in_range, label_array[np.where(in_range, indices, 0)], "")
+    if output_dir:
+        indices.flush()
+        scores.flush()
+        np.save(os.path.join(output_dir, "codes.npy"), codes)
+    return {"indices": indices, "scores": scores, "codes": codes, "latencies": latencies}
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Batch-score embeddings and map predictions to ICD-10 codes.")
+    parser.add_argument("model_path", help=".pkl (sklearn), .npz (NumPy MLP), .onnx or .mlmodel (macOS only)")
+    parser.add_argument("mapping_path", help="index_to_icd10.json")
+    parser.add_argument("embeddings_path", nargs="?", help=".npy embedding matrix; random embeddings if omitted")
+    parser.add_argument("--backend", choices=sorted(BACKENDS))
+    parser.add_argument("--random-rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--top-k", type=int, default=1)
+    parser.add_argument("--pad", action="store_true", help="zero-pad the last batch to the full batch size")
+    parser.add_argument("--output-dir")
+    args = parser.parse_args(argv)
+
+    backend = load_backend(args.model_path, args.backend)
+    label_array = load_label_array(args.mapping_path)
+    if args.embeddings_path:
+        embeddings = np.load(args.embeddings_path, mmap_mode="r")
+    else:
+        embeddings = np.random.uniform(-1.0, 1.0, size=(args.random_rows, 768)).astype(np.float32)
+
+    started = time.perf_counter()
+    results = run_inference(backend, embeddings, label_array, args.top_k, args.batch_size, args.pad,
+                            output_dir=args.output_dir)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {len(embeddings)} embeddings in {elapsed:.2f}s ({len(embeddings) / elapsed:,.0f}/s)")
+    print("Per-batch latency (ms): " + ", ".join(
+        f"{name} {value:.2f}" for name, value in latency_percentiles(results["latencies"]).items()))
+    print(results["codes"][:5])
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.neural_network import MLPClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_inference import NumpyMLPBackend, SklearnBackend, latency_percentiles, load_label_array, run_inference
+
+N_EMBEDDINGS = 200_000
+EMBEDDING_SIZE = 768
+N_CLASSES = 1000
+HIDDEN_SIZE = 256
+SINGLE_SAMPLES = 2_000
+
+def make_backend(rng):
+    weights = [rng.normal(scale=0.05, size=(EMBEDDING_SIZE, HIDDEN_SIZE)), rng.normal(scale=0.05, size=(HIDDEN_SIZE, N_CLASSES))]
+    biases = [np.zeros(HIDDEN_SIZE), np.zeros(N_CLASSES)]
+    return NumpyMLPBackend(weights, biases)
+
+# Original flow: one (1, 768) prediction at a time, string-keyed dict lookup of the argmax
+def predict_one_at_a_time(backend, embeddings, index_to_icd10):
+    codes = []
+    for row in embeddings:
+        scores = backend.predict_scores(row[None, :].astype(np.float32))
+        codes.append(index_to_icd10.get(str(int(np.argmax(scores))), None))
+    return codes
+
+def check_sklearn_equivalence(rng):
+    X = rng.normal(size=(600, 32)).astype(np.float32)
+    y = rng.integers(0, 5, 600)
+    mlp = MLPClassifier(hidden_layer_sizes=(16,), max_iter=50, random_state=0).fit(X, y)
+    labels = np.array([f"C{i}" for i in range(5)])
+    via_numpy = run_inference(NumpyMLPBackend.from_sklearn(mlp), X, labels, k=1, batch_size=128)
+    via_sklearn = run_inference(SklearnBackend(mlp), X, labels, k=1, batch_size=128)
+    assert (via_numpy["codes"] == via_sklearn["codes"]).all()
+    assert (via_numpy["codes"][:, 0] == labels[mlp.predict(X)]).all()
+
+def main():
+    rng = np.random.default_rng(42)
+    check_sklearn_equivalence(rng)
+    backend = make_backend(rng)
+    embeddings = rng.uniform(-1.0, 1.0, size=(N_EMBEDDINGS, EMBEDDING_SIZE)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mapping_path = os.path.join(tmp, "index_to_icd10.json")
+        with open(mapping_path, "w") as f:
+            json.dump({str(i): f"X{i:02d}.{i % 10}" for i in range(N_CLASSES)}, f)
+        with open(mapping_path) as f:
+            index_to_icd10 = json.load(f)
+        label_array = load_label_array(mapping_path)
+        embeddings_path = os.path.join(tmp, "embeddings.npy")
+        np.save(embeddings_path, embeddings)
+        mapped = np.load(embeddings_path, mmap_mode="r")
+
+        start = time.perf_counter()
+        single_codes = predict_one_at_a_time(backend, embeddings[:SINGLE_SAMPLES], index_to_icd10)
+        single_rate = SINGLE_SAMPLES / (time.perf_counter() - start)
+        print(f"one at a time: {single_rate:,.0f} embeddings/s")
+
+        print(f"{'batch':>6} {'prefetch':>9} {'top-k':>6} {'rows/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for batch_size, prefetch_depth, k in [(256, 0, 1), (4096, 0, 1), (4096, 2, 1), (4096, 2, 5)]:
+            start = time.perf_counter()
+            results = run_inference(backend, mapped, label_array, k, batch_size, prefetch_depth=prefetch_depth,
+                                    output_dir=os.path.join(tmp, "out"))
+            rate = N_EMBEDDINGS / (time.perf_counter() - start)
+            assert list(results["codes"][:SINGLE_SAMPLES, 0]) == single_codes
+            latency = latency_percentiles(results["latencies"])
+            print(f"{batch_size:>6} {prefetch_depth:>9} {k:>6} {rate:>10,.0f} "
+                  f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} {latency['p99']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
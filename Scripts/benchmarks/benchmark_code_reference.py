@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from code_reference import CodeReference
+from profiling import timed
+
+# Roughly the sizes of the full code systems
+SYSTEM_SIZES = {"icd10": 72_000, "hcpcs": 8_000, "cpt": 11_000, "ndc": 300_000, "drg": 800}
+N_LOOKUPS = 200_000
+N_PREFIX_QUERIES = 20_000
+VALIDATE_ROWS = 1_000_000
+
+def make_codes(rng):
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    digits = lambda n, width: [str(value).zfill(width) for value in rng.integers(0, 10 ** width, n)]
+    n = SYSTEM_SIZES["icd10"]
+    icd10 = [f"{letter}{body[:2]}.{body[2:]}" for letter, body in zip(rng.choice(letters, n), digits(n, 4))]
+    n = SYSTEM_SIZES["hcpcs"]
+    hcpcs = [f"{letter}{body}" for letter, body in zip(rng.choice(letters, n), digits(n, 4))]
+    return {
+        "icd10": (icd10, [f"Condition {code}" for code in icd10]),
+        "hcpcs": (hcpcs, [f"Procedure {code}" for code in hcpcs]),
+        "cpt": (digits(SYSTEM_SIZES["cpt"], 5), None),
+        "ndc": (digits(SYSTEM_SIZES["ndc"], 11), None),
+        "drg": ([f"{code}-1" for code in digits(SYSTEM_SIZES["drg"], 3)], None),
+    }
+
+def main():
+    rng = np.random.default_rng(42)
+    tables = make_codes(rng)
+    all_codes = [code for codes, _ in tables.values() for code in codes]
+    column = pd.Series(rng.choice(np.array(all_codes + ["BOGUS"] * 1000, dtype=object), VALIDATE_ROWS))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_time, reference = timed(CodeReference.from_tables, tables)
+        reference.save(tmp)
+        load_time, reference = timed(CodeReference.load, tmp)
+        print(f"{sum(SYSTEM_SIZES.values())} codes: build {build_time:.2f}s, snapshot load {load_time * 1000:.1f}ms")
+
+        icd10 = reference["icd10"]
+        queries = [tables["icd10"][0][i] for i in rng.integers(0, SYSTEM_SIZES["icd10"], N_LOOKUPS)]
+        index_time, _ = timed(lambda: icd10.positions)
+        lookup_time, _ = timed(lambda: [icd10.lookup(code) for code in queries])
+        prefixes = [code[:3] for code in queries[:N_PREFIX_QUERIES]]
+        prefix_time, _ = timed(lambda: [icd10.prefix(prefix) for prefix in prefixes])
+
+        # Original validation: one concatenated Python list and isin
+        list_time, expected = timed(lambda: column.isin(all_codes).to_numpy())
+        validate_time, valid = timed(reference.validate, column)
+        assert (valid == expected).all()
+
+    print(f"{'operation':>22} {'time (s)':>9} {'ops/sec':>12}")
+    print(f"{'hash index build':>22} {index_time:>9.3f} {'':>12}")
+    print(f"{'exact lookup':>22} {lookup_time:>9.3f} {N_LOOKUPS / lookup_time:>12,.0f}")
+    print(f"{'prefix query':>22} {prefix_time:>9.3f} {N_PREFIX_QUERIES / prefix_time:>12,.0f}")
+    print(f"{'validate (list isin)':>22} {list_time:>9.3f} {VALIDATE_ROWS / list_time:>12,.0f}")
+    print(f"{'validate (reference)':>22} {validate_time:>9.3f} {VALIDATE_ROWS / validate_time:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from code_suggestion_index import CodeSuggestionIndex, brute_force_search
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(SCRIPTS_DIR, "Preprocessed_Dataset.csv")
+
+N_ROWS = 200_000
+N_QUERIES = 2_000
+K = 10
+
+# Coded rows: sample descriptions with words dropped and extra tokens (strengths, pack sizes) added
+def make_rows(descriptions, codes, n_rows, rng):
+    picks = rng.integers(0, len(descriptions), n_rows)
+    extras = np.array([f"{value} mg" for value in range(1, 200)] + [f"pack {value}" for value in range(1, 50)])
+    texts = []
+    for pick, extra in zip(picks, rng.choice(extras, n_rows)):
+        words = descriptions[pick].split()
+        keep = [word for word in words if rng.random() > 0.2] or words
+        texts.append(" ".join(keep) + " " + extra)
+    return texts, codes[picks]
+
+def recall(approximate, exact):
+    hits = sum(len(set(a[a >= 0]) & set(e)) for a, e in zip(approximate, exact))
+    return hits / exact.size
+
+def main():
+    rng = np.random.default_rng(42)
+    df = pd.read_csv(DATASET_PATH)[["description_clean", "code|1"]].dropna()
+    descriptions, codes = df["description_clean"].to_numpy(), df["code|1"].astype(str).to_numpy()
+    texts, labels = make_rows(descriptions, codes, N_ROWS + N_QUERIES, rng)
+    vectorizer = TfidfVectorizer(max_features=5000, dtype=np.float32)
+    vectors = vectorizer.fit_transform(texts)
+    rows, queries = vectors[:N_ROWS], vectors[N_ROWS:]
+
+    start = time.perf_counter()
+    index = CodeSuggestionIndex.build(rows, labels[:N_ROWS])
+    build_time = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        start = time.perf_counter()
+        index = CodeSuggestionIndex.load(tmp)
+        load_time = time.perf_counter() - start
+        print(f"{N_ROWS} rows in {index.n_lists} lists: build {build_time:.1f}s, mmap load {load_time * 1000:.1f}ms")
+
+        start = time.perf_counter()
+        _, exact = brute_force_search(queries, rows, K)
+        brute_qps = N_QUERIES / (time.perf_counter() - start)
+        print(f"{'search':>14} {'recall@10':>10} {'queries/s':>10} {'code top-1 acc':>15}")
+        print(f"{'brute force':>14} {1.0:>10.3f} {brute_qps:>10,.0f} {'':>15}")
+        for n_probe in [1, 4, 8, 16, 32]:
+            start = time.perf_counter()
+            _, approximate = index.search(queries, K, n_probe)
+            qps = N_QUERIES / (time.perf_counter() - start)
+            suggested, _ = index.suggest(queries, n_codes=1, k=K, n_probe=n_probe)
+            accuracy = (suggested[:, 0] == labels[N_ROWS:]).mean()
+            print(f"{f'IVF probe {n_probe}':>14} {recall(approximate, exact):>10.3f} {qps:>10,.0f} {accuracy:>15.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ed_flow_metrics import RollingFlowMetrics, admission_rates, flag_out_of_order, flow_distributions, hourly_census
+from profiling import timed
+
+VISIT_COUNTS = [100_000, 1_000_000, 10_000_000]
+
+# Synthetic visits over a year: minutes-scale steps, about 2% with a step out of order
+def make_visits(n_visits, seed=42):
+    rng = np.random.default_rng(seed)
+    minute = np.timedelta64(60_000_000_000, "ns")
+    arrival = np.datetime64("2024-01-01", "ns") + rng.integers(0, 365 * 24 * 60, n_visits) * minute
+    triage = arrival + rng.exponential(15, n_visits).astype(np.int64) * minute
+    treatment = triage + rng.exponential(45, n_visits).astype(np.int64) * minute
+    discharge = treatment + rng.exponential(180, n_visits).astype(np.int64) * minute
+    shuffled = rng.random(n_visits) < 0.02
+    triage[shuffled] = arrival[shuffled] - 30 * minute
+    diagnoses = pd.Categorical.from_codes(rng.integers(0, 500, n_visits), [f"D{i:03d}" for i in range(500)])
+    outcomes = pd.Categorical.from_codes(rng.integers(0, 3, n_visits), ["Admitted", "Discharged", "Referred"])
+    return pd.DataFrame({
+        "ArrivalTime": arrival, "TriageTime": triage, "TreatmentStartTime": treatment, "DischargeTime": discharge,
+        "Diagnosis": diagnoses, "Outcome": outcomes,
+        "TreatmentCost": rng.integers(100, 5000, n_visits).astype(np.float32),
+    })
+
+def main():
+    print(f"{'visits':>11} {'flags (s)':>10} {'distributions (s)':>18} {'census (s)':>11} "
+          f"{'admissions (s)':>15} {'incremental (s)':>16}")
+    for n_visits in VISIT_COUNTS:
+        visits = make_visits(n_visits)
+        rolling = RollingFlowMetrics()
+        batch_size = max(n_visits // 10, 1)
+        incremental, _ = timed(lambda: [rolling.update(visits.iloc[i:i + batch_size])
+                                        for i in range(0, n_visits, batch_size)])
+        print(f"{n_visits:>11} {timed(flag_out_of_order, visits)[0]:>10.2f} "
+              f"{timed(flow_distributions, visits)[0]:>18.2f} {timed(hourly_census, visits)[0]:>11.2f} "
+              f"{timed(admission_rates, visits)[0]:>15.2f} {incremental:>16.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ed_data_loader
+from ed_data_loader import load_ed_visits, parse_file
+from profiling import timed
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+REPEATS = int(os.environ.get("REPEATS", "200"))
+
+# Scale the sample visits up and write them in every format the loader reads
+def write_inputs(tmp):
+    with open(os.path.join(DATA_DIR, "ed_analytics_data.json")) as f:
+        visits = json.load(f) * REPEATS
+    paths = {
+        "json": os.path.join(tmp, "visits.json"),
+        "ndjson": os.path.join(tmp, "visits.ndjson"),
+        "yaml": os.path.join(tmp, "visits.yaml"),
+        "csv": os.path.join(tmp, "visits.csv"),
+        "xml": os.path.join(tmp, "patients.xml"),
+    }
+    with open(paths["json"], "w") as f:
+        json.dump(visits, f)
+    with open(paths["ndjson"], "w") as f:
+        f.writelines(json.dumps(visit) + "\n" for visit in visits)
+    with open(paths["yaml"], "w") as f:
+        yaml.dump(visits, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper))
+    pd.DataFrame(visits).to_csv(paths["csv"], index=False)
+    with open(os.path.join(DATA_DIR, "patient_tracking_data_hl7_v3.xml"), "rb") as f:
+        sample = f.read()
+    with open(paths["xml"], "wb") as f:
+        for _ in range(REPEATS // 10):
+            f.write(sample)
+    return paths
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_inputs(tmp)
+        print(f"{'format':>7} {'rows':>8} {'fast (s)':>9} {'fallback (s)':>13}")
+        for file_format, path in paths.items():
+            fast_time, df = timed(parse_file, path)
+            fallback = "-"
+            if file_format in ("json", "ndjson", "yaml"):
+                orjson_module, yaml_loader = ed_data_loader.orjson, ed_data_loader.YAML_LOADER
+                ed_data_loader.orjson, ed_data_loader.YAML_LOADER = None, yaml.SafeLoader
+                fallback = f"{timed(parse_file, path)[0]:.3f}"
+                ed_data_loader.orjson, ed_data_loader.YAML_LOADER = orjson_module, yaml_loader
+            print(f"{file_format:>7} {len(df):>8} {fast_time:>9.3f} {fallback:>13}")
+
+        all_paths = list(paths.values())
+        serial_time, _ = timed(load_ed_visits, all_paths, 1)
+        parallel_time, visits = timed(load_ed_visits, all_paths)
+        print(f"all formats -> {len(visits)} visits: serial {serial_time:.2f}s, process pool {parallel_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_cache import EmbeddingCache
+from process_vectorization import N_FEATURES, vectorize_descriptions
+from profiling import timed
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(SCRIPTS_DIR, "Preprocessed_Dataset.csv")
+
+def main():
+    descriptions = pd.read_csv(DATASET_PATH)["description_clean"].fillna("")
+    print(f"{'rows':>8} {'run':>22} {'time (s)':>9} {'hit rate':>9} {'duplicate rows':>15}")
+    for repeats in [10, 100, 400]:
+        texts = pd.concat([descriptions] * repeats, ignore_index=True)
+        # A vectorizer fitted on an earlier run, as with REUSE_VECTORIZER=1
+        vectorizer, _ = vectorize_descriptions(descriptions)
+        uncached_time, (_, expected) = timed(vectorize_descriptions, texts, vectorizer=vectorizer)
+        print(f"{len(texts):>8} {'no cache':>22} {uncached_time:>9.2f} {'':>9} {'':>15}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for label in ["cold cache", "warm cache (reopened)"]:
+                with EmbeddingCache(tmp, N_FEATURES) as cache:
+                    elapsed, (_, vectors) = timed(vectorize_descriptions, texts, cache=cache, vectorizer=vectorizer)
+                assert abs(vectors - expected).max() < 1e-6
+                print(f"{len(texts):>8} {label:>22} {elapsed:>9.2f} {cache.hit_rate:>9.1%} {cache.duplicate_rows:>15}")
+
+    # LRU size limit: a cache holding half the distinct descriptions, queried with a sliding window
+    unique = descriptions.drop_duplicates().to_numpy()
+    embed = lambda texts: np.ones((len(texts), 16), dtype=np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(tmp, 16, max_entries=len(unique) // 2)
+        for start in range(0, len(unique), 100):
+            cache.lookup(unique[start:start + 400], embed, "v1")
+        print(f"LRU-limited cache: {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fhir_condition_reader import load_conditions
+from profiling import timed
+
+N_FILES = 4
+CONDITIONS_PER_FILE = [10_000, 100_000]
+
+# Original loader: json.load of the whole Bundle, then a dict per Condition
+def load_fhir_data_original(json_path):
+    with open(json_path, "r") as file:
+        fhir_data = json.load(file)
+    conditions = []
+    for entry in fhir_data["entry"]:
+        if entry["resource"]["resourceType"] == "Condition":
+            condition = {
+                "PatientID": entry["resource"]["patient"]["reference"].split("/")[-1],
+                "ICD10_Code": entry["resource"]["code"]["coding"][0]["code"],
+                "Condition": entry["resource"]["code"]["coding"][0]["display"]
+            }
+            conditions.append(condition)
+    return pd.DataFrame(conditions)
+
+# Conditions with two codings each, interleaved with Patient and Observation resources
+def make_resources(n_conditions, offset):
+    for i in range(offset, offset + n_conditions):
+        yield {"resourceType": "Patient", "id": f"p{i}", "name": [{"family": "Doe", "given": ["Jane"]}]}
+        yield {"resourceType": "Observation", "id": f"o{i}", "subject": {"reference": f"Patient/p{i}"},
+               "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4", "display": "Heart rate"}]},
+               "valueQuantity": {"value": 72, "unit": "beats/minute"}}
+        yield {"resourceType": "Condition", "id": f"c{i}", "patient": {"reference": f"Patient/p{i}"},
+               "code": {"coding": [
+                   {"system": "http://hl7.org/fhir/sid/icd-10", "code": "E11.9", "display": "Type 2 diabetes mellitus"},
+                   {"system": "http://snomed.info/sct", "code": "44054006", "display": "Diabetes mellitus type 2"},
+               ]}}
+
+def write_files(directory, n_conditions):
+    bundles, ndjsons = [], []
+    for file_number in range(N_FILES):
+        resources = list(make_resources(n_conditions, file_number * n_conditions))
+        bundle = os.path.join(directory, f"bundle-{file_number}.json")
+        with open(bundle, "w") as f:
+            json.dump({"resourceType": "Bundle", "type": "collection",
+                       "entry": [{"resource": resource} for resource in resources]}, f)
+        ndjson = os.path.join(directory, f"export-{file_number}.ndjson")
+        with open(ndjson, "w") as f:
+            f.writelines(json.dumps(resource) + "\n" for resource in resources)
+        bundles.append(bundle)
+        ndjsons.append(ndjson)
+    return bundles, ndjsons
+
+def main():
+    print(f"{'conditions':>10} {'loader':>26} {'time (s)':>9} {'rows':>9}")
+    for n_conditions in CONDITIONS_PER_FILE:
+        with tempfile.TemporaryDirectory() as tmp:
+            bundles, ndjsons = write_files(tmp, n_conditions)
+            runs = [
+                ("original (bundles)", lambda: pd.concat([load_fhir_data_original(path) for path in bundles])),
+                ("streaming bundles", lambda: load_conditions(bundles, max_workers=1)),
+                ("streaming ndjson", lambda: load_conditions(ndjsons, max_workers=1)),
+                ("streaming ndjson parallel", lambda: load_conditions(ndjsons)),
+            ]
+            for label, func in runs:
+                elapsed, df = timed(func)
+                print(f"{n_conditions * N_FILES:>10} {label:>26} {elapsed:>9.2f} {len(df):>9}")
+
+if __name__ == "__main__":
+    main()
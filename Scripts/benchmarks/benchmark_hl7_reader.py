@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hl7_xml_reader import iter_hl7_batches
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+SAMPLE_FILES = ["ed_analytics_data_hl7_v3.xml", "ed_analytics_data_ccd.xml", "patient_tracking_data_hl7_v3.xml"]
+
+# Build a large message dump by concatenating a sample file many times
+def write_dump(sample_path, output_path, repeats):
+    with open(sample_path, "rb") as f:
+        sample = f.read()
+    if not sample.endswith(b"\n"):
+        sample += b"\n"
+    with open(output_path, "wb") as f:
+        for _ in range(repeats):
+            f.write(sample)
+
+def main():
+    print(f"{'file':>34} {'MB':>7} {'records':>9} {'records/s':>11} {'peak MB':>8}")
+    for name in SAMPLE_FILES:
+        for repeats in [100, 1000]:
+            with tempfile.TemporaryDirectory() as tmp:
+                dump_path = os.path.join(tmp, name)
+                write_dump(os.path.join(DATA_DIR, name), dump_path, repeats)
+                start = time.perf_counter()
+                records = sum(len(batch["document_id"]) for batch in iter_hl7_batches(dump_path))
+                elapsed = time.perf_counter() - start
+
+                # Separate pass for memory, since tracing allocations slows parsing down
+                tracemalloc.start()
+                for _ in iter_hl7_batches(dump_path):
+                    pass
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                size_mb = os.path.getsize(dump_path) / 1e6
+                print(f"{name:>34} {size_mb:>7.1f} {records:>9} {records / elapsed:>11,.0f} {peak / 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from cli import COMMANDS
+
+CLI_PATH = os.path.join(SCRIPTS_DIR, "cli.py")
+
+# Fresh interpreters per measurement; the best run is reported
+REPEATS = 3
+
+# Heavy libraries that a cold start should only load when the command needs them
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "pyarrow", "nltk", "spacy", "coremltools"]
+
+def import_profile(args):
+    """Wall time, total -X importtime milliseconds and the top-level packages loaded by one run."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=SCRIPTS_DIR,
+                            capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    total_us, packages = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        # Outermost imports only; nested ones are already in their parent's cumulative time
+        if len(name) - len(name.lstrip()) == 1:
+            total_us += int(cumulative)
+    return seconds, total_us / 1000, packages
+
+def best_profile(args):
+    return min((import_profile(args) for _ in range(REPEATS)), key=lambda run: run[0])
+
+def report(label, args):
+    seconds, import_ms, packages = best_profile(args)
+    heavy = ", ".join(name for name in HEAVY_MODULES if name in packages) or "-"
+    print(f"{label:<34} {seconds * 1000:>9.0f} {import_ms:>12.1f}  {heavy}")
+
+def main():
+    print(f"{'command':<34} {'wall (ms)':>9} {'imports (ms)':>12}  heavy modules loaded")
+    report("python -c pass", ["-c", "pass"])
+    report("cli.py --help", [CLI_PATH, "--help"])
+    for name in COMMANDS:
+        report(f"cli.py {name} --help", [CLI_PATH, name, "--help"])
+
+    print("\nImporting each module for reuse (nothing runs at import time):")
+    print(f"{'module':<34} {'wall (ms)':>9} {'imports (ms)':>12}  heavy modules loaded")
+    for module in sorted({module for module, _ in COMMANDS.values()}):
+        report(module, ["-c", f"import {module}"])
+
+if __name__ == "__main__":
+    main()
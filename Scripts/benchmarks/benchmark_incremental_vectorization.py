@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental_vectorization import load_tfidf_vectors, stream_vectorize
+from process_vectorization import N_FEATURES
+from profiling import timed
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(SCRIPTS_DIR, "Preprocessed_Dataset.csv")
+
+def main():
+    descriptions = pd.read_csv(DATASET_PATH)[["description"]].dropna()
+    # Shuffled, so the new file never has the same contents as a corpus already vectorized
+    new_file = pd.concat([descriptions] * 10, ignore_index=True).sample(frac=1, random_state=0)
+    print(f"{'corpus rows':>12} {'new rows':>9} {'full refit (s)':>15} {'append (s)':>11} {'load (s)':>9} {'width':>6}")
+    for repeats in [10, 100, 400]:
+        corpus = pd.concat([descriptions] * repeats, ignore_index=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus_path = os.path.join(tmp, "corpus.csv")
+            new_path = os.path.join(tmp, "new_file.csv")
+            state_path = os.path.join(tmp, "tfidf_state.npz")
+            output_dir = os.path.join(tmp, "counts")
+            corpus.to_csv(corpus_path, index=False)
+            new_file.to_csv(new_path, index=False)
+            stream_vectorize(corpus_path, state_path, output_dir)
+
+            # Current approach: refit over the corpus plus the new file
+            combined = pd.concat([corpus, new_file], ignore_index=True)["description"]
+            refit_time, _ = timed(TfidfVectorizer(max_features=N_FEATURES).fit_transform, combined)
+
+            # Incremental: hash only the new rows and update document frequencies
+            append_time, _ = timed(stream_vectorize, new_path, state_path, output_dir)
+            load_time, vectors = timed(load_tfidf_vectors, state_path, output_dir)
+            print(f"{len(corpus):>12} {len(new_file):>9} {refit_time:>15.2f} {append_time:>11.2f} "
+                  f"{load_time:>9.2f} {vectors.shape[1]:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ml_model_training
+from ml_model_training import add_trees, cached_matrix, hyperparameter_search, track_run, train_model
+
+ROW_COUNTS = [10_000, 50_000]
+SEARCH_GRID = {"n_estimators": [25, 50], "max_depth": [None, 12]}
+
+# Numeric vitals and charges plus code columns, with a target that depends on both
+def make_training_csv(path, n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, 20)), columns=[f"feature_{i}" for i in range(20)])
+    df["code|1"] = rng.choice([f"J{i:04d}" for i in range(300)], n_rows)
+    df["payer"] = rng.choice(["Aetna", "Cigna", "Medicare", "Medicaid", "UHC"], n_rows)
+    df["setting"] = rng.choice(["inpatient", "outpatient"], n_rows)
+    signal = df["feature_0"] + df["feature_1"] * (df["setting"] == "inpatient") + (df["payer"] == "Medicare")
+    df["target"] = (signal + rng.normal(scale=0.5, size=n_rows) > 0.5).astype(int)
+    df.to_csv(path, index=False)
+
+# Original path: the CSV's frame as-is (float64 numerics, text columns as integer codes), one core
+def train_original(path):
+    df = pd.read_csv(path)
+    X = df.drop(columns=["target"])
+    for column in X.select_dtypes(exclude="number").columns:
+        X[column] = pd.factorize(X[column])[0]
+    RandomForestClassifier(n_estimators=100, random_state=42).fit(X, df["target"])
+
+def main():
+    for n_rows in ROW_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            ml_model_training.TRAINING_CACHE_DIR = os.path.join(tmp, "cache")
+            path = os.path.join(tmp, "training.csv")
+            make_training_csv(path, n_rows)
+            print(f"--- {n_rows} rows")
+
+            with track_run("original (float64 frame, 1 core)"):
+                train_original(path)
+            with track_run("load matrix (cold cache)"):
+                X, y, _, _ = cached_matrix(path)
+            with track_run("load matrix (warm cache)"):
+                X, y, _, _ = cached_matrix(path)
+            with track_run("train float32, all cores"):
+                model = train_model(X, y, n_estimators=100)
+            with track_run("warm start +50 trees"):
+                add_trees(model, X, y, 50)
+            with track_run("refit 150 trees"):
+                train_model(X, y, n_estimators=150)
+            with track_run("search (folds cold)"):
+                hyperparameter_search(X, y, SEARCH_GRID, n_splits=3)
+            with track_run("search (folds cached)"):
+                hyperparameter_search(X, y, SEARCH_GRID, n_splits=3)
+
+if __name__ == "__main__":
+    main()
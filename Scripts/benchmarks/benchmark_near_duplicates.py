@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import (THRESHOLD, candidate_pairs, canonical_texts, collapse_near_duplicates, minhash_signatures,
+                             normalize, shingle_sets, shingles, similar_pairs, summarize)
+from nlp_text_preprocessing import clean_text
+from process_vectorization import vectorize_clusters, vectorize_descriptions
+from profiling import timed
+from synthetic_data import PACKS, iter_charge_chunks
+
+ROW_COUNTS = [100_000, 1_000_000, 5_000_000]
+
+# Distinct texts compared all-pairs by the quadratic baseline
+PAIRWISE_SIZES = [2_000, 10_000, 20_000]
+
+# Rows vectorized per row and per cluster
+VECTORIZE_ROWS = 1_000_000
+
+# Pack tokens, which the synthetic catalog varies within one item
+PACK_WORDS = {word for pack in PACKS for spelling in (pack, pack.replace("/", " ")) for word in clean_text(spelling).split()}
+
+def charge_descriptions(n_rows):
+    chunks = [chunk[["description_clean"]] for chunk in iter_charge_chunks(n_rows)]
+    return pd.concat(chunks, ignore_index=True)
+
+def item_identity(text):
+    """A synthetic description without its pack tokens: rows of one item share it."""
+    return "".join(word for word in text.split() if word not in PACK_WORDS)
+
+def cluster_quality(clusters, identities):
+    """Row-weighted purity (rows of their cluster's main item) and completeness (rows in their item's main cluster)."""
+    counts = pd.DataFrame({"cluster": clusters, "item": identities}).value_counts()
+    return (counts.groupby(level="cluster").max().sum() / len(clusters),
+            counts.groupby(level="item").max().sum() / len(clusters))
+
+def exact_similar_pairs(texts, threshold):
+    """All pairs with Jaccard similarity >= threshold, from a sparse product of shingle sets."""
+    sets = shingle_sets(*shingles(texts))
+    sizes = np.diff(sets.indptr)
+    overlap = sp.triu(sets @ sets.T, k=1).tocoo()
+    jaccard = overlap.data / (sizes[overlap.row] + sizes[overlap.col] - overlap.data)
+    keep = jaccard >= threshold
+    return set(zip(overlap.row[keep].tolist(), overlap.col[keep].tolist()))
+
+def lsh_similar_pairs(texts, threshold):
+    values, offsets = shingles(texts)
+    left, right = candidate_pairs(minhash_signatures(values, offsets))
+    keep = similar_pairs(shingle_sets(values, offsets), left, right, threshold)
+    return set(zip(right[keep].tolist(), left[keep].tolist()))
+
+def main():
+    print(f"Threshold {THRESHOLD}")
+    print(f"{'rows':>10} {'distinct':>9} {'clusters':>9} {'rows/cluster':>13} {'distinct/cluster':>17} "
+          f"{'seconds':>8} {'rows/s':>11} {'purity':>7} {'complete':>9}")
+    collapsed = {}
+    for n_rows in ROW_COUNTS:
+        df = charge_descriptions(n_rows)
+        seconds, (df, cluster_map) = timed(collapse_near_duplicates, df)
+        summary = summarize(cluster_map)
+        purity, completeness = cluster_quality(df["canonical_id"].to_numpy(),
+                                               df["description_clean"].map(item_identity).to_numpy())
+        print(f"{n_rows:>10} {summary['distinct_texts']:>9} {summary['clusters']:>9} {summary['reduction']:>13.1f} "
+              f"{summary['near_duplicate_reduction']:>17.2f} {seconds:>8.2f} {n_rows / seconds:>11,.0f} "
+              f"{purity:>7.3f} {completeness:>9.3f}")
+        if n_rows == VECTORIZE_ROWS:
+            collapsed = {"df": df, "cluster_map": cluster_map}
+        del df, cluster_map
+
+    if collapsed:
+        df, cluster_map = collapsed["df"], collapsed["cluster_map"]
+        print(f"\nTF-IDF vectorization of {len(df)} rows:")
+        per_row, _ = timed(vectorize_descriptions, df["description_clean"])
+        per_cluster, (_, vectors) = timed(vectorize_clusters, df["canonical_id"], canonical_texts(cluster_map))
+        print(f"{'every row':<22} {per_row:>8.2f} s")
+        print(f"{'once per cluster':<22} {per_cluster:>8.2f} s  ({per_row / per_cluster:.1f}x, {vectors.shape[0]} rows fanned out)")
+
+    print("\nLSH against the exact all-pairs scan (sparse shingle-set product):")
+    print(f"{'texts':>7} {'exact (s)':>10} {'LSH (s)':>8} {'pairs':>7} {'recall':>7} {'precision':>10}")
+    texts = list(normalize(charge_descriptions(VECTORIZE_ROWS)["description_clean"]).drop_duplicates())
+    for size in PAIRWISE_SIZES:
+        sample = texts[:size]
+        exact_seconds, exact = timed(exact_similar_pairs, sample, THRESHOLD)
+        lsh_seconds, found = timed(lsh_similar_pairs, sample, THRESHOLD)
+        recall = len(exact & found) / len(exact) if exact else 1.0
+        precision = len(exact & found) / len(found) if found else 1.0
+        print(f"{size:>7} {exact_seconds:>10.2f} {lsh_seconds:>8.2f} {len(exact):>7} {recall:>7.3f} {precision:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import copy
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_mapping_pipeline import perform_mapping
+
+# Concept counts to time; the HCPCS/Addendum tables grow with them
+CONCEPT_COUNTS = [1000, 5000, 20000, 70000]
+
+# Original per-concept scan, kept here as the baseline for timing and output comparison
+def perform_mapping_scan(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data):
+    for concept in icd10_data["concept"]:
+        icd_code = concept["code"]
+        matching_hcpcs = hcpcs_data[hcpcs_data["SEQNUM"] == icd_code]
+        concept["HCPCS_Mappings"] = matching_hcpcs.to_dict(orient="records")
+        matching_apc = addendum_a_data[addendum_a_data["APC"].isin(matching_hcpcs["OPPS"].unique())]
+        concept["Addendum_A_Mappings"] = matching_apc.to_dict(orient="records")
+        matching_b = addendum_b_data[addendum_b_data["HCPCS_Code"].isin(matching_hcpcs["HCPC"])]
+        concept["Addendum_B_Mappings"] = matching_b.to_dict(orient="records")
+    return icd10_data
+
+# Build string-typed tables shaped like the preprocessed CMS files
+def make_inputs(n_concepts, seed=42):
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"C{i:06d}" for i in range(n_concepts)])
+    n_hcpcs = n_concepts * 2
+    n_apc = max(n_concepts // 20, 10)
+    hcpcs_codes = np.array([f"H{i:05d}" for i in range(n_hcpcs)])
+    hcpcs_data = pd.DataFrame({
+        "HCPC": hcpcs_codes,
+        "SEQNUM": rng.choice(codes, n_hcpcs),
+        "OPPS": rng.integers(0, n_apc, n_hcpcs).astype(str),
+        "LONG_DESCRIPTION": "long description",
+        "SHORT_DESCRIPTION": "short",
+    })
+    addendum_a_data = pd.DataFrame({
+        "APC": np.arange(n_apc).astype(str),
+        "Group_Title": "group",
+        "Payment_Rate": "$100.00",
+    })
+    addendum_b_data = pd.DataFrame({
+        "HCPCS_Code": rng.choice(hcpcs_codes, n_hcpcs),
+        "Short_Descriptor": "descriptor",
+        "Payment_Rate": "$50.00",
+    })
+    icd10_data = {"concept": [{"code": code, "display": f"Concept {code}"} for code in codes]}
+    return hcpcs_data, addendum_a_data, addendum_b_data, icd10_data
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    # The scan baseline is quadratic, so only run it where it finishes in reasonable time
+    scan_limit = int(os.environ.get("SCAN_LIMIT", "20000"))
+    print(f"{'concepts':>10} {'scan (s)':>10} {'indexed (s)':>12} {'speedup':>8} {'identical':>10}")
+    for n_concepts in CONCEPT_COUNTS:
+        hcpcs_data, addendum_a_data, addendum_b_data, icd10_data = make_inputs(n_concepts)
+        indexed_time, indexed = time_call(
+            perform_mapping, hcpcs_data, addendum_a_data, addendum_b_data, copy.deepcopy(icd10_data)
+        )
+        if n_concepts <= scan_limit:
+            scan_time, scanned = time_call(
+                perform_mapping_scan, hcpcs_data, addendum_a_data, addendum_b_data, copy.deepcopy(icd10_data)
+            )
+            identical = json.dumps(indexed, indent=4) == json.dumps(scanned, indent=4)
+            print(f"{n_concepts:>10} {scan_time:>10.2f} {indexed_time:>12.3f} "
+                  f"{scan_time / indexed_time:>7.0f}x {str(identical):>10}")
+        else:
+            print(f"{n_concepts:>10} {'-':>10} {indexed_time:>12.3f} {'-':>8} {'-':>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_cube import PRICE_COLUMNS, PriceCube, parse_charges
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(SCRIPTS_DIR, "Preprocessed_Dataset.csv")
+
+ROW_COUNTS = [1_000_000, 5_000_000]
+N_QUERIES = 20
+
+# Charge rows resampled from the sample file's payer/plan/code/setting combinations and prices
+def make_charges(sample, n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(sample), n_rows)
+    df = sample.iloc[picks].reset_index(drop=True)
+    # Spread prices so each cell sees a distribution rather than one repeated value
+    noise = rng.lognormal(0, 0.3, n_rows).astype(np.float32)
+    for column in PRICE_COLUMNS:
+        df[column] = df[column] * noise
+    return df
+
+def main():
+    sample = parse_charges(DATASET_PATH)
+    payers = sample["payer_name"].dropna().unique()
+    measure = "standard_charge|negotiated_dollar"
+    print(f"{'rows':>9} {'build (s)':>10} {'cells':>7} {'+10% update (s)':>16} {'save/load (ms)':>15} "
+          f"{'groupby query (ms)':>19} {'cube query (ms)':>16}")
+    for n_rows in ROW_COUNTS:
+        df = make_charges(sample, n_rows)
+        start = time.perf_counter()
+        cube = PriceCube().update(df)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cube.update(make_charges(sample, n_rows // 10, seed=7))
+        update_time = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            cube.save(tmp)
+            cube = PriceCube.load(tmp)
+            save_load_time = time.perf_counter() - start
+
+            # Ad-hoc analyst query: per-plan stats and median negotiated price for one payer
+            start = time.perf_counter()
+            for payer in payers[:N_QUERIES]:
+                rows = df[df["payer_name"] == payer]
+                rows.groupby("plan_name", observed=True)[measure].agg(["count", "mean", "min", "max", "median"])
+            groupby_time = (time.perf_counter() - start) / min(N_QUERIES, len(payers))
+
+            start = time.perf_counter()
+            for payer in payers[:N_QUERIES]:
+                cube.summary(measure, by=["plan_name"], percentiles=(50,), payer_name=payer)
+            cube_time = (time.perf_counter() - start) / min(N_QUERIES, len(payers))
+
+        print(f"{n_rows:>9} {build_time:>10.2f} {len(cube):>7} {update_time:>16.2f} {save_load_time * 1000:>15.1f} "
+              f"{groupby_time * 1000:>19.1f} {cube_time * 1000:>16.1f}")
+
+if __name__ == "__main__":
+    main()
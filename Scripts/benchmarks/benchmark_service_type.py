@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_clean_dataset_v2 import add_service_type_column, service_type_columns
+from profiling import timed
+
+ROW_COUNTS = [10_000, 1_000_000, 10_000_000]
+
+# Original row-wise implementation, kept as the timing and correctness baseline
+def add_service_type_column_apply(df):
+    def determine_service_type(row):
+        for col in service_type_columns:
+            if col in row and pd.notna(row[col]):
+                return row[col]
+        return "Unknown Type"
+    df["service|type"] = df.apply(determine_service_type, axis=1)
+    return df
+
+# Code type columns that are null about half the time, like the price-transparency files
+def make_charges(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    types = np.array(["CDM", "HCPCS", "RC", "NDC", "CPT", None], dtype=object)
+    return pd.DataFrame({
+        col: types[rng.choice(len(types), n_rows, p=[0.1, 0.1, 0.1, 0.1, 0.1, 0.5])]
+        for col in service_type_columns
+    })
+
+def main():
+    # The row-wise baseline takes minutes at 10M rows, so cap it by default
+    apply_limit = int(os.environ.get("APPLY_LIMIT", "1000000"))
+    print(f"{'rows':>11} {'apply (s)':>10} {'vectorized (s)':>15} {'speedup':>8} {'identical':>10}")
+    for n_rows in ROW_COUNTS:
+        df = make_charges(n_rows)
+        vector_time, vectorized = timed(add_service_type_column, df.copy())
+        if n_rows <= apply_limit:
+            apply_time, applied = timed(add_service_type_column_apply, df.copy())
+            identical = vectorized["service|type"].equals(applied["service|type"])
+            print(f"{n_rows:>11} {apply_time:>10.2f} {vector_time:>15.3f} "
+                  f"{apply_time / vector_time:>7.0f}x {str(identical):>10}")
+        else:
+            print(f"{n_rows:>11} {'-':>10} {vector_time:>15.3f} {'-':>8} {'-':>10}")
+
+if __name__ == "__main__":
+    main()
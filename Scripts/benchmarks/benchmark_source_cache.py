@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_mapping_pipeline import parse_hcpcs
+from profiling import timed
+from source_cache import load_source
+
+ROW_COUNTS = [10000, 100000, 1000000]
+
+# Write an HCPCS-shaped CSV with the raw CMS column names
+def write_hcpcs_csv(path, n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "HCPC": [f"H{i:06d}" for i in range(n_rows)],
+        "SEQNUM": rng.integers(0, 70000, n_rows),
+        "RECID": 3,
+        "LONG DESCRIPTION": "Injection, selegiline, per 5 mg, long descriptor text for the code",
+        "SHORT DESCRIPTION": "Inj selegiline 5 mg",
+        "OPPS": rng.integers(0, 9000, n_rows),
+        "ASC_DT": rng.choice(["", "20250101"], n_rows),
+        "ADD DT": "20250101",
+        "ACT EFF DT": "20250101",
+    }).to_csv(path, index=False)
+
+def main():
+    print(f"{'rows':>10} {'parse (s)':>10} {'cold (s)':>10} {'warm (s)':>10} {'warm 2 cols (s)':>16}")
+    for n_rows in ROW_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "hcpcs.csv")
+            cache_dir = os.path.join(tmp, "cache")
+            write_hcpcs_csv(csv_path, n_rows)
+            parse_time, _ = timed(lambda: parse_hcpcs(csv_path))
+            cold_time, _ = timed(lambda: load_source(csv_path, "HCPCS File", parse_hcpcs, cache_dir=cache_dir))
+            warm_time, _ = timed(lambda: load_source(csv_path, "HCPCS File", parse_hcpcs, cache_dir=cache_dir))
+            subset_time, _ = timed(lambda: load_source(
+                csv_path, "HCPCS File", parse_hcpcs, columns=["SEQNUM", "HCPC"], cache_dir=cache_dir
+            ))
+            print(f"{n_rows:>10} {parse_time:>10.3f} {cold_time:>10.3f} {warm_time:>10.3f} {subset_time:>16.3f}")
+
+if __name__ == "__main__":
+    main()
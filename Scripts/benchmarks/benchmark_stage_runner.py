@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import timed
+from stage_runner import run_stages, scripts_pipeline
+from synthetic_data import write_mapping_sources
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(SCRIPTS_DIR, "Preprocessed_Dataset.csv")
+
+# ICD-10 concepts in the synthetic mapping sources; HCPCS/Addendum tables grow with them
+N_CONCEPTS = 20000
+
+def append_line(path, line):
+    with open(path, "a") as f:
+        f.write(line + "\n")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = write_mapping_sources(tmp, N_CONCEPTS)
+        stages = scripts_pipeline(os.path.join(tmp, "work"), DATASET_PATH, mapping_sources=sources, n_estimators=50)
+        workers = max(2, os.cpu_count() or 1)
+        # Each cold run has its own empty stage cache, so every stage runs
+        runs = [
+            ("cold, in-process", os.path.join(tmp, "cache-sequential"), 0, None),
+            (f"cold, {workers} workers", os.path.join(tmp, "cache"), workers, None),
+            ("warm", os.path.join(tmp, "cache"), workers, None),
+            ("touched, same contents", os.path.join(tmp, "cache"), workers,
+             lambda: os.utime(sources["hcpcs"])),
+            ("Addendum B edited", os.path.join(tmp, "cache"), workers,
+             lambda: append_line(sources["addendum_b"], "Z9999,Synthetic descriptor,N,5000,0.1,$1.00,,$0.20,")),
+        ]
+
+        print(f"{'run':<26} {'wall (s)':>9} {'stages run':>11} {'cache hits':>11}")
+        reports = {}
+        for name, cache_dir, max_workers, change in runs:
+            if change:
+                change()
+            seconds, report = timed(run_stages, stages, cache_dir, max_workers)
+            ran = sum(row["status"] == "ran" for row in report)
+            print(f"{name:<26} {seconds:>9.3f} {ran:>11} {len(report) - ran:>11}")
+            reports[name] = report
+
+        print(f"\nPer stage, cold run with {workers} workers:")
+        print(f"{'stage':<22} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS (MB)':>14}")
+        for row in reports[f"cold, {workers} workers"]:
+            print(f"{row['stage']:<22} {row['seconds']:>9.3f} {row['cpu_seconds']:>9.3f} {row['peak_rss_mb']:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "API_Integration")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, API_DIR)
+
+import api_data_fetching
+from enhanced_mapping_pipeline import load_icd10, parse_addendum_a, parse_addendum_b, parse_hcpcs, perform_mapping
+from generate_clean_dataset_v2 import add_service_type_column
+from nlp_text_preprocessing import get_preprocessor, preprocess_text
+from process_vectorization import vectorize_descriptions
+from profiling import ProfileReport, compare_reports, print_comparison
+from stub_api_server import StubAPI
+from synthetic_data import make_charges, write_mapping_sources
+
+ROW_COUNTS = [10_000, 100_000, 1_000_000]
+STAGES = ["service_type", "perform_mapping", "preprocess_text", "vectorization", "fetch_paginated_data"]
+
+# Per-call preprocess_text and the HTTP fetch are capped; the other stages see every row
+MAX_PER_CALL_TEXTS = 50_000
+MAX_API_RECORDS = 100_000
+API_PAGE_SIZE = 500
+
+def bench_service_type(report, charges):
+    df = charges.drop(columns=["service|type"])
+    with report.stage("add_service_type_column", rows=len(df)):
+        add_service_type_column(df)
+
+def bench_perform_mapping(report, n_rows, tmp):
+    # One ICD-10 concept per 10 charge rows, two HCPCS rows per concept
+    paths = write_mapping_sources(tmp, max(n_rows // 10, 100))
+    with report.stage("parse_mapping_sources", rows=max(n_rows // 10, 100) * 2):
+        hcpcs = parse_hcpcs(paths["hcpcs"])
+        addendum_a = parse_addendum_a(paths["addendum_a"])
+        addendum_b = parse_addendum_b(paths["addendum_b"])
+    icd10_data = load_icd10(paths["icd10"])
+    with report.stage("perform_mapping", rows=len(icd10_data["concept"])):
+        perform_mapping(hcpcs, addendum_a, addendum_b, icd10_data)
+
+def bench_preprocess_text(report, charges):
+    texts = charges["description"].tolist()[:MAX_PER_CALL_TEXTS]
+    with report.stage("preprocess_text", rows=len(texts)):
+        for text in texts:
+            preprocess_text(text)
+    # A fresh preprocessor so the batch run does not start from the per-call token cache
+    get_preprocessor.cache_clear()
+    with report.stage("preprocess_batch", rows=len(charges)):
+        get_preprocessor().preprocess_batch(charges["description"])
+
+def bench_vectorization(report, charges):
+    with report.stage("vectorize_descriptions", rows=len(charges)):
+        vectorize_descriptions(charges["description_clean"])
+
+def bench_fetch_paginated_data(report, n_rows):
+    records = min(n_rows, MAX_API_RECORDS)
+    with StubAPI(records, API_PAGE_SIZE) as api:
+        api_data_fetching.API_URL = api.base_url
+        with report.stage("fetch_paginated_data", rows=records, page_size=API_PAGE_SIZE):
+            fetched = api_data_fetching.fetch_paginated_data("records")
+    assert len(fetched) == records
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the hot paths on synthetic data and write a JSON profile report.")
+    parser.add_argument("--rows", type=int, nargs="+", default=ROW_COUNTS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--report", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown/growth ratio flagged as a regression")
+    args = parser.parse_args()
+
+    report = ProfileReport(args.report, rows=args.rows, benchmarks=args.stages)
+    for n_rows in args.rows:
+        with report.stage("generate_charges", rows=n_rows):
+            charges = make_charges(n_rows)
+        if "service_type" in args.stages:
+            bench_service_type(report, charges)
+        if "perform_mapping" in args.stages:
+            with tempfile.TemporaryDirectory() as tmp:
+                bench_perform_mapping(report, n_rows, tmp)
+        if "preprocess_text" in args.stages:
+            bench_preprocess_text(report, charges)
+        if "vectorization" in args.stages:
+            bench_vectorization(report, charges)
+        if "fetch_paginated_data" in args.stages:
+            bench_fetch_paginated_data(report, n_rows)
+        del charges
+
+    print()
+    report.print_table()
+    print(f"\nReport written to {report.save()}")
+    if args.baseline:
+        print(f"\nAgainst {args.baseline}:")
+        print_comparison(compare_reports(ProfileReport.load(args.baseline), report, args.threshold))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlp_text_preprocessing import TextPreprocessor, clean_text
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Preprocessed_Dataset.csv")
+
+# Original per-call implementation: rebuilds the stopword set and stemmer for every text
+def preprocess_text_per_call(text):
+    from nltk.corpus import stopwords
+    from nltk.stem import PorterStemmer
+    from nltk.tokenize import word_tokenize
+
+    stop_words = set(stopwords.words("english"))
+    stemmer = PorterStemmer()
+    tokens = word_tokenize(text)
+    tokens = [stemmer.stem(word) for word in tokens if word not in stop_words]
+    return " ".join(tokens)
+
+def docs_per_sec(func, texts):
+    start = time.perf_counter()
+    result = func(texts)
+    return len(texts) / (time.perf_counter() - start), result
+
+def main():
+    # Repeat the sample the way descriptions repeat across payers and plans in a full file
+    repeats = int(os.environ.get("REPEATS", "20"))
+    descriptions = pd.read_csv(DATASET_PATH)["description"]
+    texts = pd.concat([descriptions] * repeats, ignore_index=True)
+
+    baseline_rate, baseline = docs_per_sec(lambda s: s.apply(clean_text).apply(preprocess_text_per_call), texts)
+    print(f"per-call apply:        {baseline_rate:>12,.0f} docs/sec")
+
+    preprocessor = TextPreprocessor()
+    batch_rate, batch = docs_per_sec(preprocessor.preprocess_batch, texts)
+    print(f"batch (1 process):     {batch_rate:>12,.0f} docs/sec  identical={batch.equals(baseline)}")
+
+    unique_rate, _ = docs_per_sec(TextPreprocessor().preprocess_batch, descriptions.drop_duplicates())
+    print(f"distinct texts only:   {unique_rate:>12,.0f} docs/sec")
+
+    n_jobs = max(os.cpu_count() or 1, 2)
+    parallel_rate, parallel = docs_per_sec(
+        lambda s: TextPreprocessor().preprocess_batch(s, n_jobs=n_jobs, chunk_size=200), texts
+    )
+    print(f"batch ({n_jobs} processes):    {parallel_rate:>12,.0f} docs/sec  identical={parallel.equals(baseline)}")
+
+if __name__ == "__main__":
+    main()
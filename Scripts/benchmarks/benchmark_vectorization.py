@@ -0,0 +1,69 @@
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_vectorization import N_FEATURES, iter_dense_batches, save_vectors, vectorize_descriptions
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(SCRIPTS_DIR, "Preprocessed_Dataset.csv")
+
+# Original path: dense float64 TF-IDF, a second zero-padded copy, pickled
+def vectorize_dense(descriptions, path):
+    vectorizer = TfidfVectorizer(max_features=N_FEATURES)
+    vectors = vectorizer.fit_transform(descriptions).toarray()
+    if vectors.shape[1] < N_FEATURES:
+        padded = np.zeros((vectors.shape[0], N_FEATURES))
+        padded[:, :vectors.shape[1]] = vectors
+        vectors = padded
+    with open(path, "wb") as f:
+        pickle.dump(vectors, f)
+
+def vectorize_sparse(descriptions, path):
+    _, vectors = vectorize_descriptions(descriptions)
+    save_vectors(vectors, path)
+
+# Wall time and peak traced allocation (numpy buffers included) of one call
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def file_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+def main():
+    descriptions = pd.read_csv(DATASET_PATH)["description"].dropna()
+    print(f"{'rows':>8} {'path':>7} {'time (s)':>9} {'peak MB':>9} {'file MB':>9}")
+    for repeats in [1, 10, 20]:
+        texts = pd.concat([descriptions] * repeats, ignore_index=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = [
+                ("dense", vectorize_dense, os.path.join(tmp, "description_vectors.pkl")),
+                ("sparse", vectorize_sparse, os.path.join(tmp, "description_vectors.npz")),
+            ]
+            for label, func, path in runs:
+                elapsed, peak = measure(func, texts, path)
+                print(f"{len(texts):>8} {label:>7} {elapsed:>9.2f} {peak / 1e6:>9.1f} {file_size(path) / 1e6:>9.2f}")
+
+    # Dense float32 batches for the fixed-width Core ML input
+    _, vectors = vectorize_descriptions(descriptions)
+    batch = next(iter_dense_batches(vectors, batch_size=256))
+    print(f"dense batch: shape={batch.shape} dtype={batch.dtype}")
+
+if __name__ == "__main__":
+    main()
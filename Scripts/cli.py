@@ -0,0 +1,48 @@
+import sys
+import argparse
+import importlib
+
+# Subcommand -> (module, help). A module is only imported once its command is chosen,
+# so `cli.py --help` and light commands never load pandas, sklearn or the NLP models.
+# Every module exposes cli(argv, prog) taking the command's own arguments.
+COMMANDS = {
+    "clean-dataset": ("generate_clean_dataset_v2", "Clean and sample the raw charge dataset and add the service type column"),
+    "preprocess-text": ("nlp_text_preprocessing", "Clean, tokenize and stem a text column of a CSV"),
+    "vectorize": ("process_vectorization", "TF-IDF vectorize charge descriptions"),
+    "incremental-vectorize": ("incremental_vectorization", "Append new charge files to the hashed TF-IDF vectors"),
+    "dedup": ("near_duplicates", "Collapse near-duplicate descriptions into canonical ids"),
+    "map-codes": ("enhanced_mapping_pipeline", "Map ICD-10 concepts to HCPCS and Addendum A/B rows"),
+    "map-fhir": ("data_mapping", "Join FHIR patient conditions with ICD-10 descriptions"),
+    "fhir-conditions": ("fhir_condition_reader", "Read Condition codings from FHIR Bundles or NDJSON"),
+    "hl7": ("hl7_xml_reader", "Read patient records from HL7 v3 / CCD XML files"),
+    "ed-load": ("ed_data_loader", "Load ED analytics files into one typed visit table"),
+    "ed-metrics": ("ed_flow_metrics", "Compute ED patient-flow metrics"),
+    "code-reference": ("code_reference", "Build a code reference snapshot from the source files"),
+    "suggest-codes": ("code_suggestion_index", "Build or query the code suggestion index"),
+    "train": ("ml_model_training", "Train the ICD-10 classifier"),
+    "score": ("batch_inference", "Batch-score embeddings through a model backend"),
+    "debug-model": ("debug_model", "Run the Core ML model on a random embedding"),
+    "price-cube": ("price_cube", "Build, update or query the price-transparency cube"),
+    "pipeline": ("stage_runner", "Run the memoized Scripts stage graph"),
+    "synthetic": ("synthetic_data", "Write synthetic charge, mapping, FHIR and HL7 sources"),
+    "compare-profiles": ("profiling", "Compare two profile reports and flag regressions"),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Entry point for the Scripts toolset. Run `cli.py <command> --help` for a command's arguments.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<22} {help_text}" for name, (_, help_text) in COMMANDS.items()),
+    )
+    parser.add_argument("command", metavar="command", choices=COMMANDS)
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    module, _ = COMMANDS[args.command]
+    return importlib.import_module(module).cli(args.args, prog=f"cli.py {args.command}")
+
+if __name__ == "__main__":
+    sys.exit(main())
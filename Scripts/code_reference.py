@@ -0,0 +1,240 @@
+import os
+import json
+import argparse
+import functools
+import numpy as np
+import pandas as pd
+
+# Code systems the reference knows about
+CODE_SYSTEMS = ("icd10", "hcpcs", "cpt", "ndc", "drg")
+
+SNAPSHOT_MANIFEST = "manifest.json"
+
+def normalize_codes(codes, system):
+    """Canonical byte-string form of codes: stripped and upper-cased, ICD-10 without its dot."""
+    codes = pd.Series(codes, dtype=object).astype(str).str.strip().str.upper()
+    if system == "icd10":
+        codes = codes.str.replace(".", "", regex=False)
+    return codes.str.encode("ascii", errors="replace").to_numpy(dtype=bytes)
+
+def normalize_code(code, system):
+    """Scalar normalize_codes, without the pandas overhead, for single lookups."""
+    code = str(code).strip().upper()
+    if system == "icd10":
+        code = code.replace(".", "")
+    return code.encode("ascii", errors="replace")
+
+def format_code(code, system):
+    """Display form of a canonical code, putting the dot back into ICD-10 codes."""
+    code = code.decode() if isinstance(code, bytes) else code
+    if system == "icd10" and len(code) > 3:
+        return f"{code[:3]}.{code[3:]}"
+    return code
+
+class CodeIndex:
+    """Sorted array of one code system's canonical codes, with optional descriptions.
+
+    The sorted array answers prefix and batch membership queries with binary search and
+    can be memory-mapped straight from a snapshot. Single-code lookups go through a hash
+    index that is built the first time one is made.
+    """
+
+    def __init__(self, system, codes, description_blob=None, description_offsets=None):
+        self.system = system
+        self.codes = codes
+        self.description_blob = description_blob
+        self.description_offsets = description_offsets
+
+    @classmethod
+    def from_codes(cls, system, codes, descriptions=None):
+        codes = normalize_codes(codes, system)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = codes[1:] != codes[:-1]
+        codes = codes[keep]
+        if descriptions is None:
+            return cls(system, codes)
+        descriptions = pd.Series(descriptions, dtype=object).fillna("").astype(str).to_numpy()[order][keep]
+        encoded = [description.encode("utf-8") for description in descriptions]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(description) for description in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(system, codes, blob, offsets)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @functools.cached_property
+    def positions(self):
+        return {code: position for position, code in enumerate(self.codes.tolist())}
+
+    def position(self, code):
+        return self.positions.get(normalize_code(code, self.system))
+
+    def __contains__(self, code):
+        return self.position(code) is not None
+
+    def description(self, position):
+        if self.description_blob is None:
+            return None
+        start, end = self.description_offsets[position], self.description_offsets[position + 1]
+        return self.description_blob[start:end].tobytes().decode("utf-8")
+
+    def lookup(self, code):
+        """Description of a code ("" when none was loaded), or None if the code is unknown."""
+        position = self.position(code)
+        if position is None:
+            return None
+        description = self.description(position)
+        return "" if description is None else description
+
+    def contains(self, codes):
+        """Vectorized membership test for a whole column of codes."""
+        codes = normalize_codes(codes, self.system)
+        if not len(self.codes):
+            return np.zeros(len(codes), dtype=bool)
+        positions = np.searchsorted(self.codes, codes).clip(max=len(self.codes) - 1)
+        return self.codes[positions] == codes
+
+    def written_canonically(self, codes):
+        """True where a code is written exactly in its display form: no case, spacing or ICD-10 dot differences."""
+        canonical = pd.Series(normalize_codes(codes, self.system)).str.decode("ascii")
+        if self.system == "icd10":
+            # format_code over the whole column: the dot goes back after the 3-character category
+            dotted = canonical.str.len() > 3
+            canonical = canonical.where(~dotted, canonical.str[:3] + "." + canonical.str[3:])
+        return (pd.Series(codes, dtype=object).astype(str).to_numpy() == canonical.to_numpy(dtype=object))
+
+    def prefix_range(self, prefix):
+        prefix = normalize_code(prefix, self.system)
+        start = np.searchsorted(self.codes, prefix, side="left")
+        # Every code starting with prefix sorts before prefix followed by 0xff
+        end = np.searchsorted(self.codes, prefix + b"\xff", side="left")
+        return start, end
+
+    def prefix(self, prefix):
+        """All codes starting with prefix, e.g. prefix("E11") for every E11.* code."""
+        start, end = self.prefix_range(prefix)
+        return [format_code(code, self.system) for code in self.codes[start:end].tolist()]
+
+    def children(self, code):
+        """Codes below code in the hierarchy (longer codes sharing it as a prefix)."""
+        canonical = format_code(normalize_code(code, self.system), self.system)
+        return [child for child in self.prefix(code) if child != canonical]
+
+    def parents(self, code):
+        """Known ancestors of an ICD-10 code, from the 3-character category down."""
+        canonical = normalize_code(code, self.system)
+        ancestors = [canonical[:length] for length in range(3, len(canonical))]
+        return [format_code(ancestor, self.system) for ancestor in ancestors if ancestor in self.positions]
+
+class CodeReference:
+    """Indexes for several code systems, loadable from a memory-mapped snapshot."""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    @classmethod
+    def from_lists(cls, **systems):
+        """Builds a reference from plain lists of codes, keyed by system name."""
+        return cls({system: CodeIndex.from_codes(system, codes) for system, codes in systems.items()})
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Builds a reference from {system: (codes, descriptions or None)}."""
+        return cls({system: CodeIndex.from_codes(system, codes, descriptions)
+                    for system, (codes, descriptions) in tables.items()})
+
+    def __getitem__(self, system):
+        return self.indexes[system]
+
+    def lookup(self, code, system):
+        return self.indexes[system].lookup(code)
+
+    def validate(self, codes, systems=None, exact=True):
+        """True for every code found in any of the given systems (all systems by default).
+
+        With exact, a code must also be written in its display form ("J20.9", not "j20.9",
+        " J20.9 " or "J209"), as a plain list isin would require; exact=False accepts any
+        spelling that normalizes to a known code. Each distinct code is checked once, so a
+        column of a few thousand codes repeated over millions of rows costs little more
+        than the factorize. Missing values are invalid.
+        """
+        labels, uniques = pd.factorize(pd.Series(codes))
+        valid = np.zeros(len(uniques) + 1, dtype=bool)
+        for system in systems or self.indexes:
+            found = self.indexes[system].contains(uniques)
+            if exact:
+                # Only the codes this system knows need their spelling checked
+                hits = np.flatnonzero(found)
+                found[hits] = self.indexes[system].written_canonically(uniques[hits])
+            valid[:-1] |= found
+        # Missing values are labelled -1, which picks the trailing False
+        return valid[labels]
+
+    def save(self, path):
+        """Writes one .npy array per system and field so load() can memory-map them."""
+        os.makedirs(path, exist_ok=True)
+        manifest = {}
+        for system, index in self.indexes.items():
+            np.save(os.path.join(path, f"{system}.codes.npy"), index.codes)
+            has_descriptions = index.description_blob is not None
+            if has_descriptions:
+                np.save(os.path.join(path, f"{system}.description_blob.npy"), index.description_blob)
+                np.save(os.path.join(path, f"{system}.description_offsets.npy"), index.description_offsets)
+            manifest[system] = {"count": len(index), "descriptions": has_descriptions}
+        with open(os.path.join(path, SNAPSHOT_MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=4)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, SNAPSHOT_MANIFEST)) as f:
+            manifest = json.load(f)
+        indexes = {}
+        for system, entry in manifest.items():
+            codes = np.load(os.path.join(path, f"{system}.codes.npy"), mmap_mode=mmap_mode)
+            blob = offsets = None
+            if entry["descriptions"]:
+                blob = np.load(os.path.join(path, f"{system}.description_blob.npy"), mmap_mode=mmap_mode)
+                offsets = np.load(os.path.join(path, f"{system}.description_offsets.npy"), mmap_mode=mmap_mode)
+            indexes[system] = CodeIndex(system, codes, blob, offsets)
+        return cls(indexes)
+
+# Source readers for building a snapshot from the full code systems
+def read_icd10_codesystem(json_path):
+    """ICD-10 codes and displays from a FHIR CodeSystem JSON (the enhanced mapping pipeline input)."""
+    with open(json_path) as f:
+        concepts = json.load(f).get("concept", [])
+    return [concept["code"] for concept in concepts], [concept.get("display", "") for concept in concepts]
+
+def read_code_table(csv_path, code_column, description_column=None):
+    columns = [code_column] + ([description_column] if description_column else [])
+    df = pd.read_csv(csv_path, usecols=columns, dtype=str)
+    return df[code_column], df[description_column] if description_column else None
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build a memory-mappable code reference snapshot.")
+    parser.add_argument("snapshot_path")
+    parser.add_argument("--icd10-json", help="ICD-10 FHIR CodeSystem JSON")
+    parser.add_argument("--hcpcs-csv", help="HCPCS file (HCPC and LONG DESCRIPTION columns)")
+    for system in ("cpt", "ndc", "drg"):
+        parser.add_argument(f"--{system}-csv", help=f"{system.upper()} CSV with 'code' and 'description' columns")
+    args = parser.parse_args(argv)
+
+    tables = {}
+    if args.icd10_json:
+        tables["icd10"] = read_icd10_codesystem(args.icd10_json)
+    if args.hcpcs_csv:
+        tables["hcpcs"] = read_code_table(args.hcpcs_csv, "HCPC", "LONG DESCRIPTION")
+    for system in ("cpt", "ndc", "drg"):
+        csv_path = getattr(args, f"{system}_csv")
+        if csv_path:
+            tables[system] = read_code_table(csv_path, "code", "description")
+    reference = CodeReference.from_tables(tables)
+    reference.save(args.snapshot_path)
+    print(f"Saved {sum(len(index) for index in reference.indexes.values())} codes to {args.snapshot_path}")
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,239 @@
+import os
+import json
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from process_vectorization import load_vectors, widen
+
+# Dense score cells computed per block (queries x candidate rows), about 64 MB of float32
+BLOCK_CELLS = 16 * 1024 * 1024
+
+META_FILE = "meta.json"
+
+def as_unit_rows(vectors):
+    """float32 CSR with unit-length rows, so a dot product is the cosine similarity."""
+    from sklearn.preprocessing import normalize
+
+    return normalize(sp.csr_matrix(vectors, dtype=np.float32), norm="l2", copy=True)
+
+def merge_top_k(best_scores, best_positions, query_rows, scores, first_position):
+    """Folds a dense (queries, rows) score block into the running top-k of those queries."""
+    k = best_scores.shape[1]
+    candidates = np.hstack([best_scores[query_rows], scores])
+    positions = np.hstack([
+        best_positions[query_rows],
+        np.broadcast_to(np.arange(first_position, first_position + scores.shape[1]), scores.shape),
+    ])
+    if candidates.shape[1] > k:
+        keep = np.argpartition(-candidates, k - 1, axis=1)[:, :k]
+        candidates = np.take_along_axis(candidates, keep, axis=1)
+        positions = np.take_along_axis(positions, keep, axis=1)
+    best_scores[query_rows] = candidates
+    best_positions[query_rows] = positions
+
+def scan_rows(queries, query_rows, vectors, start, end, best_scores, best_positions):
+    """Scores queries[query_rows] against vectors[start:end] in blocks of at most BLOCK_CELLS."""
+    block_rows = max(1, BLOCK_CELLS // max(len(query_rows), 1))
+    query_block = queries[query_rows]
+    for block_start in range(start, end, block_rows):
+        block_end = min(block_start + block_rows, end)
+        scores = (query_block @ vectors[block_start:block_end].T).toarray()
+        merge_top_k(best_scores, best_positions, query_rows, scores, block_start)
+
+def sort_top_k(best_scores, best_positions):
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_positions, order, axis=1)
+
+def brute_force_search(queries, vectors, k=10):
+    """Exact top-k cosine neighbours by a blocked scan over every row: (scores, row indices)."""
+    queries, vectors = as_unit_rows(queries), as_unit_rows(vectors)
+    best_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+    best_positions = np.full((queries.shape[0], k), -1, dtype=np.int64)
+    scan_rows(queries, np.arange(queries.shape[0]), vectors, 0, vectors.shape[0], best_scores, best_positions)
+    return sort_top_k(best_scores, best_positions)
+
+class CodeSuggestionIndex:
+    """Inverted-file (IVF) index over coded description vectors for code suggestions.
+
+    Rows are clustered with k-means and stored grouped by cluster. A query scores the
+    centroids, then only the rows of its n_probe closest clusters. Batch queries are
+    grouped by cluster so each cluster's rows are multiplied once against every query
+    probing it, and per-query top-k lists are merged block by block.
+    """
+
+    def __init__(self, centroids, vectors, list_offsets, row_ids, label_ids, label_names):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.list_offsets = list_offsets
+        self.row_ids = row_ids
+        self.label_ids = label_ids
+        self.label_names = label_names
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @classmethod
+    def build(cls, vectors, labels, n_lists=None, random_state=42):
+        """Clusters the rows (about sqrt(n) lists by default) and groups them by cluster."""
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.preprocessing import normalize
+
+        vectors = as_unit_rows(vectors)
+        n_lists = min(n_lists or max(1, int(np.sqrt(vectors.shape[0]))), vectors.shape[0])
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, batch_size=4096, n_init=3, random_state=random_state)
+        assignments = kmeans.fit_predict(vectors)
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+        order = np.argsort(assignments, kind="stable")
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=list_offsets[1:])
+        label_ids, label_names = pd.factorize(pd.Series(labels).astype(str))
+        return cls(centroids, vectors[order], list_offsets, order.astype(np.int64),
+                   label_ids[order].astype(np.int32), np.asarray(label_names, dtype=str))
+
+    def search_positions(self, queries, k=10, n_probe=8):
+        """Top-k (scores, positions in the cluster-ordered rows), best first; -1 where nothing was found."""
+        queries = as_unit_rows(queries)
+        n_queries = queries.shape[0]
+        n_probe = min(n_probe, self.n_lists)
+        best_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+        best_positions = np.full((n_queries, k), -1, dtype=np.int64)
+
+        centroid_scores = np.asarray(queries @ self.centroids.T)
+        if n_probe < self.n_lists:
+            probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probes = np.broadcast_to(np.arange(self.n_lists), (n_queries, self.n_lists))
+
+        # Group (query, list) pairs by list
+        lists = probes.ravel()
+        query_rows = np.repeat(np.arange(n_queries), n_probe)
+        order = np.argsort(lists, kind="stable")
+        lists, query_rows = lists[order], query_rows[order]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        for group in np.split(np.arange(len(lists)), bounds):
+            if not len(group):
+                continue
+            list_id = lists[group[0]]
+            start, end = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            if end > start:
+                scan_rows(queries, query_rows[group], self.vectors, start, end, best_scores, best_positions)
+
+        return sort_top_k(best_scores, best_positions)
+
+    def search(self, queries, k=10, n_probe=8):
+        """Approximate top-k neighbours of each query: (scores, original row indices), best first.
+
+        Rows without a neighbour found (fewer than k candidates probed) have index -1.
+        """
+        scores, positions = self.search_positions(queries, k, n_probe)
+        found = positions >= 0
+        return scores, np.where(found, self.row_ids[np.where(found, positions, 0)], -1)
+
+    def suggest(self, queries, n_codes=3, k=10, n_probe=8):
+        """Top n_codes labels per query, ranked by summed similarity of the k nearest rows.
+
+        Returns (codes, scores) arrays of shape (n_queries, n_codes); unused slots hold ""
+        and 0.
+        """
+        scores, positions = self.search_positions(queries, k, n_probe)
+        found = positions >= 0
+        n_queries = len(scores)
+        votes = sp.csr_matrix(
+            (np.where(found, scores, 0).ravel(),
+             (np.repeat(np.arange(n_queries), k), self.label_ids[np.where(found, positions, 0)].ravel())),
+            shape=(n_queries, len(self.label_names)),
+        )
+        votes.sum_duplicates()
+        votes.eliminate_zeros()
+        codes = np.full((n_queries, n_codes), "", dtype=object)
+        code_scores = np.zeros((n_queries, n_codes), dtype=np.float32)
+        for row in range(n_queries):
+            start, end = votes.indptr[row], votes.indptr[row + 1]
+            ranked = np.argsort(-votes.data[start:end], kind="stable")[:n_codes]
+            codes[row, :len(ranked)] = self.label_names[votes.indices[start:end][ranked]]
+            code_scores[row, :len(ranked)] = votes.data[start:end][ranked]
+        return codes, code_scores
+
+    def save(self, path):
+        """Writes every array as .npy so load() can memory-map them."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "centroids": self.centroids, "data": self.vectors.data, "indices": self.vectors.indices,
+            "indptr": self.vectors.indptr, "list_offsets": self.list_offsets, "row_ids": self.row_ids,
+            "label_ids": self.label_ids, "label_names": self.label_names,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump({"rows": len(self), "dim": self.vectors.shape[1], "lists": self.n_lists}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ["centroids", "data", "indices", "indptr", "list_offsets", "row_ids", "label_ids"]}
+        vectors = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                                shape=(meta["rows"], meta["dim"]), copy=False)
+        label_names = np.load(os.path.join(path, "label_names.npy"))
+        return cls(arrays["centroids"], vectors, arrays["list_offsets"], arrays["row_ids"],
+                   arrays["label_ids"], label_names)
+
+def coded_rows(dataset_path, label_column="code|1"):
+    """Labels of the rows process_vectorization vectorized (after its duplicate/null drop)."""
+    df = pd.read_csv(dataset_path)
+    df = df.drop_duplicates().dropna()
+    return df[label_column]
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build or query the code suggestion index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="index saved description vectors and their code|1 labels")
+    build_parser.add_argument("vectors_path", help="vectors saved by process_vectorization")
+    build_parser.add_argument("dataset_path", help="the CSV the vectors were built from")
+    build_parser.add_argument("index_path")
+    build_parser.add_argument("--n-lists", type=int)
+    suggest_parser = subparsers.add_parser("suggest", help="suggest codes for uncoded charge lines")
+    suggest_parser.add_argument("index_path")
+    suggest_parser.add_argument("vectorizer_path")
+    suggest_parser.add_argument("input_path", help="CSV with a description column")
+    suggest_parser.add_argument("--column", default="description")
+    suggest_parser.add_argument("--n-codes", type=int, default=3)
+    suggest_parser.add_argument("--n-probe", type=int, default=8)
+    suggest_parser.add_argument("--output", default="suggested_codes.csv",
+                                help="input lines with their suggested codes and scores")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        vectors = load_vectors(args.vectors_path)
+        labels = coded_rows(args.dataset_path)
+        if len(labels) != vectors.shape[0]:
+            raise ValueError(f"{args.vectors_path} has {vectors.shape[0]} rows but {args.dataset_path} has {len(labels)} coded rows")
+        index = CodeSuggestionIndex.build(vectors, labels, args.n_lists)
+        index.save(args.index_path)
+        print(f"Indexed {len(index)} rows in {index.n_lists} lists to {args.index_path}")
+    else:
+        index = CodeSuggestionIndex.load(args.index_path)
+        with open(args.vectorizer_path, "rb") as f:
+            vectorizer = pickle.load(f)
+        lines = pd.read_csv(args.input_path)
+        queries = vectorizer.transform(lines[args.column].fillna(""))
+        queries = widen(queries.tocsr(), index.vectors.shape[1])
+        codes, scores = index.suggest(queries, args.n_codes, n_probe=args.n_probe)
+        for rank in range(args.n_codes):
+            lines[f"suggested_code_{rank + 1}"] = codes[:, rank]
+            lines[f"suggested_score_{rank + 1}"] = scores[:, rank]
+        lines.to_csv(args.output, index=False)
+        print(f"Suggested {args.n_codes} codes for {len(lines)} lines to {args.output}")
+
+if __name__ == "__main__":
+    cli()
@@ -1,35 +1,38 @@
+import os
+import argparse
+import functools
 import pandas as pd
-import json
+
+from fhir_condition_reader import load_conditions
 
 # Load ICD-10 Mapping CSV
 def load_icd10_mapping(csv_path="data/icd10_mappings.csv"):
     """Loads ICD-10 mappings from CSV."""
     return pd.read_csv(csv_path)
 
+# ICD-10 mapping table, read once per file version instead of on every mapping call
+@functools.lru_cache(maxsize=4)
+def cached_icd10_mapping(csv_path, modified_time):
+    return load_icd10_mapping(csv_path)
+
 # Load FHIR JSON Data
-def load_fhir_data(json_path="data/fhir_sample.json"):
-    """Loads patient conditions from FHIR JSON dataset."""
-    with open(json_path, "r") as file:
-        fhir_data = json.load(file)
-    
-    # Extract conditions
-    conditions = []
-    for entry in fhir_data["entry"]:
-        if entry["resource"]["resourceType"] == "Condition":
-            condition = {
-                "PatientID": entry["resource"]["patient"]["reference"].split("/")[-1],
-                "ICD10_Code": entry["resource"]["code"]["coding"][0]["code"],
-                "Condition": entry["resource"]["code"]["coding"][0]["display"]
-            }
-            conditions.append(condition)
-    
-    return pd.DataFrame(conditions)
+def load_fhir_data(json_path="data/fhir_sample.json", all_codings=False):
+    """Loads patient conditions from a FHIR Bundle or bulk-export NDJSON file (or a list of them).
+
+    By default only the first coding of each Condition is kept, as before; all_codings
+    returns one row per coding with its system and position.
+    """
+    conditions = load_conditions(json_path)
+    if all_codings:
+        return conditions
+    first = conditions[conditions["CodingIndex"] == 0]
+    return first[["PatientID", "ICD10_Code", "Condition"]].reset_index(drop=True)
 
 # Merge ICD-10 with FHIR Data
-def map_icd10_to_fhir():
+def map_icd10_to_fhir(csv_path="data/icd10_mappings.csv", json_path="data/fhir_sample.json"):
     """Maps ICD-10 descriptions to FHIR patient conditions."""
-    icd10_df = load_icd10_mapping()
-    fhir_df = load_fhir_data()
+    icd10_df = cached_icd10_mapping(csv_path, os.path.getmtime(csv_path))
+    fhir_df = load_fhir_data(json_path)
 
     # Merge on ICD10 Code
     mapped_df = fhir_df.merge(icd10_df, left_on="ICD10_Code", right_on="icd10_code", how="left")
@@ -37,7 +40,16 @@ def map_icd10_to_fhir():
 
     return mapped_df
 
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Join FHIR patient conditions with ICD-10 descriptions.")
+    parser.add_argument("--icd10-csv", default="data/icd10_mappings.csv")
+    parser.add_argument("--fhir", default="data/fhir_sample.json", help="FHIR Bundle or NDJSON file")
+    parser.add_argument("--output", default="data/mapped_data.csv")
+    args = parser.parse_args(argv)
+
+    mapped_data = map_icd10_to_fhir(args.icd10_csv, args.fhir)
+    mapped_data.to_csv(args.output, index=False)
+    print(f"ICD-10 & FHIR Data Mapping Complete! Saved as `{args.output}`.")
+
 if __name__ == "__main__":
-    mapped_data = map_icd10_to_fhir()
-    mapped_data.to_csv("data/mapped_data.csv", index=False)
-    print("ICD-10 & FHIR Data Mapping Complete! Saved as `mapped_data.csv`.")
+    cli()
@@ -1,5 +1,5 @@
-import coremltools as ct
 import numpy as np
+import argparse
 import json
 
 # Path to your Core ML model
@@ -14,6 +14,8 @@ def load_model(model_path):
     """
     print(f"Loading Core ML model from {model_path}...")
     try:
+        # Imported here so the module loads without coremltools, which is slow to import
+        import coremltools as ct
         model = ct.models.MLModel(model_path)
         print("Model loaded successfully.")
         return model
@@ -55,15 +57,15 @@ def predict_with_model(model, embeddings):
         print(f"Error during prediction: {e}")
         return None
 
-def main():
+def main(model_path=MODEL_PATH, mapping_path=INDEX_TO_ICD10_PATH):
     # Load the Core ML model
-    model = load_model(MODEL_PATH)
+    model = load_model(model_path)
     if model is None:
         print("Exiting due to model loading error.")
         return
 
     # Load the index-to-ICD10 mapping
-    index_to_icd10 = load_index_to_icd10_mapping(INDEX_TO_ICD10_PATH)
+    index_to_icd10 = load_index_to_icd10_mapping(mapping_path)
     if index_to_icd10 is None:
         print("Exiting due to mapping loading error.")
         return
@@ -93,5 +95,12 @@ def main():
     except Exception as e:
         print(f"Error processing prediction output: {e}")
 
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Predict one random embedding with the Core ML model.")
+    parser.add_argument("model_path", nargs="?", default=MODEL_PATH)
+    parser.add_argument("mapping_path", nargs="?", default=INDEX_TO_ICD10_PATH)
+    args = parser.parse_args(argv)
+    main(args.model_path, args.mapping_path)
+
 if __name__ == "__main__":
-    main()
+    cli()
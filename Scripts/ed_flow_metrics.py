@@ -0,0 +1,181 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+from ed_data_loader import ED_TIMESTAMP_COLUMNS, load_ed_visits
+
+# Flow intervals measured from arrival: name -> (start column, end column)
+FLOW_INTERVALS = {
+    "door_to_triage": ("ArrivalTime", "TriageTime"),
+    "door_to_treatment": ("ArrivalTime", "TreatmentStartTime"),
+    "length_of_stay": ("ArrivalTime", "DischargeTime"),
+}
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+# Histogram bins (minutes) used by the incremental percentile estimates: 1-minute
+# resolution for the first day, then coarser bins out to a year
+HISTOGRAM_EDGES = np.unique(np.concatenate([
+    np.arange(0, 24 * 60 + 1, 1),
+    np.arange(24 * 60, 365 * 24 * 60 + 1, 60),
+])).astype(np.float64)
+
+def timestamp_values(df, column):
+    """Timestamps as int64 nanoseconds, with NaT as the int64 minimum."""
+    return df[column].to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+def flag_out_of_order(df):
+    """Boolean frame marking each flow step that happens before the step it should follow."""
+    flags = {}
+    for earlier, later in zip(ED_TIMESTAMP_COLUMNS, ED_TIMESTAMP_COLUMNS[1:]):
+        flags[f"{later}_before_{earlier}"] = (df[later] < df[earlier]).to_numpy()
+    flags = pd.DataFrame(flags, index=df.index)
+    flags["out_of_order"] = flags.any(axis=1)
+    return flags
+
+def flow_intervals(df, valid_only=True):
+    """Minutes from arrival to triage, treatment and discharge.
+
+    With valid_only, visits whose timestamps are out of order get NaN in every interval,
+    since any of their durations could be wrong.
+    """
+    intervals = {}
+    for name, (start, end) in FLOW_INTERVALS.items():
+        intervals[name] = ((df[end] - df[start]).to_numpy(dtype="timedelta64[ns]")
+                           .astype(np.float64) / 60e9)
+    intervals = pd.DataFrame(intervals, index=df.index)
+    missing = df[ED_TIMESTAMP_COLUMNS].isna().any(axis=1).to_numpy()
+    intervals[missing] = np.nan
+    if valid_only:
+        intervals[flag_out_of_order(df)["out_of_order"].to_numpy()] = np.nan
+    return intervals
+
+def flow_distributions(df, percentiles=DEFAULT_PERCENTILES):
+    """Count, mean, min/max and percentiles (minutes) of each flow interval over valid visits."""
+    intervals = flow_intervals(df).to_numpy()
+    valid = intervals[~np.isnan(intervals).any(axis=1)]
+    stats = {"count": np.full(valid.shape[1], len(valid))}
+    if len(valid):
+        stats["mean"] = valid.mean(axis=0)
+        stats["min"] = valid.min(axis=0)
+        stats["max"] = valid.max(axis=0)
+        for percentile, values in zip(percentiles, np.percentile(valid, percentiles, axis=0)):
+            stats[f"p{percentile}"] = values
+    return pd.DataFrame(stats, index=list(FLOW_INTERVALS)).T
+
+def hourly_census(df, freq="h"):
+    """Patients in the department during each hour, by an arrival/discharge sweep.
+
+    A visit counts toward every hour from the one it arrived in through the one it was
+    discharged in. Visits with missing or out-of-order arrival/discharge are skipped.
+    """
+    arrival = timestamp_values(df, "ArrivalTime")
+    discharge = timestamp_values(df, "DischargeTime")
+    nat = np.iinfo(np.int64).min
+    valid = (arrival != nat) & (discharge != nat) & (discharge >= arrival)
+    if not valid.any():
+        return pd.Series(dtype=np.int64, name="census")
+    arrival, discharge = arrival[valid], discharge[valid]
+
+    step = pd.Timedelta(1, unit=freq).value
+    origin = arrival.min() // step * step
+    arrival_bin = (arrival - origin) // step
+    discharge_bin = (discharge - origin) // step
+    n_bins = int(discharge_bin.max()) + 1
+
+    # +1 when a visit enters a bin, -1 in the bin after it leaves; the running sum is the census
+    changes = np.bincount(arrival_bin, minlength=n_bins + 1)
+    changes -= np.bincount(discharge_bin + 1, minlength=n_bins + 1)
+    census = np.cumsum(changes[:n_bins])
+    index = pd.date_range(pd.Timestamp(origin), periods=n_bins, freq=freq)
+    return pd.Series(census, index=index, name="census")
+
+def admission_rates(df):
+    """Visits, admissions and admission rate per Diagnosis."""
+    admitted = (df["Outcome"] == "Admitted").to_numpy()
+    grouped = pd.DataFrame({"Diagnosis": df["Diagnosis"], "admitted": admitted}).groupby(
+        "Diagnosis", observed=True
+    )["admitted"]
+    rates = pd.DataFrame({"visits": grouped.size(), "admissions": grouped.sum()})
+    rates["admission_rate"] = rates["admissions"] / rates["visits"]
+    return rates.sort_values("visits", ascending=False)
+
+class RollingFlowMetrics:
+    """Running ED flow aggregates that are updated batch by batch as visits stream in.
+
+    Keeps counts, sums, min/max and a fixed-bin histogram per flow interval (for
+    approximate percentiles), the hourly census and per-diagnosis admission counts.
+    Every update is vectorized over the batch.
+    """
+
+    def __init__(self, histogram_edges=HISTOGRAM_EDGES):
+        self.histogram_edges = histogram_edges
+        n_intervals = len(FLOW_INTERVALS)
+        self.visits = 0
+        self.out_of_order = 0
+        self.count = np.zeros(n_intervals, dtype=np.int64)
+        self.total = np.zeros(n_intervals)
+        self.minimum = np.full(n_intervals, np.inf)
+        self.maximum = np.full(n_intervals, -np.inf)
+        self.histograms = np.zeros((n_intervals, len(histogram_edges) + 1), dtype=np.int64)
+        self.census = pd.Series(dtype=np.int64, name="census")
+        self.admissions = pd.DataFrame({"visits": pd.Series(dtype=np.int64), "admissions": pd.Series(dtype=np.int64)})
+
+    def update(self, df):
+        self.visits += len(df)
+        self.out_of_order += int(flag_out_of_order(df)["out_of_order"].sum())
+
+        intervals = flow_intervals(df).to_numpy()
+        valid = intervals[~np.isnan(intervals).any(axis=1)]
+        if len(valid):
+            self.count += len(valid)
+            self.total += valid.sum(axis=0)
+            self.minimum = np.minimum(self.minimum, valid.min(axis=0))
+            self.maximum = np.maximum(self.maximum, valid.max(axis=0))
+            n_bins = self.histograms.shape[1]
+            bins = np.searchsorted(self.histogram_edges, valid, side="right")
+            bins += np.arange(valid.shape[1]) * n_bins
+            self.histograms += np.bincount(bins.ravel(), minlength=self.histograms.size).reshape(self.histograms.shape)
+
+        # Census of a batch adds onto the hours already seen
+        self.census = self.census.add(hourly_census(df), fill_value=0).astype(np.int64)
+        rates = admission_rates(df)[["visits", "admissions"]]
+        self.admissions = self.admissions.add(rates, fill_value=0).astype(np.int64)
+        return self
+
+    def percentile(self, q):
+        """Approximate percentile per interval: the upper edge of the bin holding rank q."""
+        cumulative = np.cumsum(self.histograms, axis=1)
+        rank = np.ceil(q / 100 * self.count).clip(min=1)
+        bins = (cumulative < rank[:, None]).sum(axis=1)
+        edges = np.append(self.histogram_edges, np.inf)
+        return np.where(self.count > 0, edges[bins], np.nan)
+
+    def distributions(self, percentiles=DEFAULT_PERCENTILES):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats = {"count": self.count, "mean": self.total / self.count,
+                     "min": self.minimum, "max": self.maximum}
+        for percentile in percentiles:
+            stats[f"p{percentile}"] = self.percentile(percentile)
+        return pd.DataFrame(stats, index=list(FLOW_INTERVALS)).T
+
+    def admission_rates(self):
+        rates = self.admissions.copy()
+        rates["admission_rate"] = rates["admissions"] / rates["visits"]
+        return rates.sort_values("visits", ascending=False)
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Compute ED patient-flow metrics.")
+    parser.add_argument("file_paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    visits = load_ed_visits(args.file_paths)
+    flags = flag_out_of_order(visits)
+    print(f"{len(visits)} visits, {int(flags['out_of_order'].sum())} with out-of-order timestamps")
+    print(flow_distributions(visits))
+    census = hourly_census(visits)
+    print(f"Peak hourly census {census.max() if len(census) else 0}")
+    print(admission_rates(visits).head(10))
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,319 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# Files of a cache directory; the data/indices logs are named by the generation in the index
+INDEX_FILE = "index.npz"
+META_FILE = "meta.json"
+LOG_NAMES = ("data", "indices")
+
+# Dense vector file of caches written before rows were stored sparsely
+LEGACY_VECTORS_FILE = "vectors.npy"
+
+INITIAL_SLOTS = 1024
+INITIAL_NONZEROS = 1 << 16
+
+# Stored bytes per nonzero: a float32 value and an int32 column index
+BYTES_PER_NONZERO = 8
+
+# Live rows copied per block when the log is rewritten
+REWRITE_BLOCK = 1 << 16
+
+def text_key(text, version):
+    """16-byte content key of one normalized text under one vectorizer version."""
+    return hashlib.blake2b(f"{version}\x00{text}".encode("utf-8"), digest_size=16).digest()
+
+def vectorizer_version(vectorizer):
+    """Fingerprint of a fitted vectorizer: its parameters plus vocabulary and IDF weights.
+
+    Refitting on different data changes the fingerprint, so vectors from the old fit are
+    never served for the new one.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(vectorizer.get_params(), sort_keys=True, default=str).encode())
+    vocabulary = getattr(vectorizer, "vocabulary_", None)
+    if vocabulary is not None:
+        digest.update(pickle.dumps(sorted(vocabulary.items())))
+    idf = getattr(vectorizer, "idf_", None)
+    if idf is not None:
+        digest.update(np.ascontiguousarray(idf).tobytes())
+    return digest.hexdigest()[:16]
+
+def log_path(cache_dir, name, generation):
+    return os.path.join(cache_dir, f"{name}-{generation}.npy")
+
+def gather_positions(offsets, lengths):
+    """Log positions of the rows at offsets with lengths, concatenated in row order."""
+    row_starts = np.cumsum(lengths) - lengths
+    return np.repeat(offsets - row_starts, lengths) + np.arange(int(lengths.sum()))
+
+class EmbeddingCache:
+    """Persistent content-addressed cache of float32 vectors, one sparse row per distinct text.
+
+    Rows are appended to memory-mapped data/indices logs, so TF-IDF vectors cost only
+    their nonzeros on disk and in memory. The key index maps each text's hash to its
+    row's offset and length in the log and records when the row was last used; flush()
+    writes it. Rows are never overwritten in place: evicted rows stay in the log until it
+    fills, when the live rows are copied into a new generation of log files, and the old
+    generation is deleted only once an index naming the new one is saved. The index on
+    disk therefore always points at intact rows, even if the process dies between
+    flushes. max_entries and max_bytes (of stored nonzeros) evict the least recently used
+    rows. hits/misses count distinct texts per call, and duplicate_rows counts rows
+    served by another row's vector.
+    """
+
+    def __init__(self, cache_dir, dim, max_entries=None, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.duplicate_rows = 0
+        # Log files of replaced generations, deleted once the index no longer names them
+        self.stale_files = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+        meta_path = os.path.join(cache_dir, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["dim"] != dim:
+                raise ValueError(f"Cache at {cache_dir} holds {meta['dim']}-wide vectors, not {dim}")
+
+        index_path = os.path.join(cache_dir, INDEX_FILE)
+        index = np.load(index_path) if os.path.exists(index_path) else None
+        if index is not None and "generation" in index.files:
+            with index:
+                keys = index["keys"]
+                self.clock = int(index["clock"])
+                self.generation = int(index["generation"])
+                self.log_end = int(index["log_end"])
+                self.allocate_slots(max(INITIAL_SLOTS, len(keys)))
+                self.offsets[:len(keys)] = index["offsets"]
+                self.lengths[:len(keys)] = index["lengths"]
+                self.last_used[:len(keys)] = index["last_used"]
+            self.slot_keys[:len(keys)] = [key.tobytes() for key in keys]
+            self.slots = {key: slot for slot, key in enumerate(self.slot_keys[:len(keys)])}
+            self.free = list(range(len(self.slot_keys) - 1, len(keys) - 1, -1))
+            self.stored_nonzeros = int(self.lengths[:len(keys)].sum())
+            self.data, self.indices = (np.load(log_path(cache_dir, name, self.generation), mmap_mode="r+")
+                                       for name in LOG_NAMES)
+        else:
+            if index is not None:
+                # A dense cache from before rows were stored sparsely; start over
+                index.close()
+                os.remove(index_path)
+            self.clock = 0
+            self.generation = 0
+            self.log_end = 0
+            self.stored_nonzeros = 0
+            self.allocate_slots(INITIAL_SLOTS)
+            self.slots = {}
+            self.free = list(range(INITIAL_SLOTS - 1, -1, -1))
+            self.data, self.indices = self.create_log(self.generation, INITIAL_NONZEROS)
+        self.remove_unused_files()
+
+    def __len__(self):
+        return len(self.slots)
+
+    @property
+    def capacity(self):
+        """Nonzeros the current log file holds."""
+        return self.data.shape[0]
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "entries": len(self), "stored_nonzeros": self.stored_nonzeros,
+            "stored_mb": round(self.stored_nonzeros * BYTES_PER_NONZERO / 1024 ** 2, 2), "capacity": self.capacity,
+            "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 4),
+            "evictions": self.evictions, "duplicate_rows": self.duplicate_rows,
+        }
+
+    def allocate_slots(self, count):
+        """Per-slot offset, length and last-used arrays (and the slot keys), grown to count slots."""
+        grown = [np.zeros(count, dtype=np.int64) for _ in range(3)]
+        if hasattr(self, "offsets"):
+            used = len(self.offsets)
+            for new, old in zip(grown, (self.offsets, self.lengths, self.last_used)):
+                new[:used] = old
+            self.slot_keys += [None] * (count - used)
+        else:
+            self.slot_keys = [None] * count
+        self.offsets, self.lengths, self.last_used = grown
+
+    def new_slots(self, count):
+        if len(self.free) < count:
+            used = len(self.offsets)
+            self.allocate_slots(max(used * 2, used + count))
+            self.free = list(range(len(self.offsets) - 1, used - 1, -1)) + self.free
+        return np.array([self.free.pop() for _ in range(count)], dtype=np.int64)
+
+    def create_log(self, generation, capacity):
+        return tuple(np.lib.format.open_memmap(log_path(self.cache_dir, name, generation), mode="w+", dtype=dtype,
+                                               shape=(capacity,))
+                     for name, dtype in zip(LOG_NAMES, (np.float32, np.int32)))
+
+    def remove_unused_files(self):
+        """Deletes log files of other generations, left by a rewrite the process did not flush."""
+        current = {os.path.basename(log_path(self.cache_dir, name, self.generation)) for name in LOG_NAMES}
+        for name in os.listdir(self.cache_dir):
+            is_log = name.endswith(".npy") and name.split("-")[0] in LOG_NAMES
+            if (is_log and name not in current) or name == LEGACY_VECTORS_FILE:
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def rewrite_log(self, nonzeros):
+        """Copies the live rows into a new log generation with room for nonzeros more."""
+        generation = self.generation + 1
+        data, indices = self.create_log(generation, max(2 * (self.stored_nonzeros + nonzeros), INITIAL_NONZEROS))
+        live = np.array(sorted(self.slots.values()), dtype=np.int64)
+        end = 0
+        for start in range(0, len(live), REWRITE_BLOCK):
+            block = live[start:start + REWRITE_BLOCK]
+            lengths = self.lengths[block]
+            positions = gather_positions(self.offsets[block], lengths)
+            data[end:end + len(positions)] = self.data[positions]
+            indices[end:end + len(positions)] = self.indices[positions]
+            self.offsets[block] = end + np.cumsum(lengths) - lengths
+            end += len(positions)
+        # The saved index still names the old generation, so its files stay until the next flush
+        self.stale_files += [log_path(self.cache_dir, name, self.generation) for name in LOG_NAMES]
+        self.data, self.indices = data, indices
+        self.generation = generation
+        self.log_end = end
+
+    def evict(self, count, nonzeros):
+        """Evicts least recently used rows so count more rows with nonzeros more values fit the limits.
+
+        Rows used during the current call are never evicted, so the limits may still be
+        exceeded when a single call misses more texts than the cache can hold.
+        """
+        excess_entries = len(self.slots) + count - self.max_entries if self.max_entries is not None else 0
+        excess_nonzeros = 0
+        if self.max_bytes is not None:
+            excess_nonzeros = self.stored_nonzeros + nonzeros - self.max_bytes // BYTES_PER_NONZERO
+        if excess_entries <= 0 and excess_nonzeros <= 0:
+            return
+        live = np.fromiter(self.slots.values(), dtype=np.int64, count=len(self.slots))
+        candidates = live[self.last_used[live] < self.clock]
+        candidates = candidates[np.argsort(self.last_used[candidates], kind="stable")]
+        n_evicted = max(excess_entries, 0)
+        if excess_nonzeros > 0:
+            freed = np.cumsum(self.lengths[candidates])
+            n_evicted = max(n_evicted, int(np.searchsorted(freed, excess_nonzeros)) + 1)
+        evicted = candidates[:n_evicted]
+        for slot in evicted.tolist():
+            del self.slots[self.slot_keys[slot]]
+            self.slot_keys[slot] = None
+        self.free += evicted.tolist()
+        self.stored_nonzeros -= int(self.lengths[evicted].sum())
+        self.evictions += len(evicted)
+
+    def fitting(self, lengths):
+        """How many of the new rows with these lengths fit the limits, in order."""
+        count = len(lengths)
+        if self.max_entries is not None:
+            count = min(count, max(self.max_entries - len(self.slots), 0))
+        if self.max_bytes is not None:
+            room = self.max_bytes // BYTES_PER_NONZERO - self.stored_nonzeros
+            count = min(count, int(np.searchsorted(np.cumsum(lengths), room, side="right")))
+        return count
+
+    def store(self, keys, rows):
+        """Appends CSR rows to the log under keys, after evicting to make room for them."""
+        lengths = np.diff(rows.indptr)
+        self.evict(len(keys), int(lengths.sum()))
+        count = self.fitting(lengths)
+        nonzeros = int(rows.indptr[count])
+        if self.log_end + nonzeros > self.capacity:
+            self.rewrite_log(nonzeros)
+        end = self.log_end + nonzeros
+        self.data[self.log_end:end] = rows.data[:nonzeros]
+        self.indices[self.log_end:end] = rows.indices[:nonzeros]
+        slots = self.new_slots(count)
+        self.offsets[slots] = self.log_end + rows.indptr[:count]
+        self.lengths[slots] = lengths[:count]
+        self.last_used[slots] = self.clock
+        for key, slot in zip(keys, slots.tolist()):
+            self.slots[key] = slot
+            self.slot_keys[slot] = key
+        self.log_end = end
+        self.stored_nonzeros += nonzeros
+
+    def lookup(self, texts, embed_func, version):
+        """Vectors for texts as (codes, unique_vectors): row i's vector is unique_vectors[codes[i]].
+
+        unique_vectors is a float32 CSR matrix. Each distinct text is looked up once;
+        misses are embedded together with embed_func(list of texts) -> (n, dim) array or
+        sparse matrix, then stored. Missing texts (NaN) are embedded as "".
+        """
+        self.clock += 1
+        codes, uniques = pd.factorize(pd.Series(texts).fillna(""), sort=False)
+        uniques = [str(text) for text in uniques]
+        self.duplicate_rows += len(codes) - len(uniques)
+
+        keys = [text_key(text, version) for text in uniques]
+        slots = np.array([self.slots.get(key, -1) for key in keys], dtype=np.int64)
+        hit = slots >= 0
+        self.hits += int(hit.sum())
+        self.misses += int((~hit).sum())
+        hit_slots = slots[hit]
+        self.last_used[hit_slots] = self.clock
+
+        lengths = self.lengths[hit_slots]
+        positions = gather_positions(self.offsets[hit_slots], lengths)
+        cached = sp.csr_matrix((self.data[positions], self.indices[positions], np.r_[0, np.cumsum(lengths)]),
+                               shape=(len(hit_slots), self.dim))
+
+        missing = np.flatnonzero(~hit)
+        computed = sp.csr_matrix((0, self.dim), dtype=np.float32)
+        if len(missing):
+            computed = sp.csr_matrix(embed_func([uniques[i] for i in missing]), dtype=np.float32)
+            self.store([keys[i] for i in missing], computed)
+
+        # Cached rows come first in the stack, computed rows after them
+        order = np.empty(len(uniques), dtype=np.int64)
+        order[hit] = np.arange(len(hit_slots))
+        order[missing] = len(hit_slots) + np.arange(len(missing))
+        return codes, sp.vstack([cached, computed], format="csr")[order]
+
+    def embed(self, texts, embed_func, version):
+        """One CSR row per row of texts; duplicates share the cached vector."""
+        codes, unique_vectors = self.lookup(texts, embed_func, version)
+        return unique_vectors[codes]
+
+    def flush(self):
+        """Writes the logs and then the key index; call before the process exits."""
+        self.data.flush()
+        self.indices.flush()
+        live = np.array(sorted(self.slots.values()), dtype=np.int64)
+        # Raw uint8 rows, since an "S16" array would drop trailing zero bytes of a key
+        keys = np.frombuffer(b"".join(self.slot_keys[slot] for slot in live.tolist()), dtype=np.uint8).reshape(-1, 16)
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        with open(f"{index_path}.tmp", "wb") as f:
+            np.savez(f, keys=keys, offsets=self.offsets[live], lengths=self.lengths[live],
+                     last_used=self.last_used[live], clock=self.clock, generation=self.generation,
+                     log_end=self.log_end)
+        os.replace(f"{index_path}.tmp", index_path)
+        with open(os.path.join(self.cache_dir, META_FILE), "w") as f:
+            json.dump({"dim": self.dim, "entries": len(keys)}, f)
+        for path in self.stale_files:
+            if os.path.exists(path):
+                os.remove(path)
+        self.stale_files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
@@ -1,7 +1,12 @@
 import pandas as pd
+import numpy as np
 import json
+import gzip
+import argparse
 import os
 
+from source_cache import load_source
+
 # File paths
 hcpcs_file = "HCPC2025_JAN_ANWEB_12172024.csv"
 addendum_a_file = "January_2025_Addendum_A.csv"
@@ -9,6 +14,14 @@ addendum_b_file = "January_2025_Addendum_B.csv"
 icd10_file = "icd10_codesystem.json"
 output_file = "mapped_data_final.json"
 
+# Join keys perform_mapping looks rows up by; parsed as strings so they match the ICD-10 codes,
+# while every other column keeps the dtype read_csv inferred
+KEY_COLUMNS = {
+    "hcpcs": ["SEQNUM", "HCPC", "OPPS"],
+    "addendum_a": ["APC"],
+    "addendum_b": ["HCPCS_Code"],
+}
+
 # Function to print and verify column names in a file
 def inspect_columns(file_path):
     if os.path.exists(file_path):
@@ -28,9 +41,20 @@ def standardize_columns(data, column_mapping, file_name):
         print(f"WARNING: Missing columns in {file_name}: {missing_columns}")
     return data
 
-# Preprocess HCPCS file
-def preprocess_hcpcs(file_path):
-    print(f"\nProcessing HCPCS file: {file_path}")
+# Cast the join key columns to strings, with missing keys as ""
+def string_keys(data, source):
+    keys = [col for col in KEY_COLUMNS[source] if col in data.columns]
+    data[keys] = data[keys].astype(str).fillna("")
+    return data
+
+# Columns to read for a mapping: the join keys plus the requested fields (None reads every column)
+def mapping_columns(source, fields=None):
+    if fields is None:
+        return None
+    return KEY_COLUMNS[source] + [field for field in fields if field not in KEY_COLUMNS[source]]
+
+# Parse and standardize the HCPCS file
+def parse_hcpcs(file_path):
     hcpcs_column_mapping = {
         "LONG DESCRIPTION": "LONG_DESCRIPTION",
         "SHORT DESCRIPTION": "SHORT_DESCRIPTION",
@@ -38,15 +62,16 @@ def preprocess_hcpcs(file_path):
         "HCPC": "HCPC",  # Ensure this column exists
     }
     hcpcs_data = pd.read_csv(file_path)
-    # Explicitly cast to string to avoid FutureWarning
-    hcpcs_data = hcpcs_data.astype(str)
-    hcpcs_data.fillna("", inplace=True)
     hcpcs_data = standardize_columns(hcpcs_data, hcpcs_column_mapping, "HCPCS File")
-    return hcpcs_data
+    return string_keys(hcpcs_data, "hcpcs")
 
-# Preprocess Addendum A file
-def preprocess_addendum_a(file_path):
-    print(f"\nProcessing Addendum A file: {file_path}")
+# Preprocess HCPCS file, served from the columnar cache after the first parse
+def preprocess_hcpcs(file_path, columns=None, use_cache=True):
+    print(f"\nProcessing HCPCS file: {file_path}")
+    return load_source(file_path, "HCPCS File", parse_hcpcs, columns=columns, use_cache=use_cache)
+
+# Parse and standardize the Addendum A file
+def parse_addendum_a(file_path):
     addendum_a_column_mapping = {
         "Group Title": "Group_Title",
         "Relative Weight": "Relative_Weight",
@@ -59,14 +84,16 @@ def preprocess_addendum_a(file_path):
         "APC": "APC",  # Ensure this column exists
     }
     addendum_a_data = pd.read_csv(file_path, skiprows=2)
-    addendum_a_data = addendum_a_data.astype(str)  # Explicitly cast to string
-    addendum_a_data.fillna("", inplace=True)
     addendum_a_data = standardize_columns(addendum_a_data, addendum_a_column_mapping, "Addendum A File")
-    return addendum_a_data
+    return string_keys(addendum_a_data, "addendum_a")
 
-# Preprocess Addendum B file
-def preprocess_addendum_b(file_path):
-    print(f"\nProcessing Addendum B file: {file_path}")
+# Preprocess Addendum A file, served from the columnar cache after the first parse
+def preprocess_addendum_a(file_path, columns=None, use_cache=True):
+    print(f"\nProcessing Addendum A file: {file_path}")
+    return load_source(file_path, "Addendum A File", parse_addendum_a, columns=columns, use_cache=use_cache)
+
+# Parse and standardize the Addendum B file
+def parse_addendum_b(file_path):
     addendum_b_column_mapping = {
         "HCPCS Code": "HCPCS_Code",
         "Short Descriptor": "Short_Descriptor",
@@ -77,10 +104,13 @@ def preprocess_addendum_b(file_path):
         "Drug and Device Pass-Through Expiration during Calendar Year": "Drug_and_Device_Pass-Through_Expiration",
     }
     addendum_b_data = pd.read_csv(file_path, skiprows=4)
-    addendum_b_data = addendum_b_data.astype(str)  # Explicitly cast to string
-    addendum_b_data.fillna("", inplace=True)
     addendum_b_data = standardize_columns(addendum_b_data, addendum_b_column_mapping, "Addendum B File")
-    return addendum_b_data
+    return string_keys(addendum_b_data, "addendum_b")
+
+# Preprocess Addendum B file, served from the columnar cache after the first parse
+def preprocess_addendum_b(file_path, columns=None, use_cache=True):
+    print(f"\nProcessing Addendum B file: {file_path}")
+    return load_source(file_path, "Addendum B File", parse_addendum_b, columns=columns, use_cache=use_cache)
 
 # Load and process ICD-10 JSON
 def load_icd10(file_path):
@@ -93,26 +123,75 @@ def load_icd10(file_path):
         print(f"ERROR: File not found - {file_path}")
         return {"concept": []}
 
-# Perform mapping
-def perform_mapping(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data):
-    print("\nPerforming ICD-10 mappings...")
-    for concept in icd10_data["concept"]:
-        icd_code = concept["code"]
+# Build hash indexes (key -> row positions) once so each concept lookup is O(matches)
+def build_row_index(data, column):
+    return data.groupby(column, sort=False, dropna=False).indices
+
+# Row values as the strings written to the mapped output, with missing values as ""
+def record_values(data):
+    return data.astype(str).fillna("").to_numpy(dtype=object)
 
-        # Map to HCPCS
-        matching_hcpcs = hcpcs_data[hcpcs_data["SEQNUM"] == icd_code]
-        concept["HCPCS_Mappings"] = matching_hcpcs.to_dict(orient="records")
+# Prebuild the lookup indexes and row values used by perform_mapping
+def build_mapping_indexes(hcpcs_data, addendum_a_data, addendum_b_data):
+    print("\nBuilding SEQNUM, APC and HCPCS indexes...")
+    return {
+        "seqnum": build_row_index(hcpcs_data, "SEQNUM"),
+        "apc": build_row_index(addendum_a_data, "APC"),
+        "hcpcs_code": build_row_index(addendum_b_data, "HCPCS_Code"),
+        "hcpcs_opps": hcpcs_data["OPPS"].to_numpy(),
+        "hcpcs_hcpc": hcpcs_data["HCPC"].to_numpy(),
+        "hcpcs": (list(hcpcs_data.columns), record_values(hcpcs_data)),
+        "addendum_a": (list(addendum_a_data.columns), record_values(addendum_a_data)),
+        "addendum_b": (list(addendum_b_data.columns), record_values(addendum_b_data)),
+    }
+
+# Collect the rows whose key is in keys, in original row order and without repeats
+def lookup_rows(index, keys):
+    positions = [index[key] for key in pd.unique(keys) if key in index]
+    if not positions:
+        return np.empty(0, dtype=np.intp)
+    if len(positions) == 1:
+        return positions[0]
+    return np.unique(np.concatenate(positions))
+
+# Build to_dict(orient="records") style rows for the given row positions only
+def rows_to_records(table, rows):
+    columns, values = table
+    return [dict(zip(columns, row)) for row in values[rows].tolist()]
 
-        # Map to Addendum A
-        matching_apc = addendum_a_data[addendum_a_data["APC"].isin(matching_hcpcs["OPPS"].unique())]
-        concept["Addendum_A_Mappings"] = matching_apc.to_dict(orient="records")
+# Build the HCPCS, Addendum A and Addendum B mappings for a single ICD-10 code
+def map_concept(icd_code, indexes):
+    # Map to HCPCS
+    hcpcs_rows = indexes["seqnum"].get(icd_code, np.empty(0, dtype=np.intp))
 
-        # Map to Addendum B
-        matching_b = addendum_b_data[addendum_b_data["HCPCS_Code"].isin(matching_hcpcs["HCPC"])]
-        concept["Addendum_B_Mappings"] = matching_b.to_dict(orient="records")
+    # Map to Addendum A
+    apc_rows = lookup_rows(indexes["apc"], indexes["hcpcs_opps"][hcpcs_rows])
 
+    # Map to Addendum B
+    b_rows = lookup_rows(indexes["hcpcs_code"], indexes["hcpcs_hcpc"][hcpcs_rows])
+
+    return {
+        "HCPCS_Mappings": rows_to_records(indexes["hcpcs"], hcpcs_rows),
+        "Addendum_A_Mappings": rows_to_records(indexes["addendum_a"], apc_rows),
+        "Addendum_B_Mappings": rows_to_records(indexes["addendum_b"], b_rows),
+    }
+
+# Perform mapping
+def perform_mapping(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data, indexes=None):
+    print("\nPerforming ICD-10 mappings...")
+    if indexes is None:
+        indexes = build_mapping_indexes(hcpcs_data, addendum_a_data, addendum_b_data)
+    for concept in icd10_data["concept"]:
+        concept.update(map_concept(concept["code"], indexes))
     return icd10_data
 
+# Yield mapped concepts one at a time without attaching mappings to icd10_data
+def iter_mapped_concepts(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data, indexes=None):
+    if indexes is None:
+        indexes = build_mapping_indexes(hcpcs_data, addendum_a_data, addendum_b_data)
+    for concept in icd10_data["concept"]:
+        yield {**concept, **map_concept(concept["code"], indexes)}
+
 # Save the final mapped data
 def save_mapped_data(mapped_data, output_path):
     print(f"\nSaving mapped data to {output_path}...")
@@ -120,20 +199,94 @@ def save_mapped_data(mapped_data, output_path):
         json.dump(mapped_data, f, indent=4)
     print(f"Mapped data saved to {output_path}\n")
 
+# Open an output file for text writing, gzip-compressed if requested or the path ends in .gz
+def open_output(output_path, compress=False):
+    if compress or output_path.endswith(".gz"):
+        return gzip.open(output_path, "wt", encoding="utf-8")
+    return open(output_path, "w")
+
+# Write one value through the incremental encoder, nested at the given indent level
+def write_indented(f, encoder, value, level):
+    padding = "\n" + " " * (4 * level)
+    for chunk in encoder.iterencode(value):
+        f.write(chunk.replace("\n", padding))
+
+# Stream mapped concepts to disk one at a time.
+# "json" output matches save_mapped_data byte for byte; "ndjson" writes one concept per line.
+def save_mapped_data_streaming(icd10_data, mapped_concepts, output_path, output_format="json", compress=False):
+    print(f"\nStreaming mapped data to {output_path} ({output_format})...")
+    with open_output(output_path, compress) as f:
+        if output_format == "ndjson":
+            for concept in mapped_concepts:
+                f.write(json.dumps(concept))
+                f.write("\n")
+        elif output_format == "json":
+            encoder = json.JSONEncoder(indent=4)
+            f.write("{")
+            for i, key in enumerate(icd10_data):
+                f.write(",\n    " if i else "\n    ")
+                f.write(json.dumps(key) + ": ")
+                if key != "concept":
+                    write_indented(f, encoder, icd10_data[key], 1)
+                    continue
+                first = True
+                for concept in mapped_concepts:
+                    f.write("[\n        " if first else ",\n        ")
+                    write_indented(f, encoder, concept, 2)
+                    first = False
+                f.write("[]" if first else "\n    ]")
+            f.write("\n}" if icd10_data else "}")
+        else:
+            raise ValueError(f"Unsupported output format: {output_format}")
+    print(f"Mapped data saved to {output_path}\n")
+
 # Main function
-def main():
+def main(stream=False, output_format="json", compress=False, hcpcs_path=None, addendum_a_path=None,
+         addendum_b_path=None, icd10_path=None, output_path=None, fields=None):
+    hcpcs_path = hcpcs_path or hcpcs_file
+    addendum_a_path = addendum_a_path or addendum_a_file
+    addendum_b_path = addendum_b_path or addendum_b_file
+    output_path = output_path or output_file
+    # Fields kept in each source's mapped rows, e.g. {"hcpcs": ["LONG_DESCRIPTION"]}; all columns by default
+    fields = fields or {}
+
     # Inspect column names in input files
-    inspect_columns(hcpcs_file)
-    inspect_columns(addendum_a_file)
-    inspect_columns(addendum_b_file)
+    inspect_columns(hcpcs_path)
+    inspect_columns(addendum_a_path)
+    inspect_columns(addendum_b_path)
+
+    hcpcs_data = preprocess_hcpcs(hcpcs_path, mapping_columns("hcpcs", fields.get("hcpcs")))
+    addendum_a_data = preprocess_addendum_a(addendum_a_path, mapping_columns("addendum_a", fields.get("addendum_a")))
+    addendum_b_data = preprocess_addendum_b(addendum_b_path, mapping_columns("addendum_b", fields.get("addendum_b")))
+    icd10_data = load_icd10(icd10_path or icd10_file)
+    if stream or output_format != "json" or compress:
+        path = output_path.replace(".json", ".ndjson") if output_format == "ndjson" else output_path
+        path = path + ".gz" if compress else path
+        mapped_concepts = iter_mapped_concepts(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data)
+        save_mapped_data_streaming(icd10_data, mapped_concepts, path, output_format, compress)
+    else:
+        mapped_data = perform_mapping(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data)
+        save_mapped_data(mapped_data, output_path)
 
-    hcpcs_data = preprocess_hcpcs(hcpcs_file)
-    addendum_a_data = preprocess_addendum_a(addendum_a_file)
-    addendum_b_data = preprocess_addendum_b(addendum_b_file)
-    icd10_data = load_icd10(icd10_file)
-    mapped_data = perform_mapping(hcpcs_data, addendum_a_data, addendum_b_data, icd10_data)
-    save_mapped_data(mapped_data, output_file)
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Map ICD-10 concepts to HCPCS and OPPS Addendum A/B.")
+    parser.add_argument("--stream", action="store_true", help="Write one concept at a time instead of one json.dump")
+    parser.add_argument("--format", dest="output_format", choices=["json", "ndjson"], default="json")
+    parser.add_argument("--gzip", dest="compress", action="store_true", help="Gzip the output file")
+    parser.add_argument("--hcpcs", dest="hcpcs_path", help=f"HCPCS CSV (default: {hcpcs_file})")
+    parser.add_argument("--addendum-a", dest="addendum_a_path", help=f"Addendum A CSV (default: {addendum_a_file})")
+    parser.add_argument("--addendum-b", dest="addendum_b_path", help=f"Addendum B CSV (default: {addendum_b_file})")
+    parser.add_argument("--icd10", dest="icd10_path", help=f"ICD-10 CodeSystem JSON (default: {icd10_file})")
+    parser.add_argument("--output", dest="output_path", help=f"mapped output (default: {output_file})")
+    for source in KEY_COLUMNS:
+        flag = source.replace("_", "-")
+        parser.add_argument(f"--{flag}-fields", dest=source, nargs="+",
+                            help=f"columns kept in the {flag} mappings besides the join keys (default: all)")
+    args = parser.parse_args(argv)
+    fields = {source: getattr(args, source) for source in KEY_COLUMNS if getattr(args, source)}
+    main(args.stream, args.output_format, args.compress, args.hcpcs_path, args.addendum_a_path,
+         args.addendum_b_path, args.icd10_path, args.output_path, fields)
 
 # Run the script
 if __name__ == "__main__":
-    main()
+    cli()
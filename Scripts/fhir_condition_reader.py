@@ -0,0 +1,199 @@
+import gzip
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library parser is the fallback
+    orjson = None
+
+# Columns of the condition table: one row per coding of each Condition
+CONDITION_COLUMNS = ["PatientID", "ICD10_Code", "Condition", "CodeSystem", "CodingIndex"]
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Cheap test on the raw line or entry bytes so non-Condition resources are never decoded
+CONDITION_MARKER = b'"Condition"'
+
+# Bytes that delimit Bundle entries, and the nesting depth change of each
+QUOTE, BACKSLASH, COMMA, CLOSE_ARRAY = b'"\\,]'
+IS_STRUCTURAL = np.zeros(256, dtype=bool)
+IS_STRUCTURAL[list(b"{}[],")] = True
+DEPTH_DELTA = np.zeros(256, dtype=np.int64)
+DEPTH_DELTA[list(b"{[")] = 1
+DEPTH_DELTA[list(b"}]")] = -1
+
+loads = orjson.loads if orjson is not None else json.loads
+
+def open_export(file_path):
+    """Opens a FHIR export as bytes, decompressing .gz files on the fly."""
+    return gzip.open(file_path, "rb") if file_path.endswith(".gz") else open(file_path, "rb")
+
+def is_ndjson(file_path):
+    name = file_path[:-3] if file_path.endswith(".gz") else file_path
+    return name.lower().endswith(NDJSON_EXTENSIONS)
+
+def iter_ndjson_conditions(file_path):
+    """Yields Condition resources from a bulk-FHIR NDJSON export, one resource per line."""
+    with open_export(file_path) as f:
+        for line in f:
+            if CONDITION_MARKER not in line:
+                continue
+            resource = loads(line)
+            if resource.get("resourceType") == "Condition":
+                yield resource
+
+def entry_separators(data):
+    """Offsets in data of the commas between top-level values, and of the "]" closing the array.
+
+    data starts inside an array, outside any string. Brackets and commas inside strings are
+    skipped, telling escaped quotes apart by the run of backslashes before them. The scan is
+    over raw UTF-8 bytes, whose multi-byte characters never contain these ASCII bytes.
+    Returns (commas, end), with end None while the array continues past data.
+    """
+    b = np.frombuffer(data, dtype=np.uint8)
+    quotes = np.flatnonzero(b == QUOTE)
+    # Quotes after a backslash are rare; count the run behind each to see if it escapes the quote
+    after_backslash = np.flatnonzero(b[np.maximum(quotes - 1, 0)] == BACKSLASH)
+    if len(after_backslash):
+        escaped = []
+        for i in after_backslash.tolist():
+            run = 0
+            while quotes[i] - run > 0 and data[quotes[i] - run - 1] == BACKSLASH:
+                run += 1
+            if run % 2:
+                escaped.append(i)
+        quotes = np.delete(quotes, escaped)
+    structural = np.flatnonzero(IS_STRUCTURAL[b])
+    # Outside a string when an even number of quotes precede it
+    structural = structural[np.searchsorted(quotes, structural) % 2 == 0]
+    delta = DEPTH_DELTA[b[structural]]
+    depth = np.cumsum(delta) - delta
+    top = structural[depth == 0]
+    closing = np.flatnonzero(b[top] == CLOSE_ARRAY)
+    end = int(top[closing[0]]) if len(closing) else None
+    commas = top[b[top] == COMMA]
+    if end is not None:
+        commas = commas[commas < end]
+    return commas.tolist(), end
+
+def iter_bundle_entry_texts(file_path, chunk_size=READ_CHUNK_SIZE):
+    """Yields the raw JSON bytes of each entry in a Bundle's top-level "entry" array.
+
+    The file is read in chunks and each entry is cut out as soon as it is complete, by
+    scanning for separators without building any objects, so only one entry (plus a chunk
+    of lookahead) is held in memory and callers can skip entries by their text. The
+    "entry" key is expected before any nested object that itself has an "entry" key,
+    which is how Bundles are written in practice.
+    """
+    with open_export(file_path) as f:
+        buffer = b""
+        eof = False
+
+        def read_more():
+            nonlocal buffer, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+
+        # Seek to the opening bracket of the entry array
+        while True:
+            key = buffer.find(b'"entry"')
+            if key != -1:
+                bracket = buffer.find(b"[", key)
+                if bracket != -1:
+                    buffer = buffer[bracket + 1:]
+                    break
+            if eof:
+                return
+            read_more()
+
+        while True:
+            commas, end = entry_separators(buffer)
+            start = 0
+            for comma in commas:
+                yield buffer[start:comma].strip()
+                start = comma + 1
+            if end is not None:
+                last = buffer[start:end].strip()
+                if last:
+                    yield last
+                return
+            if eof:
+                raise ValueError(f"Unterminated entry array in {file_path}")
+            # Keep the unfinished entry and read on
+            buffer = buffer[start:]
+            read_more()
+
+def iter_bundle_entries(file_path, chunk_size=READ_CHUNK_SIZE):
+    """Yields the decoded entries of a Bundle's top-level "entry" array one at a time."""
+    for text in iter_bundle_entry_texts(file_path, chunk_size):
+        yield loads(text)
+
+def iter_bundle_conditions(file_path):
+    for text in iter_bundle_entry_texts(file_path):
+        # Like the NDJSON path: entries whose text cannot be a Condition are never decoded
+        if CONDITION_MARKER not in text:
+            continue
+        resource = loads(text).get("resource", {})
+        if resource.get("resourceType") == "Condition":
+            yield resource
+
+def iter_conditions(file_path):
+    if is_ndjson(file_path):
+        return iter_ndjson_conditions(file_path)
+    return iter_bundle_conditions(file_path)
+
+def patient_id(resource):
+    """Patient id from subject.reference (R4) or patient.reference (STU3), without the "Patient/" part."""
+    reference = (resource.get("subject") or resource.get("patient") or {}).get("reference")
+    return reference.split("/")[-1] if reference else None
+
+def read_conditions(file_path):
+    """Extracts every coding of every Condition in one file into columnar lists."""
+    columns = {column: [] for column in CONDITION_COLUMNS}
+    for resource in iter_conditions(file_path):
+        patient = patient_id(resource)
+        for coding_index, coding in enumerate(resource.get("code", {}).get("coding", [])):
+            columns["PatientID"].append(patient)
+            columns["ICD10_Code"].append(coding.get("code"))
+            columns["Condition"].append(coding.get("display"))
+            columns["CodeSystem"].append(coding.get("system"))
+            columns["CodingIndex"].append(coding_index)
+    return columns
+
+def load_conditions(file_paths, max_workers=None):
+    """Condition table for one or more Bundle / NDJSON files, parsed in parallel processes."""
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    file_paths = list(file_paths)
+    if max_workers == 1 or len(file_paths) < 2:
+        results = [read_conditions(file_path) for file_path in file_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(read_conditions, file_paths))
+    frames = [pd.DataFrame(columns) for columns in results]
+    if not frames:
+        return pd.DataFrame(columns=CONDITION_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df["CodingIndex"] = df["CodingIndex"].astype("int32")
+    return df
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Read FHIR Condition codings from Bundles or NDJSON files.")
+    parser.add_argument("file_paths", nargs="+", help="Bundle JSON or bulk-export NDJSON files, optionally gzipped")
+    parser.add_argument("--max-workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    conditions = load_conditions(args.file_paths, args.max_workers)
+    print(f"Read {len(conditions)} condition codings for {conditions['PatientID'].nunique()} patients")
+    print(conditions.head())
+
+if __name__ == "__main__":
+    cli()
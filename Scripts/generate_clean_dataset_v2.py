@@ -1,26 +1,27 @@
 import pandas as pd
+import numpy as np
+import argparse
 import logging
 import random
 
-# Setup logging
-logging.basicConfig(
-    filename='generate_clean_dataset_v2.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logging.info("Starting the dataset generation process...")
+from source_cache import load_source
 
-# File paths
+# Log file a run appends to
+LOG_PATH = "generate_clean_dataset_v2.log"
+
+# Default file paths, used when main is not given paths
 input_standard_charges_path = "/Users/nathanculbreath/Documents/Building/MHAI_Build/MHAI/Standard_Charges.csv"
-input_dxccsr_path = "/Users/nathanculbreath/Downloads/DXCCSR_v2025-1/DXCCSR_v2025-1/DXCCSR_v2025-1.csv"
-input_prccsr_path = "/Users/nathanculbreath/Downloads/PRCCSR_v2025-1/PRCCSR_v2025-1/PRCCSR_v2025-1.csv"
 output_cleaned_dataset_path = "/Users/nathanculbreath/Documents/Building/MHAI_Build/MHAI/healthcare_dataset_clean.csv"
 
+# Parse a CSV in full; wrapped by load_csv so the result is cached as Feather
+def parse_csv(file_path):
+    return pd.read_csv(file_path, encoding="utf-8", low_memory=False)
+
 # Load datasets with improved exception handling
-def load_csv(file_path, file_label):
+def load_csv(file_path, file_label, columns=None, use_cache=True):
     try:
         logging.info(f"Loading {file_label} dataset from {file_path}...")
-        df = pd.read_csv(file_path, encoding="utf-8", low_memory=False)
+        df = load_source(file_path, file_label, parse_csv, columns=columns, use_cache=use_cache)
         logging.info(f"{file_label} dataset loaded successfully.")
         return df
     except FileNotFoundError:
@@ -30,11 +31,6 @@ def load_csv(file_path, file_label):
         logging.error(f"An error occurred while loading {file_label} dataset: {e}")
         raise
 
-# Load datasets
-standard_charges = load_csv(input_standard_charges_path, "Standard Charges")
-dxccsr = load_csv(input_dxccsr_path, "DXCCSR")
-prccsr = load_csv(input_prccsr_path, "PRCCSR")
-
 # Clean column names
 def clean_columns(df, dataset_name):
     logging.info(f"Cleaning column names for {dataset_name} dataset...")
@@ -44,10 +40,6 @@ def clean_columns(df, dataset_name):
     logging.info(f"Column names for {dataset_name} cleaned successfully.")
     return df
 
-standard_charges = clean_columns(standard_charges, "Standard Charges")
-dxccsr = clean_columns(dxccsr, "DXCCSR")
-prccsr = clean_columns(prccsr, "PRCCSR")
-
 # Ensure all required columns are present in the dataset
 required_columns = [
     "description", "service|type", "pricing|gross", "pricing|discounted", "code|1|description", "code|2|description",
@@ -70,23 +62,27 @@ def validate_and_fill_missing_columns(df, required_columns, dataset_name):
     logging.info(f"Validation completed for {dataset_name}. All required columns are now present.")
     return df
 
-standard_charges = validate_and_fill_missing_columns(standard_charges, required_columns, "Standard Charges")
+# Code type columns in the order they are preferred for `service|type`
+service_type_columns = ["code|2|type", "code|1|type", "code|3|type", "code|4|type"]
+
+# Pick the first non-null code type per row across the ordered columns (column-wise coalesce)
+def determine_service_types(df):
+    columns = [col for col in service_type_columns if col in df.columns]
+    if not columns:
+        return pd.Series("Unknown Type", index=df.index, dtype=object)
+    service_types = df[columns[0]]
+    for col in columns[1:]:
+        service_types = service_types.fillna(df[col])
+    return service_types.fillna("Unknown Type")
 
 # Add `service|type` column if missing
 def add_service_type_column(df):
     if "service|type" not in df.columns:
         logging.info("Creating `service|type` column...")
-        def determine_service_type(row):
-            for col in ["code|2|type", "code|1|type", "code|3|type", "code|4|type"]:
-                if col in row and pd.notna(row[col]):
-                    return row[col]
-            return "Unknown Type"
-        df["service|type"] = df.apply(determine_service_type, axis=1)
+        df["service|type"] = determine_service_types(df)
         logging.info("`service|type` column created successfully.")
     return df
 
-standard_charges = add_service_type_column(standard_charges)
-
 # Sample the Standard Charges dataset
 def sample_dataset(df, subset_size, dataset_name):
     logging.info(f"Sampling {subset_size} rows from {dataset_name} dataset...")
@@ -98,8 +94,6 @@ def sample_dataset(df, subset_size, dataset_name):
     logging.info(f"Sampled {subset_size} rows from {dataset_name} successfully.")
     return sampled_df
 
-standard_charges_subset = sample_dataset(standard_charges, 1500, "Standard Charges")
-
 # Save cleaned dataset
 def save_cleaned_dataset(df, output_path):
     logging.info(f"Saving cleaned dataset to {output_path}...")
@@ -107,6 +101,83 @@ def save_cleaned_dataset(df, output_path):
     logging.info("Cleaned dataset saved successfully.")
     print(f"Cleaned dataset saved to {output_path}")
 
-save_cleaned_dataset(standard_charges_subset, output_cleaned_dataset_path)
+# Read a CSV in chunks so memory stays bounded by chunk size instead of file size
+def iter_csv_chunks(file_path, file_label, chunksize):
+    try:
+        logging.info(f"Streaming {file_label} dataset from {file_path} in chunks of {chunksize} rows...")
+        yield from pd.read_csv(file_path, encoding="utf-8", chunksize=chunksize)
+    except FileNotFoundError:
+        logging.error(f"{file_label} dataset not found at {file_path}. Please check the path.")
+        raise
 
-print("Dataset generation process completed successfully!")
+# Clean, validate and tag each chunk exactly as the in-memory path does for the whole frame
+def prepare_chunks(chunks, dataset_name):
+    for chunk in chunks:
+        chunk = clean_columns(chunk, dataset_name)
+        chunk = validate_and_fill_missing_columns(chunk, required_columns, dataset_name)
+        yield add_service_type_column(chunk)
+
+# Reservoir-sample subset_size rows from a stream of chunks.
+# Every row gets a uniform random key and the rows with the smallest keys are kept (bottom-k
+# reservoir), giving the same uniform without-replacement distribution as df.sample(n)
+# while holding at most subset_size + chunksize rows.
+def reservoir_sample_chunks(chunks, subset_size, dataset_name, random_state=42):
+    logging.info(f"Reservoir sampling {subset_size} rows from {dataset_name} dataset...")
+    rng = np.random.RandomState(random_state)
+    reservoir = None
+    reservoir_keys = np.empty(0)
+    total_rows = 0
+    for chunk in chunks:
+        total_rows += len(chunk)
+        keys = np.concatenate([reservoir_keys, rng.random_sample(len(chunk))])
+        candidates = chunk if reservoir is None else pd.concat([reservoir, chunk])
+        keep = np.argsort(keys, kind="stable")[:subset_size]
+        reservoir = candidates.iloc[keep]
+        reservoir_keys = keys[keep]
+    if reservoir is None or total_rows == 0:
+        logging.error(f"{dataset_name} dataset is empty!")
+        raise ValueError(f"The input {dataset_name} dataset is empty. Please check your source data.")
+    logging.info(f"Sampled {len(reservoir)} of {total_rows} rows from {dataset_name} successfully.")
+    return reservoir
+
+# Setup logging; a run configures it, importing the module does not
+def setup_logging(log_path=LOG_PATH):
+    logging.basicConfig(
+        filename=log_path,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+def main(chunksize=None, subset_size=1500, input_path=None, output_path=None, log_path=LOG_PATH):
+    setup_logging(log_path)
+    logging.info("Starting the dataset generation process...")
+    input_path = input_path or input_standard_charges_path
+    output_path = output_path or output_cleaned_dataset_path
+
+    if chunksize:
+        chunks = iter_csv_chunks(input_path, "Standard Charges", chunksize)
+        chunks = prepare_chunks(chunks, "Standard Charges")
+        standard_charges_subset = reservoir_sample_chunks(chunks, subset_size, "Standard Charges")
+    else:
+        standard_charges = load_csv(input_path, "Standard Charges")
+        standard_charges = clean_columns(standard_charges, "Standard Charges")
+        standard_charges = validate_and_fill_missing_columns(standard_charges, required_columns, "Standard Charges")
+        standard_charges = add_service_type_column(standard_charges)
+        standard_charges_subset = sample_dataset(standard_charges, subset_size, "Standard Charges")
+
+    save_cleaned_dataset(standard_charges_subset, output_path)
+
+    print("Dataset generation process completed successfully!")
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Generate the cleaned, sampled Standard Charges dataset.")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the input in chunks of this many rows")
+    parser.add_argument("--subset-size", type=int, default=1500)
+    parser.add_argument("--input", dest="input_path", help="Standard Charges CSV (default: the configured path)")
+    parser.add_argument("--output", dest="output_path", help="Cleaned dataset CSV (default: the configured path)")
+    parser.add_argument("--log", dest="log_path", default=LOG_PATH)
+    args = parser.parse_args(argv)
+    main(args.chunksize, args.subset_size, args.input_path, args.output_path, args.log_path)
+
+if __name__ == "__main__":
+    cli()
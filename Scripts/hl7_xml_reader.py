@@ -0,0 +1,146 @@
+import re
+import argparse
+import xml.etree.ElementTree as ET
+import pandas as pd
+
+# Columns of every record the reader yields
+RECORD_FIELDS = [
+    "document_type", "document_id", "patient_id", "family_name", "given_name", "gender", "birth_time",
+]
+
+# XML declarations open every concatenated document; they are only legal at the start of a file
+XML_DECLARATION = re.compile(rb"<\?xml[^>]*\?>")
+
+# Wrapper element that turns a concatenation of documents into one well-formed stream
+STREAM_ROOT = b"<hl7_stream>"
+STREAM_ROOT_END = b"</hl7_stream>"
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+def local_name(tag):
+    """Tag name without its namespace, so urn:hl7-org:v3 documents match plain ones."""
+    return tag.rsplit("}", 1)[-1]
+
+def first_descendants(element):
+    """Maps each local tag name below element to its first occurrence, in one pass."""
+    found = {}
+    for descendant in element.iter():
+        if descendant is not element:
+            found.setdefault(local_name(descendant.tag), descendant)
+    return found
+
+def element_text(element):
+    if element is None or element.text is None:
+        return None
+    return element.text.strip() or None
+
+def document_record(document):
+    """Flattens one ClinicalDocument (CCD) or PRPA_MT201310UV02.Patient into a record."""
+    document_type = local_name(document.tag)
+    document_id = None
+    for child in document:
+        if local_name(child.tag) == "id":
+            document_id = child.get("extension") or element_text(child)
+            break
+
+    # A CCD nests the patient below the document; an HL7 v3 patient message is the patient
+    if document_type == "ClinicalDocument":
+        patient = first_descendants(document).get("patient")
+        fields = first_descendants(patient) if patient is not None else {}
+        patient_id = fields.get("id")
+        patient_id = patient_id.get("extension") or element_text(patient_id) if patient_id is not None else None
+    else:
+        fields = first_descendants(document)
+        patient_id = document_id
+
+    gender = fields.get("administrativeGenderCode")
+    birth_time = fields.get("birthTime")
+    return {
+        "document_type": document_type,
+        "document_id": document_id,
+        "patient_id": patient_id,
+        "family_name": element_text(fields.get("family")),
+        "given_name": element_text(fields.get("given")),
+        "gender": gender.get("code") or element_text(gender) if gender is not None else None,
+        "birth_time": birth_time.get("value") if birth_time is not None else None,
+    }
+
+def iter_document_bytes(file_path, chunk_size=READ_CHUNK_SIZE):
+    """Yields the file as one wrapped byte stream with the per-document XML declarations removed.
+
+    A tag split across two reads is carried over to the next read, so a declaration is
+    always seen whole before it is stripped.
+    """
+    yield STREAM_ROOT
+    carry = b""
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            buffer = carry + chunk
+            open_tag = buffer.rfind(b"<")
+            if open_tag != -1 and buffer.find(b">", open_tag) == -1:
+                buffer, carry = buffer[:open_tag], buffer[open_tag:]
+            else:
+                carry = b""
+            yield XML_DECLARATION.sub(b"", buffer)
+    yield XML_DECLARATION.sub(b"", carry)
+    yield STREAM_ROOT_END
+
+def iter_hl7_records(file_path, chunk_size=READ_CHUNK_SIZE):
+    """Streams flat records out of a concatenated HL7 v3 / CCD XML file.
+
+    Each document is flattened as soon as its closing tag is parsed and then cleared, so
+    memory stays bounded by the largest single document rather than the file size.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    depth = 0
+    stream_root = None
+    for data in iter_document_bytes(file_path, chunk_size):
+        parser.feed(data)
+        for event, element in parser.read_events():
+            if event == "start":
+                if depth == 0:
+                    stream_root = element
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                yield document_record(element)
+                stream_root.clear()
+    parser.close()
+
+def iter_hl7_batches(file_paths, batch_size=10_000):
+    """Yields column-oriented batches ({field: [values]}) ready for pd.DataFrame or pyarrow.table."""
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    batch = {field: [] for field in RECORD_FIELDS}
+    size = 0
+    for file_path in file_paths:
+        for record in iter_hl7_records(file_path):
+            for field in RECORD_FIELDS:
+                batch[field].append(record[field])
+            size += 1
+            if size == batch_size:
+                yield batch
+                batch = {field: [] for field in RECORD_FIELDS}
+                size = 0
+    if size:
+        yield batch
+
+def load_hl7_dataframe(file_paths, batch_size=10_000):
+    """Reads every record into one DataFrame, building it batch by batch."""
+    frames = [pd.DataFrame(batch) for batch in iter_hl7_batches(file_paths, batch_size)]
+    if not frames:
+        return pd.DataFrame(columns=RECORD_FIELDS)
+    return pd.concat(frames, ignore_index=True)
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Read HL7 v3 patient / CCD XML files into one table.")
+    parser.add_argument("file_paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    df = load_hl7_dataframe(args.file_paths)
+    print(f"Read {len(df)} records")
+    print(df.head())
+
+if __name__ == "__main__":
+    cli()
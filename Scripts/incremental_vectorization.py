@@ -0,0 +1,150 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from process_vectorization import N_FEATURES
+from source_cache import file_hash
+
+class IncrementalTfidf:
+    """TF-IDF over a fixed-width hashed vocabulary with a running document-frequency count.
+
+    Hashing keeps the output exactly n_features wide without a fitted vocabulary, so new
+    charge files can be folded in with partial_fit instead of refitting over the whole
+    corpus. IDF uses the same smoothed formula as sklearn's TfidfTransformer.
+    """
+
+    def __init__(self, n_features=N_FEATURES):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.n_features = n_features
+        self.hasher = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, dtype=np.float32
+        )
+        self.n_docs = 0
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        # Count chunks stored under this state; parts numbered past it are leftovers of an interrupted run
+        self.n_parts = 0
+        # Hashes of the files fully vectorized, and the file in progress with the rows it has stored
+        self.sources = []
+        self.current_source = ""
+        self.current_rows = 0
+
+    def count(self, texts):
+        """Hashed term counts, one CSR row per text."""
+        return self.hasher.transform(texts).tocsr()
+
+    def partial_fit(self, texts):
+        """Adds texts to the document frequencies and returns their hashed counts."""
+        counts = self.count(texts)
+        # Each row stores a column at most once, so counting column hits counts documents
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+        return counts
+
+    @property
+    def idf(self):
+        return (np.log((1 + self.n_docs) / (1 + self.document_frequency)) + 1).astype(np.float32)
+
+    def weight(self, counts):
+        """Applies the current IDF and L2 normalization to hashed counts."""
+        from sklearn.preprocessing import normalize
+
+        return normalize(sp.csr_matrix(counts.multiply(self.idf)), norm="l2", copy=False)
+
+    def transform(self, texts):
+        return self.weight(self.count(texts))
+
+    def save(self, path):
+        # Written beside the old state and swapped in, so a crash never leaves a partial file
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, n_features=self.n_features, n_docs=self.n_docs, document_frequency=self.document_frequency,
+                     n_parts=self.n_parts, sources=np.array(self.sources, dtype=str),
+                     current_source=self.current_source, current_rows=self.current_rows)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        state = np.load(path)
+        model = cls(int(state["n_features"]))
+        model.n_docs = int(state["n_docs"])
+        model.document_frequency = state["document_frequency"].astype(np.int64)
+        model.n_parts = int(state["n_parts"]) if "n_parts" in state else None
+        if "sources" in state:
+            model.sources = state["sources"].tolist()
+            model.current_source = str(state["current_source"])
+            model.current_rows = int(state["current_rows"])
+        return model
+
+def part_path(output_dir, part):
+    return os.path.join(output_dir, f"counts-{part:05d}.npz")
+
+# Stored chunks covered by the state; states saved before n_parts was tracked cover every part
+def stored_parts(model, output_dir):
+    if model.n_parts is None:
+        model.n_parts = len(glob.glob(os.path.join(output_dir, "counts-*.npz")))
+    return [part_path(output_dir, part) for part in range(model.n_parts)]
+
+# Stream a dataset in chunks: update document frequencies and store each chunk's hashed counts.
+# Rerunning with the same state and output directory appends the new rows without rehashing old ones.
+# Missing texts are hashed as "" so count rows line up with the CSV rows. The state records each
+# file's hash and is saved after every part with the rows stored so far, so an interrupted run
+# resumes after those rows and a file whose contents were already vectorized is skipped.
+def stream_vectorize(dataset_path, state_path, output_dir, column="description", chunksize=100_000):
+    model = IncrementalTfidf.load(state_path) if os.path.exists(state_path) else IncrementalTfidf()
+    os.makedirs(output_dir, exist_ok=True)
+    stored_parts(model, output_dir)
+    digest = file_hash(dataset_path)
+    if digest in model.sources:
+        print(f"Skipping {dataset_path}: its contents are already vectorized")
+        return model
+    if model.current_source and model.current_source != digest:
+        raise ValueError(f"An interrupted run stored {model.current_rows} rows of another file; "
+                         f"rerun it on that file before adding {dataset_path}")
+    if model.current_source != digest:
+        model.current_source, model.current_rows = digest, 0
+    # Rows the interrupted run already stored are parsed but not counted again; skipping
+    # parsed records rather than lines keeps quoted multi-line descriptions aligned
+    skip = model.current_rows
+    for chunk in pd.read_csv(dataset_path, usecols=[column], chunksize=chunksize):
+        if skip >= len(chunk):
+            skip -= len(chunk)
+            continue
+        chunk, skip = chunk.iloc[skip:], 0
+        counts = model.partial_fit(chunk[column].fillna(""))
+        path = part_path(output_dir, model.n_parts)
+        with open(f"{path}.tmp", "wb") as f:
+            sp.save_npz(f, counts, compressed=False)
+        os.replace(f"{path}.tmp", path)
+        model.n_parts += 1
+        model.current_rows += len(chunk)
+        model.save(state_path)
+    model.sources.append(digest)
+    model.current_source, model.current_rows = "", 0
+    model.save(state_path)
+    return model
+
+# Load every stored chunk weighted by the current IDF, so earlier rows reflect later files too
+def load_tfidf_vectors(state_path, output_dir):
+    model = IncrementalTfidf.load(state_path)
+    parts = stored_parts(model, output_dir)
+    if not parts:
+        return sp.csr_matrix((0, model.n_features), dtype=np.float32)
+    return sp.vstack([model.weight(sp.load_npz(part)) for part in parts], format="csr")
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Incrementally vectorize charge descriptions into 5000 hashed TF-IDF features.")
+    parser.add_argument("dataset_path")
+    parser.add_argument("--state", default="tfidf_state.npz", help="Running document-frequency state")
+    parser.add_argument("--output-dir", default="description_counts", help="Directory of hashed count chunks")
+    parser.add_argument("--column", default="description")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    model = stream_vectorize(args.dataset_path, args.state, args.output_dir, args.column, args.chunksize)
+    print(f"Vectorized {model.n_docs} descriptions into {model.n_features} hashed TF-IDF features")
+
+if __name__ == "__main__":
+    cli()
@@ -1,39 +1,221 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import tracemalloc
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
-import coremltools as ct
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
 
-def load_and_prepare_data(file_path):
-    """Loads dataset and prepares it for ML training."""
+from profiling import peak_rss_mb, reset_peak_rss, sample_tree_rss
+from source_cache import file_hash
+
+# On-disk cache of encoded feature matrices and CV fold splits
+TRAINING_CACHE_DIR = os.environ.get("TRAINING_CACHE_DIR", ".training_cache")
+
+# Bump when encode_features changes so stale matrices are not reused
+MATRIX_CACHE_VERSION = "1"
+
+DEFAULT_PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 20],
+    "min_samples_leaf": [1, 5],
+}
+
+def encode_features(X):
+    """Encodes a feature frame as one C-contiguous float32 matrix.
+
+    Numeric columns are cast to float32 (what the tree builders use internally, so fit
+    makes no copy), and text columns become their category codes instead of object
+    arrays, with -1 for missing values. Returns the matrix and {column: categories}.
+    """
+    matrix = np.empty(X.shape, dtype=np.float32)
+    categories = {}
+    for position, column in enumerate(X.columns):
+        values = X[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            matrix[:, position] = values.to_numpy(dtype=np.float32, na_value=np.nan)
+        else:
+            values = values.astype("category")
+            categories[column] = values.cat.categories.tolist()
+            matrix[:, position] = values.cat.codes.to_numpy()
+    return matrix, categories
+
+def load_matrix(file_path, target="target"):
+    """Reads a training CSV into (float32 features, labels, feature names, categories)."""
     df = pd.read_csv(file_path)
-    X = df.drop(columns=["target"])  # Adjust target column name
-    y = df["target"]
+    X = df.drop(columns=[target])  # Adjust target column name
+    matrix, categories = encode_features(X)
+    return matrix, df[target].to_numpy(), X.columns.tolist(), categories
+
+def cached_matrix(file_path, target="target", cache_dir=None):
+    """load_matrix through an on-disk cache keyed on the file contents.
+
+    The matrix is stored as .npy and memory-mapped on later runs, so repeated searches
+    skip the CSV parse and joblib workers share the pages instead of copying them.
+    """
+    cache_dir = cache_dir or TRAINING_CACHE_DIR
+    key = hashlib.sha256(f"{file_hash(file_path)}|{target}|{MATRIX_CACHE_VERSION}".encode()).hexdigest()[:16]
+    stem = os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}-{key}")
+    if not os.path.exists(f"{stem}.json"):
+        matrix, labels, feature_names, categories = load_matrix(file_path, target)
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(f"{stem}.X.npy", matrix)
+        np.save(f"{stem}.y.npy", labels, allow_pickle=labels.dtype == object)
+        # The metadata file is written last and marks the entry complete
+        with open(f"{stem}.json", "w") as f:
+            json.dump({"feature_names": feature_names, "categories": categories}, f, default=str)
+    with open(f"{stem}.json") as f:
+        metadata = json.load(f)
+    matrix = np.load(f"{stem}.X.npy", mmap_mode="r")
+    labels = np.load(f"{stem}.y.npy", allow_pickle=True)
+    return matrix, labels, metadata["feature_names"], metadata["categories"]
 
+def cached_folds(y, n_splits=5, random_state=42, cache_dir=None):
+    """Stratified CV splits as (train, test) index arrays, saved so every search reuses them."""
+    cache_dir = cache_dir or TRAINING_CACHE_DIR
+    labels = pd.Series(y).astype(str).to_numpy()
+    digest = hashlib.sha256("\x00".join(labels).encode())
+    digest.update(f"|{n_splits}|{random_state}".encode())
+    path = os.path.join(cache_dir, f"folds-{digest.hexdigest()[:16]}.npz")
+    if os.path.exists(path):
+        with np.load(path) as saved:
+            test_folds = saved["test_fold"]
+    else:
+        test_folds = np.empty(len(labels), dtype=np.int32)
+        from sklearn.model_selection import StratifiedKFold
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        for fold, (_, test) in enumerate(splitter.split(np.zeros(len(labels)), labels)):
+            test_folds[test] = fold
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path, test_fold=test_folds)
+    return [(np.flatnonzero(test_folds != fold), np.flatnonzero(test_folds == fold))
+            for fold in range(n_splits)]
+
+def load_and_prepare_data(file_path, target="target", use_cache=True):
+    """Loads dataset and prepares it for ML training."""
+    if use_cache:
+        X, y, _, _ = cached_matrix(file_path, target)
+    else:
+        X, y, _, _ = load_matrix(file_path, target)
+    from sklearn.model_selection import train_test_split
     return train_test_split(X, y, test_size=0.2, random_state=42)
 
-def train_model(X_train, y_train):
-    """Trains a RandomForest classifier model."""
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+def train_model(X_train, y_train, n_estimators=100, n_jobs=-1, **params):
+    """Trains a RandomForest classifier model on all cores."""
+    from sklearn.ensemble import RandomForestClassifier
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs, **params)
     model.fit(X_train, y_train)
     return model
 
-def convert_to_coreml(model):
+def add_trees(model, X_train, y_train, n_more):
+    """Grows a fitted forest by n_more trees with warm_start, keeping the trees it has."""
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_more)
+    model.fit(X_train, y_train)
+    return model
+
+def hyperparameter_search(X, y, param_grid=None, n_splits=5, n_jobs=-1, cache_dir=None):
+    """Cross-validated grid search over RandomForest parameters.
+
+    Candidates and folds are fitted in parallel, each forest on a single core so the
+    workers do not oversubscribe the CPUs. Fold splits come from cached_folds.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import GridSearchCV
+    folds = cached_folds(y, n_splits, cache_dir=cache_dir)
+    search = GridSearchCV(
+        RandomForestClassifier(random_state=42, n_jobs=1),
+        param_grid or DEFAULT_PARAM_GRID,
+        cv=folds,
+        n_jobs=n_jobs,
+    )
+    search.fit(X, y)
+    return search
+
+@contextmanager
+def track_run(name, log_path=None, trace_memory=False, **details):
+    """Times a training step and records its peak memory, appending one JSON line to log_path.
+
+    process_peak_rss_mb is this process's high-water mark during the step
+    (profiling.peak_rss_mb). Parallel fits and searches run in worker processes it cannot
+    see, so tree_peak_rss_mb is the largest sampled RSS of this process plus its workers
+    (profiling.sample_tree_rss), never below the process's own peak. trace_memory adds
+    peak_traced_mb, the largest Python/numpy allocation, but tracemalloc slows every
+    allocation while the step runs, so it is off by default.
+    """
+    run = {"run": name, **details}
+    if trace_memory:
+        tracemalloc.start()
+    reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        with sample_tree_rss() as tree:
+            yield run
+    finally:
+        run["seconds"] = round(time.perf_counter() - start, 3)
+        traced = ""
+        if trace_memory:
+            run["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+            tracemalloc.stop()
+            traced = f", peak traced {run['peak_traced_mb']} MB"
+        process_peak = peak_rss_mb()
+        run["process_peak_rss_mb"] = round(process_peak, 1)
+        workers = ""
+        if tree["peak_mb"] is not None:
+            run["tree_peak_rss_mb"] = round(max(tree["peak_mb"], process_peak), 1)
+            workers = f", {run['tree_peak_rss_mb']} MB with workers"
+        print(f"{name}: {run['seconds']}s{traced}, peak RSS {run['process_peak_rss_mb']} MB in this process{workers}")
+        if log_path:
+            with open(log_path, "a") as f:
+                f.write(json.dumps(run, default=str) + "\n")
+
+def convert_to_coreml(model, output_path="models/ml_model.mlmodel"):
     """Converts trained model to CoreML format for iOS deployment."""
+    # Imported here so training does not require coremltools, which only ships for macOS/Linux x86
+    import coremltools as ct
     coreml_model = ct.converters.sklearn.convert(model)
-    coreml_model.save("models/ml_model.mlmodel")
+    coreml_model.save(output_path)
     print("Model successfully converted to CoreML and saved.")
 
-if __name__ == "__main__":
-    file_path = "data/sample_ml_data.csv"  # Adjust accordingly
-    X_train, X_test, y_train, y_test = load_and_prepare_data(file_path)
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Train the RandomForest model, optionally with a CV search.")
+    parser.add_argument("file_path", nargs="?", default="data/sample_ml_data.csv")  # Adjust accordingly
+    parser.add_argument("--target", default="target")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--add-trees", type=int, default=0, help="grow the forest by this many trees after fitting")
+    parser.add_argument("--search", action="store_true", help="run the cross-validated hyperparameter search")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--run-log", default="training_runs.jsonl", help="JSON lines file of per-run time and memory")
+    parser.add_argument("--trace-memory", action="store_true", help="also record peak traced allocations (slower)")
+    parser.add_argument("--coreml", action="store_true", help="convert the model to Core ML")
+    args = parser.parse_args(argv)
+
+    with track_run("load", args.run_log, args.trace_memory, file_path=args.file_path):
+        X_train, X_test, y_train, y_test = load_and_prepare_data(args.file_path, args.target)
+
+    if args.search:
+        with track_run("search", args.run_log, args.trace_memory, rows=len(y_train)) as run:
+            search = hyperparameter_search(X_train, y_train, n_jobs=args.n_jobs)
+            run["best_params"] = search.best_params_
+            run["best_cv_accuracy"] = round(search.best_score_, 4)
+        model = search.best_estimator_
+    else:
+        with track_run("train", args.run_log, args.trace_memory, rows=len(y_train), n_estimators=args.n_estimators):
+            model = train_model(X_train, y_train, args.n_estimators, n_jobs=args.n_jobs)
 
-    model = train_model(X_train, y_train)
+    if args.add_trees:
+        with track_run("add_trees", args.run_log, args.trace_memory, n_more=args.add_trees):
+            model = add_trees(model, X_train, y_train, args.add_trees)
 
     # Evaluate model
+    from sklearn.metrics import accuracy_score
     y_pred = model.predict(X_test)
     print(f"Model Accuracy: {accuracy_score(y_test, y_pred):.4f}")
 
     # Convert and save CoreML model
-    convert_to_coreml(model)
+    if args.coreml:
+        convert_to_coreml(model)
+
+if __name__ == "__main__":
+    cli()
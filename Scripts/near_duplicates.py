@@ -0,0 +1,287 @@
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# MinHash permutations, split into BANDS LSH bands of NUM_PERM // BANDS rows each
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 4
+
+# Jaccard similarity of byte 4-gram sets above which two descriptions are one item
+THRESHOLD = 0.8
+
+# Pack sizes ("bx5ea", "pk2", "cs12", "10ea") that spellings of one item may differ in,
+# matched in the whitespace-free form
+PACK_PATTERN = r"(?:bx|pk|cs)\d+(?:ea)?|\d+ea"
+
+# DRG severity words; "with" is a stopword that cleaning already removed
+SEVERITY_PATTERN = r"\b(?:without|wo|cc|mcc|ccmcc)\b"
+
+# Shingles hashed per block: NUM_PERM x 8192 uint64 cells (4 MB) stay in cache while
+# they are reduced, several times faster than blocks that spill to memory
+BLOCK_SHINGLES = 1 << 13
+
+# Candidate pairs whose shingle sets are intersected at once
+BLOCK_PAIRS = 1 << 18
+
+def normalize(texts):
+    """Lower-cased texts without whitespace, the form texts are compared in.
+
+    Cleaning strips punctuation, so "BX/5EA" and "BX 5EA" clean to "bx5ea" and "bx 5ea";
+    dropping the spaces makes such spellings exact duplicates.
+    """
+    return pd.Series(texts, dtype=object).fillna("").astype(str).str.lower().str.replace(r"\s+", "", regex=True)
+
+def distinguishing_keys(texts):
+    """Per text, the numbers (pack sizes aside) and CC/MCC severity words that set it apart.
+
+    However similar two texts are, different keys mean different items: "atxn1" and
+    "atxn2", a 5 and a 10 hole plate, 5x10mm and 5x18mm screws, a DRG with CC and with
+    MCC. Numbers are read without whitespace, so "5fr/10cm" and "5fr 10cm" agree; pass
+    texts that still have their spaces, since severity words are matched as words.
+    """
+    texts = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower()
+    numbers = (texts.str.replace(r"\s+", "", regex=True).str.replace(PACK_PATTERN, "", regex=True)
+               .str.findall(r"\d+").str.join(" "))
+    severity = texts.str.findall(SEVERITY_PATTERN).str.join("")
+    return (numbers + "|" + severity).to_numpy(dtype=object)
+
+def shingles(texts, shingle_size=SHINGLE_SIZE):
+    """Byte k-grams of each text packed into uint64 values, and each text's offsets into them.
+
+    With k <= 8 a k-gram is its own integer, so no shingle vocabulary is needed. Texts
+    shorter than k are space-padded to a single k-gram.
+    """
+    if not 1 <= shingle_size <= 8:
+        raise ValueError("shingle_size must be between 1 and 8.")
+    encoded = [text.ljust(shingle_size).encode() for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    counts = lengths - shingle_size + 1
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    # Start of every k-gram in the joined buffer; none crosses into the next text
+    text_starts = np.cumsum(lengths) - lengths
+    positions = np.arange(offsets[-1]) + np.repeat(text_starts - offsets[:-1], counts)
+    values = np.zeros(len(positions), dtype=np.uint64)
+    for j in range(shingle_size):
+        values = (values << np.uint64(8)) | buffer[positions + j]
+    return values, offsets
+
+def mix64(values):
+    """splitmix64 finalizer, spreading packed k-grams over all 64 bits."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def hash_parameters(num_perm=NUM_PERM, seed=42):
+    """Odd multipliers and offsets of the num_perm multiply-shift hash functions."""
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+    offsets = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False)
+    return multipliers, offsets
+
+def shingle_sets(values, offsets):
+    """Binary CSR matrix with one row per text and one column per distinct shingle."""
+    _, columns = np.unique(values, return_inverse=True)
+    sets = sp.csr_matrix((np.ones(len(values), dtype=np.int32), columns.ravel(), offsets),
+                         shape=(len(offsets) - 1, columns.max() + 1 if len(columns) else 0))
+    # A shingle repeated within a text counts once
+    sets.sum_duplicates()
+    sets.data[:] = 1
+    return sets
+
+def minhash_signatures(values, offsets, num_perm=NUM_PERM, seed=42):
+    """(texts, num_perm) uint32 MinHash signatures of shingles(texts), passed as (values, offsets).
+
+    Each hash is the top 32 bits of multiplier * shingle + offset (mod 2**64), and a
+    text's signature is the per-hash minimum over its shingles, taken with
+    np.minimum.reduceat over blocks of whole texts.
+    """
+    multipliers, hash_offsets = hash_parameters(num_perm, seed)
+    values = mix64(values)
+    signatures = np.empty((len(offsets) - 1, num_perm), dtype=np.uint32)
+    start = 0
+    while start < len(signatures):
+        # Whole texts up to BLOCK_SHINGLES shingles, and at least one text
+        stop = max(int(np.searchsorted(offsets, offsets[start] + BLOCK_SHINGLES, side="right")) - 1, start + 1)
+        # Permutations along rows, so each reduceat runs over contiguous shingles
+        block = multipliers[:, None] * values[None, offsets[start]:offsets[stop]]
+        block += hash_offsets[:, None]
+        block >>= np.uint64(32)
+        signatures[start:stop] = np.minimum.reduceat(block, offsets[start:stop] - offsets[start], axis=1).T
+        start = stop
+    return signatures
+
+def band_keys(signatures, bands=BANDS):
+    """(n, bands) uint64 keys, one per band of rows; equal keys make a candidate pair."""
+    if signatures.shape[1] % bands:
+        raise ValueError("bands must divide the number of permutations.")
+    rows = signatures.shape[1] // bands
+    banded = signatures.reshape(len(signatures), bands, rows).astype(np.uint64)
+    keys = np.zeros((len(signatures), bands), dtype=np.uint64)
+    for j in range(rows):
+        keys = keys * np.uint64(0x9E3779B97F4A7C15) + banded[:, :, j]
+    return keys
+
+def candidate_pairs(signatures, bands=BANDS, rank=None):
+    """Unique (i, j) pairs, i > j, of texts that share at least one LSH band.
+
+    Each band is sorted by key and then rank (lowest first, default: index), and every
+    text is paired with the best-ranked text of its run of equal keys, so a band of n
+    texts yields fewer than n pairs however large its buckets are. Those are the pairs
+    star_clusters needs: the best-ranked text of a bucket is the likeliest center.
+    """
+    keys = band_keys(signatures, bands)
+    n = len(signatures)
+    rank = np.arange(n) if rank is None else rank
+    members, firsts = [], []
+    for band in range(bands):
+        order = np.lexsort((rank, keys[:, band]))
+        sorted_keys = keys[order, band]
+        new_run = np.ones(n, dtype=bool)
+        new_run[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        run_start = np.maximum.accumulate(np.where(new_run, np.arange(n), 0))
+        members.append(order[~new_run])
+        firsts.append(order[run_start[~new_run]])
+    members, firsts = np.concatenate(members), np.concatenate(firsts)
+    pairs = np.unique(np.maximum(members, firsts).astype(np.int64) * n + np.minimum(members, firsts))
+    return pairs // n, pairs % n
+
+def similar_pairs(sets, left, right, threshold=THRESHOLD):
+    """Mask of the candidate pairs whose shingle sets have a Jaccard similarity of at least threshold.
+
+    Signatures only estimate the similarity; the exact check keeps pairs just above the
+    threshold that the estimate would put below it, and drops band collisions.
+    """
+    sizes = np.diff(sets.indptr)
+    keep = np.empty(len(left), dtype=bool)
+    for start in range(0, len(left), BLOCK_PAIRS):
+        stop = start + BLOCK_PAIRS
+        shared = np.asarray(sets[left[start:stop]].multiply(sets[right[start:stop]]).sum(axis=1)).ravel()
+        keep[start:stop] = shared >= threshold * (sizes[left[start:stop]] + sizes[right[start:stop]] - shared)
+    return keep
+
+def star_clusters(n, left, right, rank):
+    """Center of each of n nodes after greedy star clustering of the edges (left, right).
+
+    Nodes are visited best rank (lowest) first; an unassigned node becomes a center and
+    takes every unassigned neighbour, so a cluster never reaches beyond one edge from its
+    center and chains of small edits (6FR ~ 5FR ~ 5FR 150CM ...) do not merge distinct
+    items. Rounds of local rank minima pick the same centers as the sequential pass; every
+    other node then joins its best-ranked adjacent center, the first one that pass reaches.
+    """
+    source, target = np.concatenate([left, right]), np.concatenate([right, left])
+    is_center = np.zeros(n, dtype=bool)
+    open_nodes = np.ones(n, dtype=bool)
+    while open_nodes.any():
+        # An open node whose rank beats all its open neighbours' is a center
+        edges = open_nodes[source] & open_nodes[target]
+        best_neighbour = np.full(n, n, dtype=np.int64)
+        np.minimum.at(best_neighbour, source[edges], rank[target[edges]])
+        new_centers = open_nodes & (rank < best_neighbour)
+        is_center |= new_centers
+        open_nodes &= ~new_centers
+        # Their neighbours are taken by some center and can no longer become one
+        open_nodes[source[new_centers[target]]] = False
+    edges = is_center[target] & ~is_center[source]
+    best_center = np.full(n, n, dtype=np.int64)
+    np.minimum.at(best_center, source[edges], rank[target[edges]])
+    centers = np.arange(n)
+    members = ~is_center
+    centers[members] = np.argsort(rank)[best_center[members]]
+    return centers
+
+def cluster_texts(texts, weights=None, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS,
+                  shingle_size=SHINGLE_SIZE, seed=42, keys=None):
+    """(labels, centers): each distinct text's cluster, and the text at the center of each cluster.
+
+    Pairs that share an LSH band of their MinHash signatures, whose shingle sets have a
+    Jaccard similarity of at least threshold and whose keys (default:
+    distinguishing_keys(texts)) are equal are near duplicates, so the cost grows with
+    the number of texts and candidate pairs rather than with all pairs. The heaviest
+    texts (by weights, then first appearance) become centers; labels are numbered in
+    order of first appearance.
+    """
+    values, offsets = shingles(texts, shingle_size)
+    n = len(offsets) - 1
+    weights = np.ones(n) if weights is None else np.asarray(weights)
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), -weights))] = np.arange(n)
+    left, right = candidate_pairs(minhash_signatures(values, offsets, num_perm, seed), bands, rank)
+    keep = similar_pairs(shingle_sets(values, offsets), left, right, threshold)
+    key_codes, _ = pd.factorize(distinguishing_keys(texts) if keys is None else keys)
+    keep &= key_codes[left] == key_codes[right]
+    labels, centers = pd.factorize(star_clusters(n, left[keep], right[keep], rank))
+    return labels, centers
+
+def collapse_near_duplicates(df, column="description_clean", id_column="canonical_id", threshold=THRESHOLD,
+                             num_perm=NUM_PERM, bands=BANDS, shingle_size=SHINGLE_SIZE, seed=42):
+    """Adds id_column, the near-duplicate cluster of each row's column, and returns (df, cluster_map).
+
+    Signatures are computed once per distinct normalized text, after exact duplicates
+    are factorized away. cluster_map has one row per distinct text with its cluster id,
+    row count and the cluster's canonical text: the center of the cluster, the most
+    frequent text no more frequent one had already claimed. Per-item work (vectorizing,
+    embedding, training) can run on canonical_texts(cluster_map) and fan back out to
+    rows with df[id_column].
+    """
+    codes, uniques = pd.factorize(df[column].fillna("").astype(str))
+    uniques = np.asarray(uniques, dtype=object)
+    # Spellings that only differ in case or spacing are exact duplicates once normalized
+    normalized_codes, normalized = pd.factorize(normalize(uniques))
+    rows = np.bincount(codes, minlength=len(uniques))
+    # A normalized text is shown, and keyed, in its most frequent spelling
+    spellings = np.lexsort((np.arange(len(uniques)), -rows, normalized_codes))
+    first = np.ones(len(spellings), dtype=bool)
+    first[1:] = normalized_codes[spellings[1:]] != normalized_codes[spellings[:-1]]
+    spelling = uniques[spellings[first]]
+    labels, centers = cluster_texts(list(normalized), np.bincount(normalized_codes, rows), threshold,
+                                    num_perm, bands, shingle_size, seed, distinguishing_keys(spelling))
+
+    labels = labels[normalized_codes]
+    df[id_column] = labels[codes]
+    cluster_map = pd.DataFrame({
+        id_column: labels,
+        column: uniques,
+        "canonical": spelling[centers][labels],
+        "rows": rows,
+    }).sort_values([id_column, "rows"], ascending=[True, False], kind="stable", ignore_index=True)
+    return df, cluster_map
+
+def canonical_texts(cluster_map, id_column="canonical_id"):
+    """Canonical text of every cluster, indexed by cluster id."""
+    first = cluster_map.drop_duplicates(id_column)
+    texts = np.empty(int(cluster_map[id_column].max()) + 1 if len(cluster_map) else 0, dtype=object)
+    texts[first[id_column].to_numpy()] = first["canonical"].to_numpy(dtype=object)
+    return texts
+
+def summarize(cluster_map, id_column="canonical_id"):
+    """Rows, distinct texts and clusters, and how many rows each cluster stands for."""
+    rows = int(cluster_map["rows"].sum())
+    clusters = int(cluster_map[id_column].nunique())
+    return {
+        "rows": rows,
+        "distinct_texts": len(cluster_map),
+        "clusters": clusters,
+        "reduction": round(rows / clusters, 2) if clusters else 0.0,
+        "near_duplicate_reduction": round(len(cluster_map) / clusters, 3) if clusters else 0.0,
+    }
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Cluster near-duplicate descriptions of a charges CSV.")
+    parser.add_argument("input", help="charges CSV")
+    parser.add_argument("output", help="CSV of the input rows with a canonical_id column")
+    parser.add_argument("cluster_map", help="CSV of distinct descriptions with their cluster and canonical text")
+    parser.add_argument("--column", default="description_clean")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    df, cluster_map = collapse_near_duplicates(pd.read_csv(args.input), args.column, threshold=args.threshold)
+    df.to_csv(args.output, index=False)
+    cluster_map.to_csv(args.cluster_map, index=False)
+    print(summarize(cluster_map))
+
+if __name__ == "__main__":
+    cli()
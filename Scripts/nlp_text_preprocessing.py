@@ -1,51 +1,151 @@
-import nltk
-import spacy
+import re
 import string
+import argparse
+import functools
+import numpy as np
 import pandas as pd
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
-from sklearn.feature_extraction.text import TfidfVectorizer
+from concurrent.futures import ProcessPoolExecutor
 
-# Download required NLTK datasets
-nltk.download("punkt")
-nltk.download("stopwords")
+# Translation table that strips ASCII punctuation, built once at import
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
 
-# Load Spacy model for advanced NLP tasks
-nlp = spacy.load("en_core_web_sm")
+# Any character left that is neither a word character nor whitespace needs the full NLTK tokenizer
+NEEDS_FULL_TOKENIZER = re.compile(r"[^\w\s]")
+
+# NLTK resources the preprocessor needs, downloaded on first use only if missing
+NLTK_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+}
+
+DEFAULT_STEM_CACHE_SIZE = 100_000
+
+def ensure_nltk_resource(name):
+    """Downloads an NLTK resource the first time it is needed."""
+    import nltk
+
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+    except LookupError:
+        nltk.download(name, quiet=True)
+
+@functools.lru_cache(maxsize=None)
+def get_stop_words(language="english"):
+    """Loads the NLTK stopword set once per process."""
+    ensure_nltk_resource("stopwords")
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words(language))
+
+@functools.lru_cache(maxsize=None)
+def get_spacy_model(name="en_core_web_sm"):
+    """Loads a spaCy pipeline on first use for advanced NLP tasks."""
+    import spacy
+
+    return spacy.load(name)
 
 def clean_text(text):
     """Removes punctuation and converts text to lowercase."""
-    text = text.lower()
-    text = text.translate(str.maketrans("", "", string.punctuation))
-    return text
+    return text.lower().translate(PUNCTUATION_TABLE)
+
+class TextPreprocessor:
+    """Tokenizes, removes stopwords and stems text, caching per-token results.
+
+    Charge descriptions reuse a small vocabulary, so each distinct token is tokenized and
+    stemmed once and kept in a bounded LRU cache; batches are deduplicated before processing.
+    """
+
+    def __init__(self, language="english", stem_cache_size=DEFAULT_STEM_CACHE_SIZE):
+        from nltk.stem import PorterStemmer
+        from nltk.tokenize import NLTKWordTokenizer
+
+        self.language = language
+        self.stop_words = get_stop_words(language)
+        self.stemmer = PorterStemmer()
+        self.word_tokenizer = NLTKWordTokenizer()
+        self.process_token = functools.lru_cache(maxsize=stem_cache_size)(self._process_token)
+
+    def _process_token(self, token):
+        # A whitespace-free, punctuation-free token can still split (e.g. "cannot"), so run
+        # the same Treebank rules word_tokenize applies and stem what survives the stopwords
+        return tuple(
+            self.stemmer.stem(word) for word in self.word_tokenizer.tokenize(token)
+            if word not in self.stop_words
+        )
+
+    def preprocess(self, text):
+        """Tokenizes, removes stopwords, and stems words in text."""
+        if NEEDS_FULL_TOKENIZER.search(text):
+            ensure_nltk_resource("punkt_tab")
+            from nltk.tokenize import word_tokenize
+
+            tokens = word_tokenize(text, language=self.language)
+            return " ".join(self.stemmer.stem(word) for word in tokens if word not in self.stop_words)
+        # Without punctuation word_tokenize sees a single sentence, so tokens are independent
+        return " ".join(word for token in text.split() for word in self.process_token(token))
+
+    def clean_and_preprocess(self, text):
+        return self.preprocess(clean_text(text))
+
+    def preprocess_batch(self, texts, clean=True, n_jobs=1, chunk_size=10_000):
+        """Processes a whole Series of texts, each distinct value once.
+
+        Missing values map to an empty string. With n_jobs > 1 the distinct texts are split
+        into chunks and processed across a process pool.
+        """
+        texts = pd.Series(texts)
+        codes, uniques = pd.factorize(texts)
+        uniques = list(uniques)
+        if n_jobs > 1 and len(uniques) > chunk_size:
+            chunks = [uniques[i:i + chunk_size] for i in range(0, len(uniques), chunk_size)]
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                results = [
+                    text for chunk in pool.map(_preprocess_chunk, chunks, [clean] * len(chunks),
+                                               [self.language] * len(chunks))
+                    for text in chunk
+                ]
+        else:
+            process = self.clean_and_preprocess if clean else self.preprocess
+            results = [process(text) for text in uniques]
+        processed = np.array(results + [""], dtype=object)
+        return pd.Series(processed[codes], index=texts.index, name=texts.name)
+
+@functools.lru_cache(maxsize=None)
+def get_preprocessor(language="english"):
+    """Shared preprocessor per process, reused by preprocess_text and pool workers."""
+    return TextPreprocessor(language)
+
+def _preprocess_chunk(texts, clean, language):
+    preprocessor = get_preprocessor(language)
+    process = preprocessor.clean_and_preprocess if clean else preprocessor.preprocess
+    return [process(text) for text in texts]
 
 def preprocess_text(text):
     """Tokenizes, removes stopwords, and stems words in text."""
-    stop_words = set(stopwords.words("english"))
-    stemmer = PorterStemmer()
-    
-    tokens = word_tokenize(text)
-    tokens = [stemmer.stem(word) for word in tokens if word not in stop_words]
-    return " ".join(tokens)
+    return get_preprocessor().preprocess(text)
 
 def generate_embeddings(text_series):
     """Converts text data into TF-IDF vector embeddings."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     vectorizer = TfidfVectorizer(max_features=1000)
     embeddings = vectorizer.fit_transform(text_series)
     return embeddings
 
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Add a cleaned, stopword-free, stemmed text column to a CSV.")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--column", default="description")
+    parser.add_argument("--output-column", default="description_clean")
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.input_path, low_memory=False)
+    df[args.output_column] = get_preprocessor().preprocess_batch(df[args.column].fillna(""), n_jobs=args.n_jobs)
+    df.to_csv(args.output_path, index=False)
+    print(f"Preprocessed {len(df)} rows into {args.output_path}")
+    print(df[[args.column, args.output_column]].head())
+
 if __name__ == "__main__":
-    # Sample dataset
-    df = pd.DataFrame({"text": ["Natural Language Processing is amazing!", 
-                                "AI and ML are revolutionizing technology.", 
-                                "Text analytics is an exciting field."]})
-
-    # Preprocess text column
-    df["cleaned_text"] = df["text"].apply(clean_text).apply(preprocess_text)
-    
-    # Generate embeddings
-    text_embeddings = generate_embeddings(df["cleaned_text"])
-
-    print("Text preprocessing complete. Sample output:")
-    print(df.head())
+    cli()
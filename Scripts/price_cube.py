@@ -0,0 +1,283 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from source_cache import file_hash, load_source
+
+# Cube dimensions and the price columns aggregated in every cell
+DIMENSIONS = ["payer_name", "plan_name", "code|1", "setting"]
+PRICE_COLUMNS = [
+    "standard_charge|gross",
+    "standard_charge|discounted_cash",
+    "standard_charge|negotiated_dollar",
+    "standard_charge|min",
+    "standard_charge|max",
+    "pricing|discounted",
+    "pricing|gross",
+]
+CHARGE_COLUMNS = DIMENSIONS + ["code|1|type"] + PRICE_COLUMNS
+
+# Prices that also get a percentile sketch
+SKETCH_COLUMNS = ["standard_charge|gross", "standard_charge|negotiated_dollar"]
+
+# Log-spaced sketch bins from 1 cent to $100M, 1% apart; a percentile read from a bin is
+# within about 0.5% of the exact value
+SKETCH_EDGES = np.geomspace(0.01, 1e8, int(np.log(1e10) / np.log(1.01)) + 1)
+SKETCH_VALUES = np.concatenate([[0.0], np.sqrt(SKETCH_EDGES[:-1] * SKETCH_EDGES[1:]), [SKETCH_EDGES[-1]]])
+N_SKETCH_BINS = len(SKETCH_VALUES)
+
+STAT_FIELDS = ["count", "sum", "min", "max"]
+
+def parse_charges(file_path):
+    """Charge table with dictionary-encoded dimensions and float32 prices."""
+    header = pd.read_csv(file_path, nrows=0).columns
+    columns = [column for column in CHARGE_COLUMNS if column in header]
+    dtypes = {column: "category" for column in DIMENSIONS + ["code|1|type"]}
+    dtypes.update({column: "float32" for column in PRICE_COLUMNS})
+    return pd.read_csv(file_path, usecols=columns, dtype={column: dtypes[column] for column in columns})
+
+def load_charges(file_path, use_cache=True):
+    """parse_charges through the Feather source cache, which keeps the categorical columns."""
+    return load_source(file_path, "charges", parse_charges, use_cache=use_cache)
+
+def sketch_percentiles(keys, counts, percentiles):
+    """Percentiles per group from sorted (group * N_SKETCH_BINS + bin) keys and their counts.
+
+    Returns (groups, values) with values shaped (len(groups), len(percentiles)).
+    """
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(percentiles)))
+    groups = keys // N_SKETCH_BINS
+    bins = keys % N_SKETCH_BINS
+    cumulative = np.cumsum(counts)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    before = np.r_[0, cumulative[:-1]][starts]
+    totals = cumulative[ends - 1] - before
+    values = np.empty((len(starts), len(percentiles)))
+    for column, percentile in enumerate(percentiles):
+        rank = np.maximum(np.ceil(percentile / 100 * totals), 1)
+        positions = np.searchsorted(cumulative, before + rank, side="left")
+        values[:, column] = SKETCH_VALUES[bins[positions]]
+    return groups[starts], values
+
+class PriceCube:
+    """Pre-aggregated prices by payer x plan x code x setting, updated file by file.
+
+    Each cell holds count/sum/min/max per price column and, for the SKETCH_COLUMNS, a
+    sparse log-binned histogram from which medians and other percentiles are read.
+    Dimension values are dictionary-encoded once for the whole cube, so queries filter
+    integer code arrays and never touch the charge rows.
+    """
+
+    def __init__(self, dictionaries=None, cells=None, stats=None, sketch_keys=None, sketch_counts=None,
+                 sources=None):
+        self.dictionaries = dictionaries or {dimension: [] for dimension in DIMENSIONS}
+        self.cells = cells if cells is not None else np.zeros((0, len(DIMENSIONS)), dtype=np.int32)
+        self.stats = stats if stats is not None else {
+            (column, field): np.zeros(0, dtype=np.float64) for column in PRICE_COLUMNS for field in STAT_FIELDS
+        }
+        # Sketch entries keyed by (cell * len(SKETCH_COLUMNS) + measure) * N_SKETCH_BINS + bin, sorted
+        self.sketch_keys = sketch_keys if sketch_keys is not None else np.zeros(0, dtype=np.int64)
+        self.sketch_counts = sketch_counts if sketch_counts is not None else np.zeros(0, dtype=np.int64)
+        self.sources = sources or {}
+        self.lookups = {dimension: {value: code for code, value in enumerate(values)}
+                        for dimension, values in self.dictionaries.items()}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def encode(self, values, dimension):
+        """Codes of a column's values in the cube dictionary, adding unseen values."""
+        lookup = self.lookups[dimension]
+        codes, uniques = pd.factorize(pd.Series(values))
+        # Missing values (code -1) share the "" entry, which sits last in the mapping
+        mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+        for position, value in enumerate(list(uniques) + [""]):
+            value = str(value)
+            if value not in lookup:
+                lookup[value] = len(self.dictionaries[dimension])
+                self.dictionaries[dimension].append(value)
+            mapping[position] = lookup[value]
+        return mapping[codes]
+
+    def aggregate(self, df):
+        """Partial cube of one charge table: (cell codes, stats, sketch keys, sketch counts)."""
+        codes = pd.DataFrame({dimension: self.encode(df[dimension], dimension) for dimension in DIMENSIONS})
+        cell = codes.groupby(DIMENSIONS, sort=False).ngroup().to_numpy()
+        n_cells = int(cell.max()) + 1 if len(cell) else 0
+        cells = np.empty((n_cells, len(DIMENSIONS)), dtype=np.int32)
+        cells[cell] = codes.to_numpy()
+
+        prices = pd.DataFrame({column: df[column] if column in df.columns else np.nan for column in PRICE_COLUMNS},
+                              index=df.index).astype("float32")
+        grouped = prices.groupby(cell).agg(STAT_FIELDS).reindex(range(n_cells))
+        stats = {(column, field): grouped[(column, field)].to_numpy(dtype=np.float64)
+                 for column in PRICE_COLUMNS for field in STAT_FIELDS}
+        for column in PRICE_COLUMNS:
+            stats[(column, "count")] = np.nan_to_num(stats[(column, "count")])
+            stats[(column, "sum")] = np.nan_to_num(stats[(column, "sum")])
+
+        keys = []
+        for measure, column in enumerate(SKETCH_COLUMNS):
+            values = prices[column].to_numpy()
+            valid = ~np.isnan(values)
+            bins = np.searchsorted(SKETCH_EDGES, values[valid], side="right")
+            keys.append((cell[valid].astype(np.int64) * len(SKETCH_COLUMNS) + measure) * N_SKETCH_BINS + bins)
+        sketch_keys, sketch_counts = np.unique(np.concatenate(keys), return_counts=True)
+        return cells, stats, sketch_keys, sketch_counts.astype(np.int64)
+
+    def merge(self, cells, stats, sketch_keys, sketch_counts):
+        """Folds a partial cube into this one; cells with the same dimension codes combine."""
+        n_old = len(self.cells)
+        combined = pd.DataFrame(np.vstack([self.cells, cells]), columns=DIMENSIONS)
+        new_cell = combined.groupby(DIMENSIONS, sort=False).ngroup().to_numpy()
+        n_cells = int(new_cell.max()) + 1 if len(new_cell) else 0
+
+        merged_cells = np.empty((n_cells, len(DIMENSIONS)), dtype=np.int32)
+        merged_cells[new_cell] = combined.to_numpy()
+        merged_stats = {}
+        for column in PRICE_COLUMNS:
+            for field in ["count", "sum"]:
+                values = np.concatenate([self.stats[(column, field)], stats[(column, field)]])
+                merged_stats[(column, field)] = np.bincount(new_cell, weights=values, minlength=n_cells)
+            for field, reduce in [("min", np.fmin), ("max", np.fmax)]:
+                merged = np.full(n_cells, np.nan)
+                reduce.at(merged, new_cell, np.concatenate([self.stats[(column, field)], stats[(column, field)]]))
+                merged_stats[(column, field)] = merged
+
+        # Re-key sketch entries to the merged cell numbers, then sum entries sharing a key
+        cell_and_measure = N_SKETCH_BINS * len(SKETCH_COLUMNS)
+        old_cells, rest = np.divmod(self.sketch_keys, cell_and_measure)
+        new_cells, new_rest = np.divmod(sketch_keys, cell_and_measure)
+        keys = np.concatenate([new_cell[:n_old][old_cells] * cell_and_measure + rest,
+                               new_cell[n_old:][new_cells] * cell_and_measure + new_rest])
+        counts = np.concatenate([self.sketch_counts, sketch_counts])
+        merged_keys, inverse = np.unique(keys, return_inverse=True)
+
+        self.cells = merged_cells
+        self.stats = merged_stats
+        self.sketch_keys = merged_keys
+        self.sketch_counts = np.bincount(inverse, weights=counts).astype(np.int64)
+
+    def update(self, df, chunk_rows=1_000_000):
+        """Adds charge rows to the cube, aggregating them chunk by chunk in one pass."""
+        for start in range(0, len(df), chunk_rows):
+            self.merge(*self.aggregate(df.iloc[start:start + chunk_rows]))
+        return self
+
+    def add_file(self, file_path, use_cache=True):
+        """Adds a hospital charge file; a file whose contents were already added is skipped."""
+        digest = file_hash(file_path)
+        if digest in self.sources:
+            return False
+        self.update(load_charges(file_path, use_cache))
+        self.sources[digest] = os.path.basename(file_path)
+        return True
+
+    def cell_mask(self, filters):
+        """Cells matching {dimension: value or list of values}."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dimension, values in filters.items():
+            if values is None:
+                continue
+            values = [values] if isinstance(values, str) else values
+            codes = [self.lookups[dimension][value] for value in values if value in self.lookups[dimension]]
+            mask &= np.isin(self.cells[:, DIMENSIONS.index(dimension)], codes)
+        return mask
+
+    def summary(self, measure="standard_charge|negotiated_dollar", by=None, percentiles=(50,), **filters):
+        """count/min/max/mean (and sketch percentiles) of one price column per group of cells.
+
+        by lists the dimensions to group on (none for a single total); filters select
+        dimension values, e.g. summary(by=["plan_name"], payer_name="AETNA [1001]").
+        Filter and group arguments use the column names, so pass them as **{"code|1": ...}.
+        """
+        by = by or []
+        mask = self.cell_mask(filters)
+        selected = np.flatnonzero(mask)
+        group_codes = self.cells[selected][:, [DIMENSIONS.index(dimension) for dimension in by]]
+        if by:
+            groups, group_of_cell = np.unique(group_codes, axis=0, return_inverse=True)
+            group_of_cell = group_of_cell.ravel()
+        else:
+            groups, group_of_cell = np.zeros((1, 0), dtype=np.int32), np.zeros(len(selected), dtype=np.int64)
+        n_groups = len(groups)
+
+        count = np.bincount(group_of_cell, weights=self.stats[(measure, "count")][selected], minlength=n_groups)
+        total = np.bincount(group_of_cell, weights=self.stats[(measure, "sum")][selected], minlength=n_groups)
+        minimum = np.full(n_groups, np.nan)
+        maximum = np.full(n_groups, np.nan)
+        np.fmin.at(minimum, group_of_cell, self.stats[(measure, "min")][selected])
+        np.fmax.at(maximum, group_of_cell, self.stats[(measure, "max")][selected])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = pd.DataFrame({"count": count.astype(np.int64), "mean": total / count,
+                                   "min": minimum, "max": maximum})
+        for position, dimension in enumerate(by):
+            names = np.asarray(self.dictionaries[dimension], dtype=object)
+            result.insert(position, dimension, names[groups[:, position]])
+
+        if measure in SKETCH_COLUMNS and percentiles:
+            cell_and_measure = N_SKETCH_BINS * len(SKETCH_COLUMNS)
+            cells, rest = np.divmod(self.sketch_keys, cell_and_measure)
+            measures, bins = np.divmod(rest, N_SKETCH_BINS)
+            entry_group = np.full(len(self.cells), -1, dtype=np.int64)
+            entry_group[selected] = group_of_cell
+            entry_group = entry_group[cells]
+            keep = (entry_group >= 0) & (measures == SKETCH_COLUMNS.index(measure))
+            keys = entry_group[keep] * N_SKETCH_BINS + bins[keep]
+            order = np.argsort(keys, kind="stable")
+            sketched_groups, values = sketch_percentiles(keys[order], self.sketch_counts[keep][order], percentiles)
+            # Bin midpoints can fall outside the prices seen, and the bin below the first edge
+            # (zero, or a float32 $0.01) reads back as 0, so clamp to the group's min and max
+            values = np.clip(values, minimum[sketched_groups, None], maximum[sketched_groups, None])
+            for column, percentile in enumerate(percentiles):
+                result[f"p{percentile}"] = np.nan
+                result.loc[sketched_groups, f"p{percentile}"] = values[:, column]
+        return result
+
+    def save(self, path):
+        """Writes the cube as .npy arrays plus a JSON file of dictionaries and sources."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "cells.npy"), self.cells)
+        np.save(os.path.join(path, "sketch_keys.npy"), self.sketch_keys)
+        np.save(os.path.join(path, "sketch_counts.npy"), self.sketch_counts)
+        np.savez(os.path.join(path, "stats.npz"),
+                 **{f"{column}::{field}": values for (column, field), values in self.stats.items()})
+        with open(os.path.join(path, "cube.json"), "w") as f:
+            json.dump({"dictionaries": self.dictionaries, "sources": self.sources}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "cube.json")) as f:
+            meta = json.load(f)
+        with np.load(os.path.join(path, "stats.npz")) as saved:
+            stats = {tuple(name.split("::")): saved[name] for name in saved.files}
+        return cls(
+            meta["dictionaries"],
+            np.load(os.path.join(path, "cells.npy"), mmap_mode="r"),
+            stats,
+            np.load(os.path.join(path, "sketch_keys.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "sketch_counts.npy"), mmap_mode="r"),
+            meta["sources"],
+        )
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build or update the price cube, then summarize it.")
+    parser.add_argument("cube_path")
+    parser.add_argument("file_paths", nargs="*", help="hospital charge CSVs to add")
+    parser.add_argument("--measure", default="standard_charge|negotiated_dollar")
+    parser.add_argument("--by", nargs="*", default=["payer_name"])
+    args = parser.parse_args(argv)
+
+    cube = PriceCube.load(args.cube_path) if os.path.exists(os.path.join(args.cube_path, "cube.json")) else PriceCube()
+    added = [file_path for file_path in args.file_paths if cube.add_file(file_path)]
+    if added:
+        cube.save(args.cube_path)
+    print(f"Added {len(added)} file(s); cube has {len(cube)} cells from {len(cube.sources)} file(s)")
+    print(cube.summary(args.measure, by=args.by, percentiles=(50, 90)).to_string())
+
+if __name__ == "__main__":
+    cli()
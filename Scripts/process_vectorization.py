@@ -1,60 +1,176 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
 import pandas as pd
 import numpy as np
+import argparse
 import pickle
+import functools
+import os
 
-# Load dataset
-dataset_path = "healthcare_dataset.csv"
-df = pd.read_csv(dataset_path)
+from code_reference import CodeReference
+from embedding_cache import EmbeddingCache, vectorizer_version
+from near_duplicates import canonical_texts, collapse_near_duplicates, summarize
+
+# Core ML model input width
+N_FEATURES = 5000
+
+# Valid code mappings for the sample dataset
+CODES_ICD10 = ["J20.9", "I10", "E11.9", "R07.2", "R10.9", "Q87.19", "E78.6"]
+CODES_HCPCS = ["J1335", "A0428", "A9273", "J1100", "J2505", "J3301", "J0585"]
+CODES_NDC = ["44567082010", "12345678901", "23456789012", "34567890123"]
+CODES_DRG = ["001-1", "002-2", "003-3", "004-4"]
+CODES_CPT = ["81403", "70450", "99213", "96372"]
+
+# Code reference over the sample code lists, built once per process
+@functools.lru_cache(maxsize=1)
+def sample_code_reference():
+    return CodeReference.from_lists(icd10=CODES_ICD10, hcpcs=CODES_HCPCS, ndc=CODES_NDC,
+                                    drg=CODES_DRG, cpt=CODES_CPT)
 
 # Data Preprocessing
-def preprocess_and_validate(df):
+def preprocess_and_validate(df, reference=None):
     # Drop duplicates and null values
     df.drop_duplicates(inplace=True)
     df.dropna(inplace=True)
-    
-    # Define valid code mappings
-    codes_icd10 = ["J20.9", "I10", "E11.9", "R07.2", "R10.9", "Q87.19", "E78.6"]
-    codes_hcpcs = ["J1335", "A0428", "A9273", "J1100", "J2505", "J3301", "J0585"]
-    codes_ndc = ["44567082010", "12345678901", "23456789012", "34567890123"]
-    codes_drg = ["001-1", "002-2", "003-3", "004-4"]
-    codes_cpt = ["81403", "70450", "99213", "96372"]
-    valid_codes = codes_icd10 + codes_hcpcs + codes_ndc + codes_drg + codes_cpt
-
-    # Validate code mappings
-    if not all(df["code|1"].isin(valid_codes)):
+
+    # Validate code mappings against a loaded code reference snapshot, or the sample codes
+    reference = reference or sample_code_reference()
+    if not reference.validate(df["code|1"]).all():
         raise ValueError("Invalid codes found in dataset.")
-    
+
     return df
 
-# Apply preprocessing and validation
-df = preprocess_and_validate(df)
+# Widen a CSR matrix to n_features columns without copying its data
+def widen(vectors, n_features=N_FEATURES):
+    # A small vocabulary yields fewer than n_features columns; widen the shape instead of
+    # copying into a zero-padded dense array, since the extra columns are all zeros anyway
+    if vectors.shape[1] < n_features:
+        vectors = sp.csr_matrix((vectors.data, vectors.indices, vectors.indptr), shape=(vectors.shape[0], n_features))
+    return vectors
+
+def new_vectorizer(n_features=N_FEATURES):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(max_features=n_features, dtype=np.float32)  # Ensure max_features matches Core ML input
+
+# Vectorize descriptions into a float32 CSR matrix that is always N_FEATURES wide. A fitted
+# vectorizer is reused as-is; with an EmbeddingCache, only descriptions the cache has not
+# seen under this fit are transformed
+def vectorize_descriptions(descriptions, n_features=N_FEATURES, cache=None, vectorizer=None):
+    if vectorizer is None and cache is None:
+        vectorizer = new_vectorizer(n_features)
+        vectors = vectorizer.fit_transform(descriptions).tocsr()
+    else:
+        if vectorizer is None:
+            vectorizer = new_vectorizer(n_features).fit(descriptions)
+        if cache is None:
+            vectors = vectorizer.transform(descriptions).tocsr()
+        else:
+            vectors = cache.embed(descriptions, lambda texts: widen(vectorizer.transform(texts).tocsr(), n_features),
+                                  vectorizer_version(vectorizer))
+
+    # Fix vectorizer output dimension mismatch
+    vectors = widen(vectors, n_features)
+
+    # Confirm the array shape matches the Core ML model requirements
+    assert vectors.shape[1] == n_features, "Vectorizer output dimension mismatch."
+    return vectorizer, vectors
+
+# Vectorize each near-duplicate cluster's canonical text once and fan the vectors back out
+# to rows by canonical id; the vectorizer is fitted on the canonical texts
+def vectorize_clusters(canonical_ids, cluster_texts, n_features=N_FEATURES, cache=None, vectorizer=None):
+    vectorizer, cluster_vectors = vectorize_descriptions(pd.Series(cluster_texts, dtype=object), n_features,
+                                                         cache, vectorizer)
+    return vectorizer, cluster_vectors[np.asarray(canonical_ids)]
+
+# Save a CSR matrix: a .npz path uses scipy.sparse.save_npz, any other path becomes a
+# directory of raw .npy arrays that load_vectors can memory-map
+def save_vectors(vectors, path):
+    if path.endswith(".npz"):
+        sp.save_npz(path, vectors, compressed=False)
+        return
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "data.npy"), vectors.data)
+    np.save(os.path.join(path, "indices.npy"), vectors.indices)
+    np.save(os.path.join(path, "indptr.npy"), vectors.indptr)
+    np.save(os.path.join(path, "shape.npy"), np.array(vectors.shape, dtype=np.int64))
+
+# Load vectors written by save_vectors; directory format arrays are memory-mapped read-only
+def load_vectors(path, mmap=True):
+    if path.endswith(".npz"):
+        return sp.load_npz(path)
+    mmap_mode = "r" if mmap else None
+    data = np.load(os.path.join(path, "data.npy"), mmap_mode=mmap_mode)
+    indices = np.load(os.path.join(path, "indices.npy"), mmap_mode=mmap_mode)
+    indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode=mmap_mode)
+    shape = tuple(np.load(os.path.join(path, "shape.npy")))
+    return sp.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+# Yield fixed-width dense float32 batches for consumers that need N_FEATURES-wide input
+def iter_dense_batches(vectors, batch_size=1024, dtype=np.float32):
+    for start in range(0, vectors.shape[0], batch_size):
+        yield vectors[start:start + batch_size].toarray().astype(dtype, copy=False)
+
+def main(dataset_path="healthcare_dataset.csv", vectorizer_path="vectorizer_new.pkl",
+         description_vectors_path="description_vectors.npz", code_snapshot_path=None,
+         embedding_cache_dir=None, reuse_vectorizer=False, near_duplicate_threshold=None,
+         cluster_map_path="description_clusters.csv"):
+    # Load dataset
+    df = pd.read_csv(dataset_path)
+
+    # Apply preprocessing and validation, against the full code systems when a snapshot is given
+    reference = CodeReference.load(code_snapshot_path) if code_snapshot_path else None
+    df = preprocess_and_validate(df, reference)
+
+    # Keep the previous fit when asked, so cached vectors from earlier runs stay valid
+    vectorizer = None
+    if reuse_vectorizer and os.path.exists(vectorizer_path):
+        with open(vectorizer_path, "rb") as f:
+            vectorizer = pickle.load(f)
 
-# Vectorize the "description" column
-vectorizer = TfidfVectorizer(max_features=5000)  # Ensure max_features matches Core ML input
-description_vectors = vectorizer.fit_transform(df["description"]).toarray()
+    # With a threshold, near-duplicate descriptions are vectorized once per cluster
+    vectorize = vectorize_descriptions
+    descriptions = df["description"]
+    if near_duplicate_threshold:
+        df, cluster_map = collapse_near_duplicates(df, "description", threshold=near_duplicate_threshold)
+        cluster_map.to_csv(cluster_map_path, index=False)
+        print(f"Near-duplicate clusters: {summarize(cluster_map)}")
+        descriptions = canonical_texts(cluster_map)
+        vectorize = functools.partial(vectorize_clusters, df["canonical_id"])
 
-# Fix vectorizer output dimension mismatch
-# Pad with zeros if the vectorized output has fewer dimensions than 5000
-if description_vectors.shape[1] < 5000:
-    padded_vectors = np.zeros((description_vectors.shape[0], 5000))
-    padded_vectors[:, :description_vectors.shape[1]] = description_vectors
-    description_vectors = padded_vectors
+    # Vectorize the "description" column, reusing cached vectors across runs when a cache directory is set
+    if embedding_cache_dir:
+        with EmbeddingCache(embedding_cache_dir, N_FEATURES) as cache:
+            vectorizer, description_vectors = vectorize(descriptions, cache=cache, vectorizer=vectorizer)
+        print(f"Embedding cache: {cache.stats()}")
+    else:
+        vectorizer, description_vectors = vectorize(descriptions, vectorizer=vectorizer)
 
-# Confirm the array shape matches the Core ML model requirements
-assert description_vectors.shape[1] == 5000, "Vectorizer output dimension mismatch."
+    # Save the vectorizer and vectorized data
+    with open(vectorizer_path, "wb") as f:
+        pickle.dump(vectorizer, f)
 
-# Save the vectorizer and vectorized data
-vectorizer_path = "vectorizer_new.pkl"
-description_vectors_path = "description_vectors.pkl"
+    save_vectors(description_vectors, description_vectors_path)
 
-with open(vectorizer_path, "wb") as f:
-    pickle.dump(vectorizer, f)
+    # Print information for confirmation
+    print(description_vectors.shape)  # Ensure the second dimension matches 5000
+    print(f"Vectorizer saved to {vectorizer_path}")
+    print(f"Vectorized data saved to {description_vectors_path}")
 
-with open(description_vectors_path, "wb") as f:
-    pickle.dump(description_vectors, f)
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Validate a charges CSV and save TF-IDF description vectors.")
+    parser.add_argument("dataset_path", nargs="?", default="healthcare_dataset.csv")
+    parser.add_argument("--vectorizer", dest="vectorizer_path", default="vectorizer_new.pkl")
+    parser.add_argument("--vectors", dest="description_vectors_path", default="description_vectors.npz",
+                        help=".npz file, or a directory of memory-mappable .npy arrays")
+    parser.add_argument("--code-snapshot", default=os.environ.get("CODE_REFERENCE_SNAPSHOT"),
+                        help="code reference snapshot to validate against (default: the sample codes)")
+    parser.add_argument("--embedding-cache", default=os.environ.get("EMBEDDING_CACHE_DIR"))
+    parser.add_argument("--reuse-vectorizer", action="store_true", default=os.environ.get("REUSE_VECTORIZER") == "1")
+    parser.add_argument("--near-duplicate-threshold", type=float,
+                        default=float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0)) or None)
+    parser.add_argument("--cluster-map", dest="cluster_map_path", default="description_clusters.csv")
+    args = parser.parse_args(argv)
+    main(args.dataset_path, args.vectorizer_path, args.description_vectors_path, args.code_snapshot,
+         args.embedding_cache, args.reuse_vectorizer, args.near_duplicate_threshold, args.cluster_map_path)
 
-# Print information for confirmation
-print(description_vectors.shape)  # Ensure the first dimension matches 5000
-print(f"Vectorizer saved to {vectorizer_path}")
-print(f"Vectorized data saved to {description_vectors_path}")
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+def reset_peak_rss():
+    """Resets this process's RSS high-water mark to its current RSS (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def peak_rss_mb():
+    """RSS high-water mark of this process in MB, since the last reset_peak_rss on Linux.
+
+    ru_maxrss is the fallback elsewhere; Linux carries it across exec, so a spawned
+    worker would report its parent's peak.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return usage / 1024 ** 2 if sys.platform == "darwin" else usage / 1024
+
+# Seconds between samples of the process tree's memory
+TREE_SAMPLE_INTERVAL = 0.1
+
+def process_tree_rss_mb(pid=None):
+    """Summed RSS in MB of a process and all its descendants, or None where /proc is unavailable.
+
+    Worker processes (joblib/loky, multiprocessing) are descendants, so this covers the
+    memory a parallel step really uses; peak_rss_mb only sees the calling process.
+    """
+    try:
+        entries = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return None
+    children = {}
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name is in parentheses and may contain spaces; ppid follows the state
+                ppid = int(f.read().rpartition(")")[2].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pages, pending = 0, [pid or os.getpid()]
+    while pending:
+        current = pending.pop()
+        pending += children.get(current, [])
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                pages += int(f.read().split()[1])
+        except OSError:
+            pass
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+@contextmanager
+def sample_tree_rss(interval=TREE_SAMPLE_INTERVAL):
+    """Samples process_tree_rss_mb on a thread while the block runs.
+
+    Yields a dict whose "peak_mb" is the largest sum seen, or None without /proc. It is
+    sampled, so a peak shorter than the interval can be missed.
+    """
+    result = {"peak_mb": process_tree_rss_mb()}
+    stop = threading.Event()
+
+    def sample():
+        while result["peak_mb"] is not None and not stop.wait(interval):
+            result["peak_mb"] = max(result["peak_mb"], process_tree_rss_mb() or 0.0)
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        thread.join()
+
+def timed(func, *args, **kwargs):
+    """Wall seconds and result of one call, for benchmarks that print their own tables."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+class ProfileReport:
+    """Wall time, CPU time and peak RSS per named stage, saved as one JSON report.
+
+    Use report.stage(name) as a context manager or report.profile(name) as a decorator.
+    Keyword details (e.g. rows=n) are stored with the stage, and rows also yields a
+    rows_per_sec figure. peak_growth_mb is the peak above the RSS the stage started at.
+    Stages may nest: an outer stage's peak covers its inner ones.
+    """
+
+    def __init__(self, path=None, **metadata):
+        self.path = path
+        self.metadata = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            **metadata,
+        }
+        self.stages = []
+        self.open_peaks = []
+
+    @contextmanager
+    def stage(self, name, **details):
+        # The enclosing stage keeps the peak it reached before this one resets the mark
+        if self.open_peaks:
+            self.open_peaks[-1] = max(self.open_peaks[-1], peak_rss_mb())
+        self.open_peaks.append(0.0)
+        reset_peak_rss()
+        record = {"stage": name, **details}
+        start_rss = current_rss_mb()
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 4)
+            peak = max(self.open_peaks.pop(), peak_rss_mb())
+            record["peak_rss_mb"] = round(peak, 1)
+            if start_rss is not None:
+                # How far the stage pushed memory above where it started
+                record["peak_growth_mb"] = round(max(peak - start_rss, 0.0), 1)
+            if self.open_peaks:
+                self.open_peaks[-1] = max(self.open_peaks[-1], peak)
+            if record.get("rows") and record["seconds"] > 0:
+                record["rows_per_sec"] = round(record["rows"] / record["seconds"], 1)
+            self.stages.append(record)
+
+    def profile(self, name=None, **details):
+        """Decorator recording every call of the function as a stage."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__qualname__, **details):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def to_dict(self):
+        return {"metadata": self.metadata, "stages": self.stages}
+
+    def save(self, path=None):
+        path = path or self.path
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            saved = json.load(f)
+        report = cls(path)
+        report.metadata = saved["metadata"]
+        report.stages = saved["stages"]
+        return report
+
+    def print_table(self):
+        print(f"{'stage':<34} {'rows':>11} {'wall (s)':>9} {'cpu (s)':>9} {'rows/s':>12} {'peak RSS (MB)':>14} "
+              f"{'growth (MB)':>12}")
+        for record in self.stages:
+            rows = record.get("rows", "")
+            rate = record.get("rows_per_sec", "")
+            growth = record.get("peak_growth_mb", "")
+            print(f"{record['stage']:<34} {rows:>11} {record['seconds']:>9.3f} {record['cpu_seconds']:>9.3f} "
+                  f"{rate:>12} {record['peak_rss_mb']:>14.1f} {growth:>12}")
+
+def stage_key(record):
+    return (record["stage"], record.get("rows"))
+
+def compare_reports(baseline, current, threshold=0.2, min_seconds=0.05):
+    """Matches stages by (name, rows) and flags those slower or larger than baseline by threshold.
+
+    Returns one row per stage found in both reports with the wall time and peak RSS
+    ratios (current / baseline). Stages faster than min_seconds in both runs are too
+    noisy to flag for time.
+    """
+    baseline_stages = {stage_key(record): record for record in baseline.stages}
+    rows = []
+    for record in current.stages:
+        before = baseline_stages.get(stage_key(record))
+        if before is None:
+            continue
+        time_ratio = record["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        rss_ratio = record["peak_rss_mb"] / before["peak_rss_mb"] if before["peak_rss_mb"] else float("inf")
+        rows.append({
+            "stage": record["stage"], "rows": record.get("rows"),
+            "time_ratio": round(time_ratio, 3), "rss_ratio": round(rss_ratio, 3),
+            "regression": (time_ratio > 1 + threshold and record["seconds"] >= min_seconds) or rss_ratio > 1 + threshold,
+        })
+    return rows
+
+def print_comparison(rows):
+    print(f"{'stage':<34} {'rows':>11} {'time x':>8} {'RSS x':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['stage']:<34} {str(row['rows'] or ''):>11} {row['time_ratio']:>8.2f} {row['rss_ratio']:>8.2f}{flag}")
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Compare two saved profile reports stage by stage.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown/growth ratio flagged as a regression")
+    args = parser.parse_args(argv)
+
+    rows = compare_reports(ProfileReport.load(args.baseline), ProfileReport.load(args.current), args.threshold)
+    print_comparison(rows)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import functools
+
+# Directory holding the columnar caches, relative to the working directory unless overridden
+CACHE_DIR = os.environ.get("SOURCE_CACHE_DIR", ".source_cache")
+
+# Bump when a parse function changes so stale caches are not reused
+CACHE_VERSION = "2"
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# pyarrow is optional and imported on first use; without it every load parses the CSV
+@functools.lru_cache(maxsize=None)
+def arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    return pa, feather
+
+# Hash the raw file contents in chunks so multi-GB sources never sit in memory
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Cache file path for a source, keyed on the file hash, source name and parse options
+def cache_path(file_path, source_name, parse_options=None, cache_dir=None):
+    key = hashlib.sha256()
+    key.update(file_hash(file_path).encode())
+    key.update(source_name.encode())
+    key.update(CACHE_VERSION.encode())
+    key.update(json.dumps(parse_options or {}, sort_keys=True, default=str).encode())
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f"{stem}-{key.hexdigest()[:16]}.feather")
+
+# Read a cached source, memory-mapped and limited to the requested columns
+def read_cache(path, columns=None):
+    _, feather = arrow()
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+# Write a parsed source as uncompressed Feather so later reads can memory-map it
+def write_cache(df, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pa, feather = arrow()
+    try:
+        feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        return True
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        logging.warning(f"Could not cache {path}: {e}")
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Load a source through the cache: parse and standardize it once with parse_func(file_path),
+# then serve later runs from the Feather copy as long as the file contents are unchanged
+def load_source(file_path, source_name, parse_func, columns=None, parse_options=None, use_cache=True, cache_dir=None):
+    if not use_cache or arrow() is None:
+        df = parse_func(file_path)
+        return df[columns] if columns is not None else df
+
+    path = cache_path(file_path, source_name, parse_options, cache_dir)
+    if os.path.exists(path):
+        logging.info(f"Loading {source_name} from cache {path}")
+        return read_cache(path, columns)
+
+    logging.info(f"Parsing {source_name} from {file_path} and caching to {path}")
+    df = parse_func(file_path)
+    if write_cache(df, path):
+        # Serve the cold run from the cache too so cold and warm runs see identical dtypes
+        return read_cache(path, columns)
+    return df[columns] if columns is not None else df
@@ -0,0 +1,454 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from profiling import peak_rss_mb, reset_peak_rss
+from source_cache import file_hash
+
+# Manifest of stage fingerprints and memoized content hashes
+STAGE_CACHE_DIR = os.environ.get("STAGE_CACHE_DIR", ".stage_cache")
+MANIFEST_FILE = "manifest.json"
+
+# Bump when the fingerprint layout changes so every stage reruns once
+FINGERPRINT_VERSION = "1"
+
+class Stage:
+    """One step of a pipeline: func(**inputs, **outputs, **params) run in a worker process.
+
+    inputs and outputs map keyword names to file or directory paths. A stage depends on
+    every stage that writes one of its inputs. modules names the Scripts modules whose
+    source the step runs, so editing them invalidates the stage; func's own module is
+    always included.
+    """
+
+    def __init__(self, name, func, inputs=None, outputs=None, params=None, modules=()):
+        self.name = name
+        self.func = func
+        self.inputs = dict(inputs or {})
+        self.outputs = dict(outputs or {})
+        self.params = dict(params or {})
+        self.modules = (func.__module__,) + tuple(modules)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+    def kwargs(self):
+        return {**self.inputs, **self.outputs, **self.params}
+
+def module_path(name):
+    """Source file of a module, found without importing it."""
+    if name == "__main__":
+        return os.path.abspath(sys.modules["__main__"].__file__)
+    spec = importlib.util.find_spec(name)
+    return spec.origin if spec is not None else None
+
+def stat_key(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+class HashMemo:
+    """Content hashes of files, recomputed only when a file's size or mtime changes.
+
+    Directories hash as their sorted relative paths plus each file's hash, so the
+    .npy directories written by save_vectors fingerprint like single files.
+    """
+
+    def __init__(self, hashes=None):
+        self.hashes = {} if hashes is None else hashes
+
+    def file(self, path):
+        path = os.path.abspath(path)
+        key = stat_key(path)
+        cached = self.hashes.get(path)
+        if cached is None or cached[:2] != key:
+            cached = key + [file_hash(path)]
+            self.hashes[path] = cached
+        return cached[2]
+
+    def path(self, path):
+        if not os.path.isdir(path):
+            return self.file(path)
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(self.file(file_path).encode())
+        return digest.hexdigest()
+
+def fingerprint(stage, memo):
+    """Hash of everything a stage's outputs are derived from: code, inputs and parameters."""
+    digest = hashlib.sha256(f"{FINGERPRINT_VERSION}|{stage.name}|{stage.func.__qualname__}".encode())
+    for path in sorted({module_path(name) or name for name in stage.modules}):
+        digest.update(f"|module:{os.path.basename(path)}={memo.file(path) if os.path.exists(path) else ''}".encode())
+    for name, path in sorted(stage.inputs.items()):
+        digest.update(f"|input:{name}={memo.path(path)}".encode())
+    # Output paths are part of the fingerprint, so writing elsewhere reruns the stage
+    digest.update(json.dumps({"outputs": stage.outputs, "params": stage.params}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def outputs_unchanged(stage, recorded, memo):
+    """True when every output still exists with the content hash recorded after the last run."""
+    return all(
+        os.path.exists(path) and recorded.get(os.path.abspath(path)) == memo.path(path)
+        for path in stage.outputs.values()
+    )
+
+def stage_dependencies(stages):
+    """{stage name: names of the stages writing its inputs}, rejecting unknown or cyclic graphs."""
+    writers = {}
+    for stage in stages:
+        for path in stage.outputs.values():
+            path = os.path.abspath(path)
+            if path in writers:
+                raise ValueError(f"{path} is written by both {writers[path]} and {stage.name}")
+            writers[path] = stage.name
+    dependencies = {
+        stage.name: {writers[os.path.abspath(path)] for path in stage.inputs.values() if os.path.abspath(path) in writers}
+        for stage in stages
+    }
+    # Kahn's algorithm only to detect cycles; execution order is decided as stages finish
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle among {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return dependencies
+
+def run_stage(func, kwargs):
+    """Runs one stage and measures its wall time, CPU time and peak RSS."""
+    reset_peak_rss()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    func(**kwargs)
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "cpu_seconds": round(time.process_time() - cpu_start, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+def load_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"stages": {}, "hashes": {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+def run_stages(stages, cache_dir=None, max_workers=None, force=()):
+    """Runs a stage graph, skipping stages whose fingerprint and outputs are unchanged.
+
+    A stage starts as soon as the stages it depends on have finished, so independent
+    stages run side by side across max_workers processes, each in a fresh process.
+    With max_workers=0 stages run one at a time in this process. force names
+    stages to rerun regardless of the cache. Returns one report row per stage, in the
+    order stages finished.
+    """
+    cache_dir = cache_dir or STAGE_CACHE_DIR
+    by_name = {stage.name: stage for stage in stages}
+    dependencies = stage_dependencies(stages)
+    manifest = load_manifest(cache_dir)
+    memo = HashMemo(manifest["hashes"])
+    report = []
+    done = set()
+    running = {}
+
+    def finish(stage, stage_fingerprint, row):
+        for path in stage.outputs.values():
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Stage {stage.name} did not write its output {path}")
+        manifest["stages"][stage.name] = {
+            "fingerprint": stage_fingerprint,
+            "outputs": {os.path.abspath(path): memo.path(path) for path in stage.outputs.values()},
+        }
+        save_manifest(manifest, cache_dir)
+        report.append({"stage": stage.name, "status": "ran", **row})
+        done.add(stage.name)
+
+    pools = []
+
+    def start_ready():
+        # Cache hits resolve immediately and may unblock further stages, so loop until stable
+        progressed = True
+        while progressed:
+            progressed = False
+            for stage in stages:
+                if stage.name in done or stage.name in running or not dependencies[stage.name] <= done:
+                    continue
+                stage_fingerprint = fingerprint(stage, memo)
+                recorded = manifest["stages"].get(stage.name)
+                if (stage.name not in force and recorded and recorded["fingerprint"] == stage_fingerprint
+                        and outputs_unchanged(stage, recorded["outputs"], memo)):
+                    report.append({"stage": stage.name, "status": "cached", "seconds": 0.0,
+                                   "cpu_seconds": 0.0, "peak_rss_mb": None})
+                    done.add(stage.name)
+                    progressed = True
+                    continue
+                for path in stage.outputs.values():
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                if max_workers == 0:
+                    finish(stage, stage_fingerprint, run_stage(stage.func, stage.kwargs()))
+                    progressed = True
+                    continue
+                # Started on the first miss, so a fully cached run never spawns workers.
+                # Spawned single-use workers: no stage inherits another's imports or memory
+                if not pools:
+                    pools.append(ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     max_tasks_per_child=1))
+                running[stage.name] = (pools[0].submit(run_stage, stage.func, stage.kwargs()), stage_fingerprint)
+
+    try:
+        start_ready()
+        while running:
+            finished, _ = wait([future for future, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name in [name for name, (future, _) in running.items() if future in finished]:
+                future, stage_fingerprint = running.pop(name)
+                try:
+                    row = future.result()
+                except Exception as e:
+                    for other, _ in running.values():
+                        other.cancel()
+                    raise RuntimeError(f"Stage {name} failed: {e}") from e
+                finish(by_name[name], stage_fingerprint, row)
+            start_ready()
+    finally:
+        for pool in pools:
+            pool.shutdown()
+        # Keep hashes memoized during a fully cached run too
+        save_manifest(manifest, cache_dir)
+    return report
+
+def print_report(report):
+    print(f"{'stage':<26} {'status':<8} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS (MB)':>14}")
+    for row in report:
+        peak = "-" if row["peak_rss_mb"] is None else f"{row['peak_rss_mb']:.1f}"
+        print(f"{row['stage']:<26} {row['status']:<8} {row['seconds']:>9.3f} {row['cpu_seconds']:>9.3f} {peak:>14}")
+    hits = sum(row["status"] == "cached" for row in report)
+    print(f"{hits} of {len(report)} stages served from cache")
+
+# Pipeline stages. Each imports its modules when it runs, so only the worker pays for them.
+
+SOURCE_PARSERS = {
+    "hcpcs": ("parse_hcpcs", "HCPCS File"),
+    "addendum_a": ("parse_addendum_a", "Addendum A File"),
+    "addendum_b": ("parse_addendum_b", "Addendum B File"),
+}
+
+def parse_source_stage(input_path, output_path, source):
+    """Parses one CMS source file with its enhanced_mapping_pipeline parser into Feather."""
+    import enhanced_mapping_pipeline
+    from source_cache import write_cache
+    parse_name, label = SOURCE_PARSERS[source]
+    df = getattr(enhanced_mapping_pipeline, parse_name)(input_path)
+    if not write_cache(df, output_path):
+        raise ValueError(f"Could not write {label} to {output_path}")
+
+def map_concepts_stage(icd10_path, hcpcs_path, addendum_a_path, addendum_b_path, output_path, output_format="json",
+                       fields=None):
+    """Maps ICD-10 concepts against the parsed HCPCS/Addendum tables and streams the result.
+
+    fields ({source: columns}) limits a source's mapped rows, and the columns read from its
+    Feather table, to those columns and the join keys.
+    """
+    from enhanced_mapping_pipeline import iter_mapped_concepts, load_icd10, mapping_columns, save_mapped_data_streaming
+    from source_cache import read_cache
+    fields = fields or {}
+    icd10_data = load_icd10(icd10_path)
+    tables = [read_cache(path, mapping_columns(source, fields.get(source)))
+              for source, path in zip(SOURCE_PARSERS, (hcpcs_path, addendum_a_path, addendum_b_path))]
+    mapped_concepts = iter_mapped_concepts(*tables, icd10_data)
+    save_mapped_data_streaming(icd10_data, mapped_concepts, output_path, output_format)
+
+def clean_dataset_stage(input_path, output_path, subset_size=1500, chunksize=None):
+    """Cleans and samples the Standard Charges file with generate_clean_dataset_v2."""
+    import generate_clean_dataset_v2
+    generate_clean_dataset_v2.main(chunksize, subset_size, input_path=input_path, output_path=output_path)
+
+def clean_descriptions_stage(dataset_path, output_path, column="description", n_jobs=1):
+    """Adds a description_clean column: cleaned, stopword-free, stemmed descriptions."""
+    import pandas as pd
+    from nlp_text_preprocessing import get_preprocessor
+    df = pd.read_csv(dataset_path, low_memory=False)
+    df["description_clean"] = get_preprocessor().preprocess_batch(df[column].fillna(""), n_jobs=n_jobs)
+    df.to_csv(output_path, index=False)
+
+def collapse_stage(dataset_path, output_path, cluster_map_path, column="description_clean", threshold=0.8):
+    """Adds the canonical_id column of near-duplicate description clusters and writes the cluster map."""
+    import pandas as pd
+    from near_duplicates import collapse_near_duplicates
+    df, cluster_map = collapse_near_duplicates(pd.read_csv(dataset_path, low_memory=False), column, threshold=threshold)
+    df.to_csv(output_path, index=False)
+    cluster_map.to_csv(cluster_map_path, index=False)
+
+def vectorize_stage(dataset_path, vectorizer_path, vectors_path, column="description_clean", cluster_map_path=None):
+    """Fits the TF-IDF vectorizer on one column and saves it with the row vectors.
+
+    With a cluster map, each cluster's canonical text is vectorized once and its vector
+    fanned out to the rows of the cluster.
+    """
+    import pickle
+    import pandas as pd
+    from process_vectorization import save_vectors, vectorize_clusters, vectorize_descriptions
+    if cluster_map_path:
+        from near_duplicates import canonical_texts
+        canonical_ids = pd.read_csv(dataset_path, usecols=["canonical_id"])["canonical_id"].to_numpy()
+        cluster_map = pd.read_csv(cluster_map_path, keep_default_na=False)
+        vectorizer, vectors = vectorize_clusters(canonical_ids, canonical_texts(cluster_map))
+    else:
+        descriptions = pd.read_csv(dataset_path, usecols=[column])[column].fillna("")
+        vectorizer, vectors = vectorize_descriptions(descriptions)
+    with open(vectorizer_path, "wb") as f:
+        pickle.dump(vectorizer, f)
+    save_vectors(vectors, vectors_path)
+
+def train_stage(dataset_path, vectors_path, model_path, mapping_path, label_column="code|1", n_estimators=100,
+                id_column=None):
+    """Trains the RandomForest from vectors to labels and writes index_to_icd10.json for its outputs.
+
+    With id_column, each (cluster, label) pair is one training row, however many
+    near-duplicate rows share it.
+    """
+    import pickle
+    import numpy as np
+    import pandas as pd
+    from ml_model_training import train_model
+    from process_vectorization import load_vectors
+    labels = pd.read_csv(dataset_path, usecols=[label_column])[label_column].fillna("").astype(str).to_numpy()
+    vectors = load_vectors(vectors_path)
+    if id_column:
+        canonical_ids = pd.read_csv(dataset_path, usecols=[id_column])[id_column]
+        keep = np.flatnonzero(~pd.DataFrame({"id": canonical_ids, "label": labels}).duplicated().to_numpy())
+        vectors, labels = vectors[keep], labels[keep]
+    model = train_model(vectors, labels, n_estimators)
+    with open(model_path, "wb") as f:
+        pickle.dump(model, f)
+    # predict_proba columns follow classes_, which is what load_label_array indexes
+    with open(mapping_path, "w") as f:
+        json.dump({str(index): label for index, label in enumerate(model.classes_.tolist())}, f)
+
+def score_stage(model_path, mapping_path, vectors_path, output_dir, top_k=3):
+    """Batch-scores the vectors and writes the top-k code arrays to output_dir."""
+    from batch_inference import load_backend, load_label_array, run_inference
+    from process_vectorization import load_vectors
+    run_inference(load_backend(model_path), load_vectors(vectors_path), load_label_array(mapping_path),
+                  k=top_k, output_dir=output_dir)
+
+def scripts_pipeline(work_dir, dataset_path=None, standard_charges_path=None, mapping_sources=None,
+                     subset_size=1500, n_estimators=100, near_duplicate_threshold=None, mapping_fields=None):
+    """The Scripts chain as a stage graph writing into work_dir.
+
+    The charge chain cleans standard_charges_path (or starts from an already cleaned
+    dataset_path), preprocesses descriptions, vectorizes, trains and batch-scores.
+    near_duplicate_threshold adds a stage clustering near-duplicate descriptions, so
+    vectorizing and training see each distinct item once. mapping_sources ({"hcpcs",
+    "addendum_a", "addendum_b", "icd10"}: path) adds the enhanced_mapping_pipeline
+    stages; the three CMS parses are independent and run in parallel with each other
+    and with the charge chain. mapping_fields ({source: columns}) narrows the mapped rows.
+    """
+    def work(name):
+        return os.path.join(work_dir, name)
+
+    stages = []
+    if standard_charges_path:
+        dataset_path = work("healthcare_dataset_clean.csv")
+        stages.append(Stage("clean_dataset", clean_dataset_stage,
+                            inputs={"input_path": standard_charges_path}, outputs={"output_path": dataset_path},
+                            params={"subset_size": subset_size}, modules=("generate_clean_dataset_v2", "source_cache")))
+    if dataset_path:
+        stages.append(Stage("clean_descriptions", clean_descriptions_stage,
+                            inputs={"dataset_path": dataset_path}, outputs={"output_path": work("descriptions_clean.csv")},
+                            modules=("nlp_text_preprocessing",)))
+        descriptions_path = work("descriptions_clean.csv")
+        vectorize_inputs, train_params = {}, {}
+        if near_duplicate_threshold:
+            descriptions_path = work("descriptions_collapsed.csv")
+            stages.append(Stage("collapse_near_duplicates", collapse_stage,
+                                inputs={"dataset_path": work("descriptions_clean.csv")},
+                                outputs={"output_path": descriptions_path, "cluster_map_path": work("cluster_map.csv")},
+                                params={"threshold": near_duplicate_threshold}, modules=("near_duplicates",)))
+            vectorize_inputs = {"cluster_map_path": work("cluster_map.csv")}
+            train_params = {"id_column": "canonical_id"}
+        stages += [
+            Stage("vectorize", vectorize_stage,
+                  inputs={"dataset_path": descriptions_path, **vectorize_inputs},
+                  outputs={"vectorizer_path": work("vectorizer.pkl"), "vectors_path": work("description_vectors")},
+                  modules=("process_vectorization", "near_duplicates")),
+            Stage("train", train_stage,
+                  inputs={"dataset_path": descriptions_path, "vectors_path": work("description_vectors")},
+                  outputs={"model_path": work("model.pkl"), "mapping_path": work("index_to_icd10.json")},
+                  params={"n_estimators": n_estimators, **train_params},
+                  modules=("ml_model_training", "process_vectorization")),
+            Stage("score", score_stage,
+                  inputs={"model_path": work("model.pkl"), "mapping_path": work("index_to_icd10.json"),
+                          "vectors_path": work("description_vectors")},
+                  outputs={"output_dir": work("predictions")}, modules=("batch_inference", "process_vectorization")),
+        ]
+    if mapping_sources:
+        for source in SOURCE_PARSERS:
+            stages.append(Stage(f"parse_{source}", parse_source_stage,
+                                inputs={"input_path": mapping_sources[source]},
+                                outputs={"output_path": work(f"{source}.feather")},
+                                params={"source": source}, modules=("enhanced_mapping_pipeline", "source_cache")))
+        stages.append(Stage("map_concepts", map_concepts_stage,
+                            inputs={"icd10_path": mapping_sources["icd10"], "hcpcs_path": work("hcpcs.feather"),
+                                    "addendum_a_path": work("addendum_a.feather"),
+                                    "addendum_b_path": work("addendum_b.feather")},
+                            outputs={"output_path": work("mapped_data_final.json")},
+                            params={"fields": mapping_fields} if mapping_fields else {},
+                            modules=("enhanced_mapping_pipeline", "source_cache")))
+    return stages
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run the Scripts pipeline, skipping stages whose inputs are unchanged.")
+    parser.add_argument("--work-dir", default="pipeline_output")
+    parser.add_argument("--dataset", help="cleaned charges CSV to start the charge chain from")
+    parser.add_argument("--standard-charges", help="raw Standard Charges CSV; adds the clean_dataset stage")
+    parser.add_argument("--hcpcs")
+    parser.add_argument("--addendum-a")
+    parser.add_argument("--addendum-b")
+    parser.add_argument("--icd10")
+    parser.add_argument("--subset-size", type=int, default=1500)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--near-duplicate-threshold", type=float,
+                        help="cluster near-duplicate descriptions (e.g. 0.8) and vectorize/train once per cluster")
+    parser.add_argument("--workers", type=int, help="parallel stage processes (default: CPU count, 0: in-process)")
+    parser.add_argument("--force", nargs="*", default=[], help="stage names to rerun even when cached")
+    parser.add_argument("--report", help="write the per-stage report as JSON")
+    args = parser.parse_args(argv)
+
+    mapping_sources = {"hcpcs": args.hcpcs, "addendum_a": args.addendum_a, "addendum_b": args.addendum_b, "icd10": args.icd10}
+    if any(mapping_sources.values()) and not all(mapping_sources.values()):
+        parser.error("--hcpcs, --addendum-a, --addendum-b and --icd10 are needed together")
+    os.makedirs(args.work_dir, exist_ok=True)
+    stages = scripts_pipeline(args.work_dir, args.dataset, args.standard_charges,
+                              mapping_sources if all(mapping_sources.values()) else None,
+                              args.subset_size, args.n_estimators, args.near_duplicate_threshold)
+    if not stages:
+        parser.error("nothing to run: give --dataset, --standard-charges or the mapping sources")
+
+    report = run_stages(stages, max_workers=args.workers, force=set(args.force))
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,444 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from nlp_text_preprocessing import clean_text
+
+# Exact column order of Preprocessed_Dataset.csv
+CHARGE_COLUMNS = [
+    "description", "code|1", "code|1|type", "code|2", "code|2|type", "code|3", "code|3|type", "code|4",
+    "code|4|type", "setting", "drug_unit_of_measurement", "drug_type_of_measurement", "standard_charge|gross",
+    "standard_charge|discounted_cash", "payer_name", "plan_name", "modifiers", "standard_charge|negotiated_dollar",
+    "standard_charge|negotiated_percentage", "standard_charge|negotiated_algorithm", "estimated_amount",
+    "standard_charge|min", "standard_charge|max", "standard_charge|methodology", "additional_generic_notes",
+    "service|type", "code|1|description", "code|2|description", "clinical_domain", "pricing|discounted",
+    "pricing|gross", "description_clean",
+]
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+# Charge rows per distinct item: every item repeats across payer/plan rows, as in the hospital files
+ROWS_PER_ITEM = 20
+MAX_ITEMS = 2_000_000
+
+# Description variants per item; variant 0 is the item's base description
+N_VARIANTS = 3
+
+# Upper bound of generated gross charges, also the pricing|discounted scale
+PRICE_SCALE = 2_000_000.0
+
+SUPPLY_NOUNS = ["CATHETER", "PLATE", "SCREW", "STENT", "GUIDEWIRE", "SHEATH", "IMPLANT", "ANCHOR", "GRAFT",
+                "SUTURE", "BALLOON", "LEAD", "VALVE", "MESH", "CLIP", "DRAIN", "NEEDLE", "PUMP"]
+SUPPLY_BRANDS = ["SUPERTORQUE", "ACCUFLEX", "PROLINK", "VERSAFIT", "OMNIGRIP", "FLEXCORE", "TITANLOCK",
+                 "SURELINE", "MAXIFLOW", "DURASEAL"]
+SUPPLY_QUALIFIERS = ["VASCULAR JUDKINS LEFT", "BOWED LOCKING COMPRESSION FEMUR", "CORTICAL SELF TAPPING",
+                     "CORONARY DRUG ELUTING", "HYDROPHILIC ANGLED", "INTRODUCER", "BREAST PROSTHESIS",
+                     "SUTURE KNOTLESS", "VASCULAR WOVEN", "ABSORBABLE BRAIDED", "PERIPHERAL", "PACING ACTIVE FIX"]
+SUPPLY_SIZES = ["6FR", "5FR", "7FR", "3.5MM", "4.5MM", "2.7MM", "18 HOLE", "100CM", "150CM", ".038IN", ".035IN",
+                "10X40MM", "3-0", "4-0", "T1", "T2"]
+PACKS = ["BX/5EA", "BX/10EA", "EA", "PK/2", "CS/12", "BX/25EA"]
+DRUG_NAMES = ["SELEGILINE", "ONDANSETRON", "CEFAZOLIN", "HEPARIN", "KETOROLAC", "METOPROLOL", "LISINOPRIL",
+              "ATORVASTATIN", "GABAPENTIN", "PANTOPRAZOLE", "VANCOMYCIN", "FUROSEMIDE", "MORPHINE", "INSULIN LISPRO",
+              "DEXAMETHASONE", "AMOXICILLIN", "PROPOFOL", "ENOXAPARIN", "LEVETIRACETAM", "ACETAMINOPHEN"]
+DRUG_STRENGTHS = ["5 MG", "10 MG", "20 MG", "25 MG", "40 MG", "100 MG", "250 MG", "500 MG", "1 G", "2 MG/ML",
+                  "4 MG/2 ML", "30 MG/0.3 ML", "100 UNIT/ML"]
+DRUG_FORMS = ["TABLET", "CAPSULE", "INJECTION", "VIAL", "SYRINGE", "ORAL SOLUTION", "IV PIGGYBACK", "PREFILLED PEN"]
+PROCEDURES = ["HC CT", "HC MRI", "HC XR", "HC US", "HC ECHO", "HC ARTHROSCOPY", "HC REPAIR", "HC EXCISION",
+              "HC INJECTION", "HC BIOPSY", "HC REMOVAL", "HC THERAPY EVAL"]
+ANATOMY = ["HEAD", "CHEST", "ABDOMEN", "PELVIS", "KNEE", "SHOULDER", "HIP", "SPINE LUMBAR", "SPINE CERVICAL",
+           "ANKLE", "WRIST", "BREAST", "THYROID", "HAND"]
+PROCEDURE_DETAILS = ["W/O CONTRAST", "W/CONTRAST", "W/ & W/O CONTRAST", "LIMITED", "COMPLETE", "2 VIEWS",
+                     "BILATERAL", "LEFT", "RIGHT", "EACH ADDL 15 MIN", "SIMPLE", "COMPLEX"]
+
+PAYERS = ["BLUE CROSS BLUE SHIELD", "GENERIC MEDICARE REPLACEMENT", "TUFTS HEALTH PLAN", "HARVARD PILGRIM",
+          "AETNA", "CIGNA", "UNITED HEALTHCARE", "HUMANA", "WELLCARE", "MOLINA", "ANTHEM", "CENTENE"]
+PLAN_KINDS = ["HMO", "PPO", "POS", "EPO", "MEDICARE ADVANTAGE", "MEDICAID MANAGED CARE", "SELECT LIMITED NETWORK HMO"]
+DRUG_UNITS = ["UN", "ML", "GR", "ME", "F2"]
+MODIFIERS = ["50", "XS", "XS|51", "26|25|51", "59", "LT", "RT", "TC", "26", "51", "25"]
+ALGORITHMS = [
+    "Paid using APC or APG reimbursement logic. Includes reimbursement for any outliers.",
+    "Base payment rate plus any adjustments related to capital costs, transfers and outliers.",
+    "Base payment rate plus any adjustments related to medical education, transfers, or outliers.",
+    "Priced at the fee schedule rate for the service date.",
+]
+METHODOLOGIES = ["other", "percent of total billed charges", "fee schedule", "case rate"]
+NOTES = ["OPPS APC", "APC grouping requires price history; No contract line matched", "Surgical CPT ",
+         "Multiple Surgery", "Per diem", "Carve-out"]
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTVWXYZ"))
+
+FAMILY_NAMES = ["Vega", "Terry", "Brooks", "Garza", "Porter", "Hicks", "Kent", "Solomon", "Thornton", "Wong",
+                "Gonzales", "Nguyen", "Patel", "Smith", "Okafor", "Rossi", "Kim", "Larsen"]
+GIVEN_NAMES = ["Kelly", "Lucas", "William", "Jeffrey", "Amy", "Terri", "Steven", "Patrick", "Erica", "Heidi",
+               "Julie", "Maria", "James", "Aisha", "Chen", "Olga", "Diego", "Grace"]
+
+def choice(rng, values, size):
+    """size picks from a list of strings, as an object array."""
+    return np.asarray(values, dtype=object)[rng.integers(len(values), size=size)]
+
+def with_nulls(rng, values, null_rate):
+    """values with a null_rate share replaced by NaN (floats) or None (objects)."""
+    values = np.array(values, dtype=float if values.dtype.kind == "f" else object)
+    values[rng.random(len(values)) < null_rate] = np.nan if values.dtype.kind == "f" else None
+    return values
+
+def join_words(*columns):
+    return np.array([" ".join(words) for words in zip(*columns)], dtype=object)
+
+def description_variant(description, variant):
+    """A near-duplicate of description: another pack size, or different punctuation/case."""
+    if variant == 0:
+        return description
+    words = description.split(" ")
+    if variant == 1:
+        packs = [i for i, word in enumerate(words) if word in PACKS]
+        if packs:
+            words[packs[-1]] = PACKS[(PACKS.index(words[packs[-1]]) + 1) % len(PACKS)]
+        else:
+            words.append("EA")
+        return " ".join(words)
+    return " ".join(words).replace("/", " ").replace(".", "").title()
+
+class ItemCatalog:
+    """The distinct chargeable items behind synthetic charge rows.
+
+    Each item has codes, a base price and N_VARIANTS description strings; charge rows
+    draw items, so descriptions repeat across payers and plans and a variant_rate share
+    of rows carries a near-duplicate wording. Like a hospital chargemaster, different
+    items (codes) can share a description. Cleaned descriptions are computed once per
+    distinct string, not per row.
+    """
+
+    def __init__(self, n_items, seed=42):
+        rng = np.random.default_rng(seed)
+        self.n_items = n_items
+        kind = rng.choice(3, size=n_items, p=[0.55, 0.21, 0.24])  # supply, drug, procedure
+        supply, drug, procedure = kind == 0, kind == 1, kind == 2
+        item_ids = np.arange(n_items)
+
+        descriptions = np.empty(n_items, dtype=object)
+        n = supply.sum()
+        descriptions[supply] = join_words(choice(rng, SUPPLY_NOUNS, n), choice(rng, SUPPLY_BRANDS, n),
+                                          choice(rng, SUPPLY_SIZES, n), choice(rng, SUPPLY_QUALIFIERS, n),
+                                          choice(rng, PACKS, n))
+        n = drug.sum()
+        descriptions[drug] = join_words(choice(rng, DRUG_NAMES, n), choice(rng, DRUG_STRENGTHS, n),
+                                        choice(rng, DRUG_FORMS, n))
+        n = procedure.sum()
+        descriptions[procedure] = join_words(choice(rng, PROCEDURES, n), choice(rng, ANATOMY, n),
+                                             choice(rng, PROCEDURE_DETAILS, n))
+        self.descriptions = np.array([description_variant(text, variant)
+                                      for text in descriptions for variant in range(N_VARIANTS)], dtype=object)
+        self.descriptions_clean = np.array([clean_text(text) for text in self.descriptions], dtype=object)
+
+        prefixes = np.array(["SUP-", "RX-", "PX-"], dtype=object)[kind]
+        self.code1 = prefixes + pd.Series(item_ids + 100).astype(str).to_numpy(dtype=object)
+        self.code1_type = np.where(procedure & (rng.random(n_items) < 0.3), "MS-DRG", "CDM").astype(object)
+        code2_type = np.where(procedure, "CPT", np.where(rng.random(n_items) < 0.9, "HCPCS", "LOCAL")).astype(object)
+        hcpcs = choice(rng, ["C", "J", "A", "L"], n_items) + pd.Series(rng.integers(1000, 10_000, n_items)).astype(str).to_numpy(dtype=object)
+        cpt = pd.Series(rng.integers(10_000, 100_000, n_items)).astype(str).to_numpy(dtype=object)
+        local = pd.Series(rng.integers(10_000_000, 100_000_000, n_items)).astype(str).to_numpy(dtype=object)
+        code2 = np.where(code2_type == "CPT", cpt, np.where(code2_type == "HCPCS", hcpcs, local))
+        missing_code2 = rng.random(n_items) < 0.06
+        self.code2 = np.where(missing_code2, None, code2)
+        self.code2_type = np.where(missing_code2, None, code2_type)
+        self.code3 = with_nulls(rng, rng.choice([250, 259, 272, 278, 300, 320, 360, 615, 636], n_items).astype(float), 0.02)
+        ndc = [f"{a:05d}-{b:04d}-{c:02d}" for a, b, c in zip(rng.integers(0, 100_000, n_items),
+                                                           rng.integers(0, 10_000, n_items), rng.integers(0, 100, n_items))]
+        self.code4 = np.where(drug, np.array(ndc, dtype=object), None)
+        self.drug_units = np.where(drug, rng.choice([1.0, 5.0, 10.0, 100.0, 1050.0], n_items), np.nan)
+        self.drug_unit_types = np.where(drug, choice(rng, DRUG_UNITS, n_items), None)
+        self.gross = np.minimum(np.round(rng.lognormal(5.5, 1.8, n_items), 2), PRICE_SCALE)
+
+def make_plans(seed=42):
+    """(payer names, plan names) pairs: each payer offers several plans, with bracketed ids."""
+    rng = np.random.default_rng(seed)
+    payers, plans = [], []
+    for payer_number, payer in enumerate(PAYERS):
+        payer_id = 110_001 + payer_number * 10_000
+        for plan_number, kind in enumerate(rng.choice(PLAN_KINDS, rng.integers(3, 8), replace=False)):
+            payers.append(f"{payer} [{payer_id}]")
+            plans.append(f"{payer.split()[0]} {kind} [{payer_id * 100 + plan_number + 1}]")
+    return np.array(payers, dtype=object), np.array(plans, dtype=object)
+
+def default_catalog_size(n_rows):
+    return int(min(max(n_rows // ROWS_PER_ITEM, 100), MAX_ITEMS))
+
+def make_charges(n_rows, catalog=None, seed=42, variant_rate=0.2, plans=None):
+    """n_rows synthetic charge rows with the exact Preprocessed_Dataset.csv columns and null rates.
+
+    catalog and plans (a make_plans result) default to ones drawn from seed; chunks of
+    one file pass the same ones so items and plan ids keep their meaning across chunks.
+    """
+    catalog = catalog or ItemCatalog(default_catalog_size(n_rows), seed)
+    rng = np.random.default_rng(seed)
+    payers, plans = plans or make_plans(seed)
+
+    item = rng.integers(catalog.n_items, size=n_rows)
+    variant = np.where(rng.random(n_rows) < variant_rate, rng.integers(1, N_VARIANTS, n_rows), 0)
+    description_index = item * N_VARIANTS + variant
+    plan = rng.integers(len(plans), size=n_rows)
+    gross = np.round(catalog.gross[item] * rng.uniform(0.95, 1.05, n_rows), 2)
+    discounted_cash = with_nulls(rng, np.round(gross * rng.uniform(0.6, 0.8, n_rows), 2), 0.04)
+    negotiated = with_nulls(rng, np.round(gross * rng.uniform(0.3, 0.9, n_rows), 2), 0.83)
+    has_range = rng.random(n_rows) < 0.32
+    code2_type = catalog.code2_type[item]
+    code1_type = catalog.code1_type[item]
+
+    columns = {
+        "description": catalog.descriptions[description_index],
+        "code|1": catalog.code1[item],
+        "code|1|type": code1_type,
+        "code|2": catalog.code2[item],
+        "code|2|type": code2_type,
+        "code|3": catalog.code3[item],
+        "code|3|type": np.where(np.isnan(catalog.code3[item]), None, "RC"),
+        "code|4": catalog.code4[item],
+        "code|4|type": np.where(pd.isna(catalog.code4[item]), None, "NDC"),
+        "setting": np.where(rng.random(n_rows) < 0.5, "inpatient", "outpatient").astype(object),
+        "drug_unit_of_measurement": catalog.drug_units[item],
+        "drug_type_of_measurement": catalog.drug_unit_types[item],
+        "standard_charge|gross": gross,
+        "standard_charge|discounted_cash": discounted_cash,
+        "payer_name": payers[plan],
+        "plan_name": plans[plan],
+        "modifiers": with_nulls(rng, choice(rng, MODIFIERS, n_rows), 0.99),
+        "standard_charge|negotiated_dollar": negotiated,
+        "standard_charge|negotiated_percentage": with_nulls(rng, np.round(rng.uniform(30, 80, n_rows), 2), 0.85),
+        "standard_charge|negotiated_algorithm": with_nulls(rng, choice(rng, ALGORITHMS, n_rows), 0.96),
+        "estimated_amount": np.where(rng.random(n_rows) < 0.45, np.round(gross * rng.uniform(0.4, 1.0, n_rows), 2), np.nan),
+        "standard_charge|min": np.where(has_range, np.round(gross * 0.3, 2), np.nan),
+        "standard_charge|max": np.where(has_range, np.round(gross * 1.2, 2), np.nan),
+        "standard_charge|methodology": with_nulls(rng, choice(rng, METHODOLOGIES, n_rows), 0.56),
+        "additional_generic_notes": with_nulls(rng, choice(rng, NOTES, n_rows), 0.83),
+        # Same coalesce as generate_clean_dataset_v2.determine_service_types
+        "service|type": np.where(pd.isna(code2_type), code1_type, code2_type),
+        "code|1|description": "Unknown",
+        "code|2|description": "Unknown",
+        "clinical_domain": "Unknown",
+        "pricing|discounted": discounted_cash / PRICE_SCALE,
+        "pricing|gross": np.nan,
+        "description_clean": catalog.descriptions_clean[description_index],
+    }
+    return pd.DataFrame(columns, columns=CHARGE_COLUMNS)
+
+def iter_charge_chunks(n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42, variant_rate=0.2):
+    """make_charges in chunks of chunk_rows over one shared item catalog and plan list, for files larger than memory."""
+    catalog = ItemCatalog(default_catalog_size(n_rows), seed)
+    plans = make_plans(seed)
+    for chunk_number, start in enumerate(range(0, n_rows, chunk_rows)):
+        yield make_charges(min(chunk_rows, n_rows - start), catalog, seed + chunk_number + 1, variant_rate, plans)
+
+def write_charges(path, n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42, variant_rate=0.2):
+    """Streams n_rows charge rows to CSV, or Parquet when path ends in .parquet."""
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        for chunk in iter_charge_chunks(n_rows, chunk_rows, seed, variant_rate):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer:
+            writer.close()
+        return path
+    for chunk_number, chunk in enumerate(iter_charge_chunks(n_rows, chunk_rows, seed, variant_rate)):
+        chunk.to_csv(path, mode="a" if chunk_number else "w", header=not chunk_number, index=False)
+    return path
+
+def icd10_codes(n_codes):
+    """n_codes distinct ICD-10-shaped codes (letter, two digits, dot, subcategory)."""
+    index = np.arange(n_codes)
+    category, subcategory = index % 2500, index // 2500
+    return [f"{LETTERS[c // 100]}{c % 100:02d}.{s}" for c, s in zip(category, subcategory)]
+
+def make_mapping_sources(n_concepts, seed=42):
+    """Raw HCPCS, Addendum A and Addendum B tables (CMS column headers) and an ICD-10 CodeSystem.
+
+    Linked the way enhanced_mapping_pipeline.perform_mapping joins them: HCPCS SEQNUM to the
+    concept code, HCPCS OPPS to the Addendum A APC, and HCPC to the Addendum B HCPCS Code.
+    """
+    rng = np.random.default_rng(seed)
+    codes = np.array(icd10_codes(n_concepts), dtype=object)
+    n_hcpcs = n_concepts * 2
+    n_apc = max(n_concepts // 20, 10)
+    apcs = pd.Series(np.arange(5000, 5000 + n_apc)).astype(str).to_numpy(dtype=object)
+    index = np.arange(n_hcpcs)
+    hcpcs_codes = np.array([f"{LETTERS[i % 25]}{i // 25:04d}" for i in index], dtype=object)
+    descriptions = join_words(choice(rng, PROCEDURES + DRUG_NAMES, n_hcpcs), choice(rng, ANATOMY + DRUG_STRENGTHS, n_hcpcs))
+    payment = np.round(rng.lognormal(5, 1.5, n_apc), 2)
+
+    hcpcs = pd.DataFrame({
+        "HCPC": hcpcs_codes,
+        # Some rows have no concept behind them, as in the real file
+        "SEQNUM": np.where(rng.random(n_hcpcs) < 0.9, codes[rng.integers(n_concepts, size=n_hcpcs)], "0"),
+        "RECID": 3,
+        "LONG DESCRIPTION": descriptions,
+        "SHORT DESCRIPTION": [text[:28] for text in descriptions],
+        "PRICE1": rng.choice([11, 13, 45, 51, 57], n_hcpcs),
+        "MULT_PI": rng.choice(["", "A", "S"], n_hcpcs),
+        "OPPS": apcs[rng.integers(n_apc, size=n_hcpcs)],
+        "OPPS_PI": rng.choice(["1", "2", "9"], n_hcpcs),
+        "ADD DT": "20250101",
+        "ACT EFF DT": "20250101",
+        "TERM DT": "",
+    })
+    addendum_a = pd.DataFrame({
+        "APC": apcs,
+        "Group Title": [f"Level {i % 9 + 1} {title}" for i, title in enumerate(choice(rng, PROCEDURES, n_apc))],
+        "SI": rng.choice(["S", "T", "J1", "V", "Q1"], n_apc),
+        "Relative Weight": np.round(payment / 89.17, 4),
+        "Payment Rate": [f"${value:,.2f}" for value in payment],
+        "National Unadjusted Copayment": [f"${value * 0.2:,.2f}" for value in payment],
+        "Minimum Unadjusted Copayment": [f"${value * 0.2:,.2f}" for value in payment],
+        "IRA Coinsurance percentage": "",
+        "Adjusted Beneficiary Copayment": "",
+        "Drug and Device Pass-Through Expiration during Calendar Year": "",
+    })
+    b_payment = np.round(rng.lognormal(4, 1.5, n_hcpcs), 2)
+    addendum_b = pd.DataFrame({
+        "HCPCS Code": hcpcs_codes,
+        "Short Descriptor": hcpcs["SHORT DESCRIPTION"],
+        "SI": rng.choice(["N", "S", "T", "K", "Q1"], n_hcpcs),
+        "APC": hcpcs["OPPS"],
+        "Relative Weight": np.round(b_payment / 89.17, 4),
+        "Payment Rate": [f"${value:,.2f}" for value in b_payment],
+        "National Unadjusted Copayment": "",
+        "Minimum Unadjusted Copayment": [f"${value * 0.2:,.2f}" for value in b_payment],
+        "Drug and Device Pass-Through Expiration during Calendar Year": "",
+    })
+    icd10 = {
+        "resourceType": "CodeSystem",
+        "url": "http://hl7.org/fhir/sid/icd-10",
+        "concept": [{"code": code, "display": f"Synthetic condition {code}"} for code in codes],
+    }
+    return hcpcs, addendum_a, addendum_b, icd10
+
+def write_mapping_sources(output_dir, n_concepts, seed=42):
+    """Writes the mapping sources the way CMS ships them; returns {source: path}.
+
+    Addendum A/B carry the title rows the parsers skip (2 and 4 lines).
+    """
+    hcpcs, addendum_a, addendum_b, icd10 = make_mapping_sources(n_concepts, seed)
+    paths = {
+        "hcpcs": os.path.join(output_dir, "HCPC_synthetic.csv"),
+        "addendum_a": os.path.join(output_dir, "Addendum_A_synthetic.csv"),
+        "addendum_b": os.path.join(output_dir, "Addendum_B_synthetic.csv"),
+        "icd10": os.path.join(output_dir, "icd10_codesystem_synthetic.json"),
+    }
+    hcpcs.to_csv(paths["hcpcs"], index=False)
+    with open(paths["addendum_a"], "w") as f:
+        f.write("Addendum A - Final OPPS APCs (synthetic)\n\n")
+        addendum_a.to_csv(f, index=False)
+    with open(paths["addendum_b"], "w") as f:
+        f.write("Addendum B - Final OPPS Payment by HCPCS Code (synthetic)\n\n\n\n")
+        addendum_b.to_csv(f, index=False)
+    with open(paths["icd10"], "w") as f:
+        json.dump(icd10, f)
+    return paths
+
+def iter_fhir_resources(n_conditions, codes, seed=42):
+    """One Patient and one Condition per condition, some Conditions with a second (SNOMED) coding."""
+    rng = np.random.default_rng(seed)
+    code_picks = rng.integers(len(codes), size=n_conditions)
+    snomed = rng.random(n_conditions) < 0.3
+    for i in range(n_conditions):
+        code = codes[code_picks[i]]
+        yield {"resourceType": "Patient", "id": f"p{i}",
+               "name": [{"family": FAMILY_NAMES[i % len(FAMILY_NAMES)], "given": [GIVEN_NAMES[i % len(GIVEN_NAMES)]]}]}
+        coding = [{"system": "http://hl7.org/fhir/sid/icd-10", "code": code, "display": f"Synthetic condition {code}"}]
+        if snomed[i]:
+            coding.append({"system": "http://snomed.info/sct", "code": str(100_000 + code_picks[i]), "display": "Finding"})
+        yield {"resourceType": "Condition", "id": f"c{i}", "subject": {"reference": f"Patient/p{i}"},
+               "code": {"coding": coding}}
+
+def write_fhir(path, n_conditions, codes=None, seed=42):
+    """Writes a FHIR Bundle (.json) or a bulk-export NDJSON file (.ndjson), streamed."""
+    codes = codes if codes is not None else icd10_codes(1000)
+    resources = iter_fhir_resources(n_conditions, codes, seed)
+    with open(path, "w") as f:
+        if path.endswith(".ndjson"):
+            for resource in resources:
+                f.write(json.dumps(resource))
+                f.write("\n")
+            return path
+        f.write('{"resourceType": "Bundle", "type": "collection", "entry": [')
+        for i, resource in enumerate(resources):
+            f.write(", " if i else "")
+            f.write(json.dumps({"resource": resource}))
+        f.write("]}")
+    return path
+
+PATIENT_TEMPLATE = """<?xml version='1.0' encoding='UTF-8'?>
+<PRPA_MT201310UV02.Patient>
+  <id root="1.2.3.4.5" extension="P{id:08d}"/>
+  <name>
+    <family>{family}</family>
+    <given>{given}</given>
+  </name>
+  <administrativeGenderCode>{gender}</administrativeGenderCode>
+  <birthTime value="{birth}"/>
+</PRPA_MT201310UV02.Patient>
+"""
+
+CCD_TEMPLATE = ("<ClinicalDocument><id root=\"urn:hl7-org:v3\" extension=\"doc-{id:08d}\" /><code code=\"ED\" />"
+                "<patient><id>P{patient:08d}</id><family>{family}</family><given>{given}</given></patient>"
+                "</ClinicalDocument>\n")
+
+def write_hl7_xml(path, n_records, kind="patient", seed=42, batch_size=100_000):
+    """Concatenated HL7 v3 patient messages (kind="patient") or CCD documents (kind="ccd"), as in data/."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        for start in range(0, n_records, batch_size):
+            count = min(batch_size, n_records - start)
+            families = choice(rng, FAMILY_NAMES, count)
+            givens = choice(rng, GIVEN_NAMES, count)
+            if kind == "patient":
+                genders = choice(rng, ["M", "F"], count)
+                births = np.datetime_as_string(np.datetime64("1930-01-01") + rng.integers(0, 33_000, count))
+                births = np.char.replace(births, "-", "")
+                f.write("\n".join(PATIENT_TEMPLATE.format(id=start + i, family=families[i], given=givens[i],
+                                                          gender=genders[i], birth=births[i]) for i in range(count)))
+                f.write("\n")
+            else:
+                patients = rng.integers(0, max(n_records // 3, 1), count)
+                f.write("".join(CCD_TEMPLATE.format(id=start + i, patient=patients[i], family=families[i],
+                                                    given=givens[i]) for i in range(count)))
+    return path
+
+def write_all(output_dir, n_rows, n_concepts=None, n_conditions=None, n_hl7_records=None, charge_format="csv",
+              chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Every synthetic source in output_dir, sized from n_rows unless given; returns {name: path}."""
+    os.makedirs(output_dir, exist_ok=True)
+    n_concepts = n_concepts or max(n_rows // 100, 100)
+    n_conditions = n_conditions or max(n_rows // 10, 100)
+    n_hl7_records = n_hl7_records or max(n_rows // 10, 100)
+    paths = {"charges": write_charges(os.path.join(output_dir, f"charges.{charge_format}"), n_rows, chunk_rows, seed)}
+    paths.update(write_mapping_sources(output_dir, n_concepts, seed))
+    codes = icd10_codes(n_concepts)
+    paths["fhir_bundle"] = write_fhir(os.path.join(output_dir, "conditions_bundle.json"), n_conditions, codes, seed)
+    paths["fhir_ndjson"] = write_fhir(os.path.join(output_dir, "Condition.ndjson"), n_conditions, codes, seed)
+    paths["hl7_patients"] = write_hl7_xml(os.path.join(output_dir, "patients_hl7_v3.xml"), n_hl7_records, "patient", seed)
+    paths["hl7_ccd"] = write_hl7_xml(os.path.join(output_dir, "ed_ccd.xml"), n_hl7_records, "ccd", seed)
+    return paths
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Write schema-faithful synthetic charge, mapping, FHIR and HL7 data.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--rows", type=int, default=100_000, help="charge rows (1k to 100M)")
+    parser.add_argument("--concepts", type=int, help="ICD-10 concepts (default rows / 100)")
+    parser.add_argument("--conditions", type=int, help="FHIR Conditions (default rows / 10)")
+    parser.add_argument("--hl7-records", type=int, help="HL7 documents per file (default rows / 10)")
+    parser.add_argument("--format", dest="charge_format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    paths = write_all(args.output_dir, args.rows, args.concepts, args.conditions, args.hl7_records,
+                      args.charge_format, args.chunk_rows, args.seed)
+    for name, path in paths.items():
+        print(f"{name:<14} {os.path.getsize(path) / 1024 ** 2:>10.1f} MB  {path}")
+
+if __name__ == "__main__":
+    cli()